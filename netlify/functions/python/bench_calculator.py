@@ -0,0 +1,282 @@
+"""
+Benchmark suite for calculator and model throughput
+
+Measures compute_scores, validate_rubric, _sum_awarded_points and Pydantic
+parsing of Rubric / ExtractedScores over a grid of criteria counts,
+submission counts, scale modes and rounding modes. Each case reports
+ops/sec and peak traced memory; results are written as JSON and can be
+compared against a stored baseline to flag regressions.
+
+Usage:
+    python bench_calculator.py                      # quick grid
+    python bench_calculator.py --full               # 4-200 criteria, 1-1M submissions
+    python bench_calculator.py --output results.json
+    python bench_calculator.py --save-baseline      # store results as the baseline
+    python bench_calculator.py --compare            # exit 1 on regressions
+
+Baselines are machine-specific; save one on the machine you compare on.
+"""
+
+import argparse
+import gc
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from calculator import compute_scores, validate_rubric, _sum_awarded_points
+from models import Rubric, Criterion, Level, Scale, Rounding, ExtractedScores, Award
+
+
+QUICK_CRITERIA = (4, 50)
+QUICK_SUBMISSIONS = (1, 1_000)
+FULL_CRITERIA = (4, 20, 50, 200)
+FULL_SUBMISSIONS = (1, 1_000, 100_000, 1_000_000)
+SCALE_MODES = ("percent", "points")
+ROUNDING_MODES = ("HALF_UP", "HALF_EVEN", "HALF_DOWN")
+
+# Distinct submissions per case; larger counts cycle through this pool so
+# memory measures the calculator, not the synthetic input
+SUBMISSION_POOL = 256
+# Operations traced for peak memory (tracemalloc slows timing considerably)
+MEMORY_SAMPLE = 1_000
+DEFAULT_TOLERANCE = 0.20
+DEFAULT_BASELINE = Path(__file__).with_name("bench_baseline.json")
+
+
+@dataclass
+class BenchResult:
+    """Timing and memory for one benchmark case"""
+    name: str
+    params: Dict[str, object]
+    ops: int
+    seconds: float
+    ops_per_sec: float
+    peak_kib: float
+
+    @property
+    def key(self) -> str:
+        params = ",".join(f"{k}={v}" for k, v in sorted(self.params.items()))
+        return f"{self.name}[{params}]"
+
+
+def build_rubric(criteria: int, mode: str = "percent", rounding: str = "HALF_UP") -> Rubric:
+    """Synthetic rubric with varied max points and weights"""
+    return Rubric(
+        rubric_id=f"bench-{criteria}",
+        title="Benchmark Rubric",
+        scale=Scale(
+            mode=mode,
+            total_points=Decimal("100") if mode == "points" else None,
+            rounding=Rounding(mode=rounding, decimals=2),
+        ),
+        criteria=[
+            Criterion(
+                id=f"criterion-{i}",
+                name=f"Criterion {i}",
+                max_points=Decimal(4 + i % 3),
+                weight=Decimal("1.0") + Decimal(i % 4) / 4,
+                levels=[
+                    Level(label=f"Level {p}", points=Decimal(p), descriptor="Synthetic level")
+                    for p in range(4 + i % 3, 0, -1)
+                ],
+            )
+            for i in range(criteria)
+        ],
+    )
+
+
+def build_submission_pool(rubric: Rubric, size: int = SUBMISSION_POOL) -> List[ExtractedScores]:
+    """Deterministic in-range submissions for a rubric"""
+    pool = []
+    for n in range(size):
+        pool.append(ExtractedScores(
+            submission_id=f"sub-{n}",
+            scores=[
+                Award(
+                    criterion_id=c.id,
+                    level="Synthetic",
+                    points_awarded=Decimal((n * 7 + i * 3) % (int(c.max_points) * 2 + 1)) / 2,
+                    rationale="Synthetic rationale",
+                )
+                for i, c in enumerate(rubric.criteria)
+            ],
+        ))
+    return pool
+
+
+def _cycle(pool: Sequence, count: int) -> Iterator:
+    return itertools.islice(itertools.cycle(pool), count)
+
+
+def measure(name: str, params: Dict[str, object], count: int,
+            run: Callable[[int], None]) -> BenchResult:
+    """Time run(count), then trace peak memory over a capped sample"""
+    gc.collect()
+    start = time.perf_counter()
+    run(count)
+    seconds = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    run(min(count, MEMORY_SAMPLE))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return BenchResult(
+        name=name,
+        params=params,
+        ops=count,
+        seconds=round(seconds, 6),
+        ops_per_sec=round(count / seconds, 1) if seconds > 0 else float("inf"),
+        peak_kib=round(peak / 1024, 1),
+    )
+
+
+def run_suite(criteria_grid: Sequence[int], submission_grid: Sequence[int],
+              name_filter: Optional[str] = None) -> List[BenchResult]:
+    """Run every benchmark case in the grid"""
+    results = []
+
+    def wanted(name: str) -> bool:
+        return name_filter is None or name_filter in name
+
+    for criteria in criteria_grid:
+        base = build_rubric(criteria)
+        pool = build_submission_pool(base)
+        rubric_json = base.model_dump_json()
+        pool_json = [s.model_dump_json() for s in pool]
+
+        for submissions in submission_grid:
+            params = {"criteria": criteria, "submissions": submissions}
+
+            if wanted("sum_awarded_points"):
+                def run(n):
+                    for extracted in _cycle(pool, n):
+                        _sum_awarded_points(base, extracted)
+                results.append(measure("sum_awarded_points", params, submissions, run))
+
+            if wanted("parse_extracted_scores"):
+                def run(n):
+                    for raw in _cycle(pool_json, n):
+                        ExtractedScores.model_validate_json(raw)
+                results.append(measure("parse_extracted_scores", params, submissions, run))
+
+            if wanted("compute_scores"):
+                for mode, rounding in itertools.product(SCALE_MODES, ROUNDING_MODES):
+                    rubric = build_rubric(criteria, mode, rounding)
+
+                    def run(n):
+                        for extracted in _cycle(pool, n):
+                            compute_scores(rubric, extracted)
+                    case = dict(params, mode=mode, rounding=rounding)
+                    results.append(measure("compute_scores", case, submissions, run))
+
+        # Per-rubric work: one op per rubric, repeated to get a stable rate
+        repeats = max(1, 20_000 // criteria)
+        if wanted("parse_rubric"):
+            def run(n):
+                for _ in range(n):
+                    Rubric.model_validate_json(rubric_json)
+            results.append(measure("parse_rubric", {"criteria": criteria}, repeats, run))
+
+        if wanted("validate_rubric"):
+            for mode in SCALE_MODES:
+                rubric = build_rubric(criteria, mode)
+
+                def run(n):
+                    for _ in range(n):
+                        validate_rubric(rubric)
+                case = {"criteria": criteria, "mode": mode}
+                results.append(measure("validate_rubric", case, repeats, run))
+
+    return results
+
+
+def compare_to_baseline(results: Sequence[BenchResult], baseline: Dict,
+                        tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Flag cases whose ops/sec dropped more than tolerance below the baseline.
+
+    Returns:
+        Human-readable regression messages (empty if none)
+    """
+    previous = {case["key"]: case for case in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get(result.key)
+        if before is None:
+            continue
+        if result.ops_per_sec < before["ops_per_sec"] * (1 - tolerance):
+            change = result.ops_per_sec / before["ops_per_sec"] - 1
+            regressions.append(
+                f"{result.key}: {result.ops_per_sec:,.0f} ops/s vs baseline "
+                f"{before['ops_per_sec']:,.0f} ({change:+.1%})"
+            )
+    return regressions
+
+
+def to_json(results: Sequence[BenchResult]) -> Dict:
+    """Machine-readable report"""
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": [dict(asdict(result), key=result.key) for result in results],
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Calculator and model throughput benchmarks")
+    parser.add_argument("--full", action="store_true", help="Run the full size grid")
+    parser.add_argument("--criteria", help="Comma-separated criteria counts (overrides grid)")
+    parser.add_argument("--submissions", help="Comma-separated submission counts (overrides grid)")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--output", help="Write JSON results to this path")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline JSON path")
+    parser.add_argument("--save-baseline", action="store_true", help="Save results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="Exit 1 if any case regressed")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed ops/sec drop before flagging (default 0.20)")
+    args = parser.parse_args(argv)
+
+    criteria_grid = FULL_CRITERIA if args.full else QUICK_CRITERIA
+    submission_grid = FULL_SUBMISSIONS if args.full else QUICK_SUBMISSIONS
+    if args.criteria:
+        criteria_grid = [int(c) for c in args.criteria.split(",")]
+    if args.submissions:
+        submission_grid = [int(s) for s in args.submissions.split(",")]
+
+    results = run_suite(criteria_grid, submission_grid, args.filter)
+    for result in results:
+        print(f"{result.key:<80} {result.ops_per_sec:>14,.0f} ops/s {result.peak_kib:>10,.1f} KiB")
+
+    report = to_json(results)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        Path(args.baseline).write_text(json.dumps(report, indent=2))
+        print(f"Saved baseline to {args.baseline}")
+
+    if args.compare:
+        baseline_path = Path(args.baseline)
+        if not baseline_path.exists():
+            print(f"No baseline at {baseline_path}; run with --save-baseline first")
+            return 1
+        regressions = compare_to_baseline(results, json.loads(baseline_path.read_text()), args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            return 1
+        print("No regressions against baseline")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Cold-start benchmark for the grading function
+
+Times fresh interpreter imports of calculator and models, and the first
+grade after import (validate rubric and score JSON, compute scores), each in
+a new subprocess so nothing is cached in memory. Reports the median over
+several runs and fails if any case exceeds its budget, or if importing
+calculator pulls in Pydantic.
+
+Usage:
+    python bench_cold_start.py                       # default budgets
+    python bench_cold_start.py --repeat 9 --budget first_grade=400
+
+Budgets are generous defaults for a serverless-sized CPU; tighten them per
+machine with --budget.
+"""
+
+import argparse
+import compileall
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+
+HERE = Path(__file__).parent
+DEFAULT_REPEAT = 5
+
+# Code run in a fresh interpreter; each prints elapsed seconds as JSON
+CASES = {
+    "import_calculator": "import calculator",
+    "import_models": "import models",
+    "first_grade": "import calculator; calculator.prewarm()",
+}
+
+# Milliseconds (median of fresh-process runs)
+DEFAULT_BUDGETS_MS = {
+    "import_calculator": 100.0,
+    "import_models": 800.0,
+    "first_grade": 1000.0,
+}
+
+# Modules that must not be loaded by a bare "import calculator"
+CALCULATOR_FORBIDDEN = ("pydantic", "pydantic_core", "models")
+
+_TEMPLATE = """
+import json, sys, time
+started = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def run_case(code: str) -> Dict:
+    """Run code in a fresh interpreter; returns seconds and loaded modules"""
+    completed = subprocess.run(
+        [sys.executable, "-c", _TEMPLATE.format(code=code)],
+        cwd=HERE, capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def measure(name: str, repeat: int = DEFAULT_REPEAT) -> Dict:
+    """Median milliseconds for one case, plus the modules it loaded"""
+    runs = [run_case(CASES[name]) for _ in range(repeat)]
+    return {
+        "name": name,
+        "median_ms": round(statistics.median(run["seconds"] for run in runs) * 1000, 2),
+        "min_ms": round(min(run["seconds"] for run in runs) * 1000, 2),
+        "modules": runs[-1]["modules"],
+    }
+
+
+def check_budgets(results: Sequence[Dict], budgets: Dict[str, float]) -> List[str]:
+    """Human-readable failures for cases over budget or loading forbidden modules"""
+    failures = []
+    for result in results:
+        budget = budgets.get(result["name"])
+        if budget is not None and result["median_ms"] > budget:
+            failures.append(f"{result['name']}: {result['median_ms']:.1f} ms exceeds budget {budget:.1f} ms")
+        if result["name"] == "import_calculator":
+            loaded = [m for m in CALCULATOR_FORBIDDEN if m in result["modules"]]
+            if loaded:
+                failures.append(f"import_calculator loads {', '.join(loaded)}")
+    return failures
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Cold-start import and first-grade benchmark")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Fresh processes per case")
+    parser.add_argument("--budget", action="append", default=[], metavar="CASE=MS",
+                        help="Override a budget in milliseconds (repeatable)")
+    parser.add_argument("--case", action="append", choices=sorted(CASES), help="Only run these cases")
+    parser.add_argument("--output", help="Write JSON results to this path")
+    args = parser.parse_args(argv)
+
+    budgets = dict(DEFAULT_BUDGETS_MS)
+    for override in args.budget:
+        name, _, value = override.partition("=")
+        if name not in CASES or not value:
+            parser.error(f"--budget expects CASE=MS with CASE in {sorted(CASES)}")
+        budgets[name] = float(value)
+
+    # Deployments ship bytecode; don't time source compilation
+    compileall.compile_dir(str(HERE), quiet=1, maxlevels=0)
+
+    results = [measure(name, args.repeat) for name in (args.case or CASES)]
+    for result in results:
+        budget = budgets.get(result["name"])
+        print(f"{result['name']:<20} {result['median_ms']:>9.1f} ms median  "
+              f"{result['min_ms']:>9.1f} ms min  budget {budget:.0f} ms")
+
+    if args.output:
+        report = [{k: v for k, v in result.items() if k != "modules"} for result in results]
+        Path(args.output).write_text(json.dumps({"python": sys.version.split()[0], "results": report}, indent=2))
+
+    failures = check_budgets(results, budgets)
+    for message in failures:
+        print(f"OVER BUDGET {message}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Benchmark: parallel regrade vs. single-process scoring
+
+Times regrade_parallel at several worker counts against the single-process
+path (regrade_parallel with workers=1) on the same synthetic assignment,
+checks that every run produces identical results, and reports throughput,
+speedup and parallel efficiency. By default submissions are fed as stored
+extracted_scores JSON, so parsing is part of the measured work.
+
+Usage:
+    python bench_regrade.py [--submissions 200000] [--criteria 8] [--workers 2,4]
+                            [--input json|objects]
+"""
+
+import argparse
+import os
+import random
+import time
+from decimal import Decimal
+from typing import List
+
+from models import Rubric, Criterion, Level, Scale, Rounding, ExtractedScores, Award
+from regrade import regrade_parallel, DEFAULT_CHUNK_SIZE
+
+
+def build_rubric(criteria: int) -> Rubric:
+    """Points-mode rubric with criteria of varying max points and weight"""
+    return Rubric(
+        rubric_id="bench-regrade",
+        title="Regrade Benchmark",
+        scale=Scale(mode="points", total_points=Decimal("100"),
+                    rounding=Rounding(mode="HALF_EVEN", decimals=2)),
+        criteria=[
+            Criterion(
+                id=f"c{i}",
+                name=f"Criterion {i}",
+                max_points=Decimal(4 + i % 3),
+                weight=Decimal("1.0") + Decimal(i % 4) / 4,
+                levels=[Level(label="Top", points=Decimal(4 + i % 3), descriptor="Top")],
+            )
+            for i in range(criteria)
+        ],
+    )
+
+
+def build_submissions(rubric: Rubric, count: int, seed: int = 42) -> List[ExtractedScores]:
+    """Random in-range awards on a half-point grid"""
+    rng = random.Random(seed)
+    return [
+        ExtractedScores(
+            submission_id=f"sub-{n}",
+            scores=[
+                Award(criterion_id=c.id, level="Top",
+                      points_awarded=Decimal(rng.randint(0, int(c.max_points) * 2)) / 2,
+                      rationale="Synthetic")
+                for c in rubric.criteria
+            ],
+        )
+        for n in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--submissions", type=int, default=200_000)
+    parser.add_argument("--criteria", type=int, default=8)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--input", choices=("json", "objects"), default="json")
+    parser.add_argument("--workers", default=None,
+                        help="Comma-separated worker counts (default: 2, 4, ... up to CPU count)")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    if args.workers:
+        worker_counts = [int(w) for w in args.workers.split(",")]
+    else:
+        worker_counts = sorted({w for w in (2, 4, 8, 16, 32, cpus) if 1 < w <= cpus}) or [2]
+
+    rubric = build_rubric(args.criteria)
+    submissions = build_submissions(rubric, args.submissions)
+    if args.input == "json":
+        submissions = [s.model_dump_json() for s in submissions]
+    print(f"{args.submissions} submissions x {args.criteria} criteria ({args.input}), {cpus} CPUs")
+
+    start = time.perf_counter()
+    baseline = regrade_parallel(rubric, submissions, workers=1, chunk_size=args.chunk_size)
+    single = time.perf_counter() - start
+    print(f"{'single-process':>16}: {single:8.3f}s  {args.submissions / single:12,.0f} subs/s")
+
+    for workers in worker_counts:
+        start = time.perf_counter()
+        results = regrade_parallel(rubric, submissions, workers=workers, chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - start
+        assert results == baseline, f"results differ with {workers} workers"
+        print(
+            f"{f'{workers} workers':>16}: {elapsed:8.3f}s  {args.submissions / elapsed:12,.0f} subs/s"
+            f"  speedup {single / elapsed:5.2f}x  efficiency {single / elapsed / workers:6.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,24 @@ LLM provides per-criterion scores; this calculator handles ALL math.
 Core Philosophy: "LLM for language, tools for math."
 """
 
+from __future__ import annotations
+
+import threading
+import time
 from decimal import Decimal, ROUND_HALF_UP, ROUND_HALF_EVEN, ROUND_HALF_DOWN
-from typing import Dict
-from models import Rubric, ExtractedScores, ComputedScores, Rounding
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+# The calculator only reads attributes of the models, so Pydantic is not
+# imported here; this keeps it off the cold-start path for callers that
+# never validate (e.g. trusted rubrics)
+if TYPE_CHECKING:
+    from models import Criterion, Rubric, ExtractedScores, LevelExtractedScores, Rounding
 
 
+# Bump whenever a change can alter computed scores; cached and stored
+# results from other versions are treated as stale
+CALCULATOR_VERSION = "1"
+
 # Rounding mode mappings
 ROUNDING_MODES = {
     "HALF_UP": ROUND_HALF_UP,
@@ -20,62 +33,379 @@ ROUNDING_MODES = {
 }
 
 
+# Quantizers for every precision Rounding allows (decimals 0-4)
+_QUANTIZERS = tuple(Decimal(10) ** (-decimals) for decimals in range(5))
+
+
 def _quantizer(decimals: int) -> Decimal:
     """Create quantizer for rounding to specified decimal places"""
+    if 0 <= decimals < len(_QUANTIZERS):
+        return _QUANTIZERS[decimals]
     return Decimal(10) ** (-decimals)
 
 
+class _Layout(NamedTuple):
+    """A rubric's criteria flattened in order, with their enclosing sections"""
+    criteria: Tuple[Criterion, ...]
+    # Criterion weight times the weights of all enclosing sections
+    weights: Tuple[Decimal, ...]
+    # Innermost section index per criterion (-1 for top-level criteria)
+    criterion_sections: Tuple[int, ...]
+    # Sections in pre-order, so every parent index precedes its children
+    section_ids: Tuple[str, ...]
+    section_parents: Tuple[int, ...]
+    section_weights: Tuple[Decimal, ...]
+
+
+def _flatten(rubric: Rubric) -> _Layout:
+    """Top-level criteria first, then each section's criteria in pre-order"""
+    criteria = list(rubric.criteria)
+    weights = [c.weight for c in criteria]
+    criterion_sections = [-1] * len(criteria)
+    section_ids: List[str] = []
+    section_parents: List[int] = []
+    section_weights: List[Decimal] = []
+    
+    # (section, parent index, product of ancestor weights)
+    stack = [(section, -1, None) for section in reversed(rubric.sections)]
+    while stack:
+        section, parent, scale = stack.pop()
+        index = len(section_ids)
+        section_ids.append(section.id)
+        section_parents.append(parent)
+        section_weights.append(section.weight)
+        scale = section.weight if scale is None else scale * section.weight
+        for criterion in section.criteria:
+            criteria.append(criterion)
+            weights.append(criterion.weight * scale)
+            criterion_sections.append(index)
+        stack.extend((child, index, scale) for child in reversed(section.sections))
+    
+    return _Layout(
+        tuple(criteria), tuple(weights), tuple(criterion_sections),
+        tuple(section_ids), tuple(section_parents), tuple(section_weights),
+    )
+
+
+class CompiledRubric:
+    """
+    Rubric with all per-rubric scoring work done once.
+    
+    Holds the max weighted points, criterion-id index, weight/max vectors,
+    level-label index, rounding mode and quantizer so that scoring many
+    submissions against the same rubric only pays for the per-submission
+    arithmetic.
+    
+    Sections are flattened into the same vectors: criteria carry their
+    effective weight (including every enclosing section's weight), plus the
+    index of their innermost section, and sections carry their parent index,
+    weight and maximum subtotal. A flat rubric has no sections and scores
+    exactly as before.
+    
+    Build with compile_rubric() to validate first; the constructor itself
+    does not validate (matching compute_scores on a plain Rubric).
+    """
+    
+    __slots__ = (
+        "rubric",
+        "criteria",
+        "criterion_ids",
+        "criterion_id_set",
+        "index",
+        "weights",
+        "max_points",
+        "max_weighted",
+        "_level_points",
+        "criterion_sections",
+        "local_weights",
+        "section_ids",
+        "section_parents",
+        "section_weights",
+        "section_max",
+        "scale_mode",
+        "total_points",
+        "rounding_mode",
+        "quantizer",
+    )
+    
+    def __init__(self, rubric: Rubric):
+        self.rubric = rubric
+        if rubric.sections:
+            layout = _flatten(rubric)
+            criteria, weights = layout.criteria, layout.weights
+        else:
+            layout = None
+            criteria = tuple(rubric.criteria)
+            weights = tuple(c.weight for c in criteria)
+        self.criteria: Tuple[Criterion, ...] = criteria
+        self.criterion_ids: Tuple[str, ...] = tuple(c.id for c in criteria)
+        self.criterion_id_set = frozenset(self.criterion_ids)
+        self.index: Dict[str, int] = {cid: i for i, cid in enumerate(self.criterion_ids)}
+        self.weights: Tuple[Decimal, ...] = weights
+        self.max_points: Tuple[Decimal, ...] = tuple(c.max_points for c in criteria)
+        self.max_weighted = Decimal("0")
+        for max_points, weight in zip(self.max_points, weights):
+            self.max_weighted += max_points * weight
+        self._level_points: Optional[Tuple[Dict[str, Decimal], ...]] = None
+        if layout is None:
+            self.criterion_sections: Tuple[int, ...] = ()
+            self.local_weights: Tuple[Decimal, ...] = weights
+            self.section_ids: Tuple[str, ...] = ()
+            self.section_parents: Tuple[int, ...] = ()
+            self.section_weights: Tuple[Decimal, ...] = ()
+            self.section_max: Tuple[Decimal, ...] = ()
+        else:
+            self.criterion_sections = layout.criterion_sections
+            # Weights below each criterion's innermost section (its own weight)
+            self.local_weights = tuple(c.weight for c in criteria)
+            self.section_ids = layout.section_ids
+            self.section_parents = layout.section_parents
+            self.section_weights = layout.section_weights
+            self.section_max = tuple(self._section_subtotals(self.max_points))
+        self.scale_mode = rubric.scale.mode
+        self.total_points: Optional[Decimal] = rubric.scale.total_points
+        self.rounding_mode = ROUNDING_MODES[rubric.scale.rounding.mode]
+        self.quantizer = _quantizer(rubric.scale.rounding.decimals)
+    
+    def round(self, value: Decimal) -> Decimal:
+        """Round value with the rubric's precompiled quantizer and mode"""
+        return value.quantize(self.quantizer, rounding=self.rounding_mode)
+    
+    @property
+    def level_points(self) -> Tuple[Dict[str, Decimal], ...]:
+        """Level label -> points per criterion, built on first use"""
+        if self._level_points is None:
+            # The first level wins on duplicate labels
+            self._level_points = tuple(
+                {level.label: level.points for level in reversed(c.levels)}
+                for c in self.criteria
+            )
+        return self._level_points
+    
+    def _section_subtotals(self, points: Iterable[Decimal]) -> List[Decimal]:
+        """Per-section weighted subtotals of points given by criterion position"""
+        subtotals = [Decimal("0")] * len(self.section_ids)
+        for awarded, weight, section in zip(points, self.local_weights, self.criterion_sections):
+            if section >= 0:
+                subtotals[section] += awarded * weight
+        _roll_up(self, subtotals)
+        return subtotals
+    
+    def points_for_level(self, criterion_id: str, label: str) -> Decimal:
+        """
+        Points for a criterion's level label.
+        
+        Raises:
+            ValueError: If the criterion or label is not in the rubric
+        """
+        position = self.index.get(criterion_id)
+        if position is None:
+            raise ValueError(f"Unknown criterion '{criterion_id}'")
+        points = self.level_points[position].get(label)
+        if points is None:
+            raise ValueError(f"Unknown level '{label}' for criterion '{criterion_id}'")
+        return points
+
+
+RubricLike = Union["Rubric", CompiledRubric]
+
+
+def _roll_up(compiled: CompiledRubric, subtotals: List[Decimal]) -> None:
+    """Add each section's weighted subtotal into its parent's, children first"""
+    parents = compiled.section_parents
+    weights = compiled.section_weights
+    for section in range(len(subtotals) - 1, -1, -1):
+        parent = parents[section]
+        if parent >= 0:
+            subtotals[parent] += subtotals[section] * weights[section]
+
+
+def compile_rubric(rubric: Rubric) -> CompiledRubric:
+    """
+    Validate a rubric and precompute everything compute_scores needs.
+    
+    Raises:
+        ValueError: If rubric is invalid
+    """
+    validate_rubric(rubric)
+    return CompiledRubric(rubric)
+
+
+def _as_compiled(rubric: RubricLike) -> CompiledRubric:
+    """Return rubric as a CompiledRubric, compiling (without validation) if needed"""
+    if isinstance(rubric, CompiledRubric):
+        return rubric
+    return CompiledRubric(rubric)
+
+
 def _sum_max_points(rubric: Rubric) -> Decimal:
     """Calculate maximum possible weighted points from rubric"""
     total = Decimal("0")
-    for criterion in rubric.criteria:
-        total += criterion.max_points * criterion.weight
+    if not rubric.sections:
+        for criterion in rubric.criteria:
+            total += criterion.max_points * criterion.weight
+        return total
+    layout = _flatten(rubric)
+    for criterion, weight in zip(layout.criteria, layout.weights):
+        total += criterion.max_points * weight
     return total
 
 
-def _sum_awarded_points(rubric: Rubric, extracted: ExtractedScores) -> Decimal:
+def _criterion_mismatch_error(
+    compiled: CompiledRubric, points_by_id: Dict[str, Decimal]
+) -> Optional[str]:
+    """Return the missing/extra criteria error message, if any"""
+    if points_by_id.keys() == compiled.criterion_id_set:
+        return None
+    
+    rubric_criterion_ids = set(compiled.criterion_ids)
+    awarded_criterion_ids = set(points_by_id.keys())
+    missing = rubric_criterion_ids - awarded_criterion_ids
+    extra = awarded_criterion_ids - rubric_criterion_ids
+    error_parts = []
+    if missing:
+        error_parts.append(f"Missing criteria: {missing}")
+    if extra:
+        error_parts.append(f"Extra criteria: {extra}")
+    return f"Criterion mismatch. {', '.join(error_parts)}"
+
+
+def _weighted_sum_or_error(
+    compiled: CompiledRubric, points_by_id: Dict[str, Decimal]
+) -> Tuple[Optional[Decimal], Optional[str]]:
+    """Weighted total with range validation, for an already-matched criterion set"""
+    total = Decimal("0")
+    for criterion_id, max_points, weight in zip(
+        compiled.criterion_ids, compiled.max_points, compiled.weights
+    ):
+        awarded = points_by_id[criterion_id]
+        
+        # Validate range
+        if awarded < 0 or awarded > max_points:
+            return None, (
+                f"Invalid points for '{criterion_id}': {awarded} "
+                f"not in range [0, {max_points}]"
+            )
+        
+        total += awarded * weight
+    
+    return total, None
+
+
+def _sectioned_sum_or_error(
+    compiled: CompiledRubric, points_by_id: Dict[str, Decimal]
+) -> Tuple[Optional[Decimal], Optional[List[Decimal]], Optional[str]]:
     """
-    Calculate total weighted points awarded.
+    Weighted total and per-section subtotals in one pass over the criteria.
     
-    Validates that:
-    - All criteria are present
-    - Points are within valid range [0, max_points]
-    - No duplicate criteria
+    Returns:
+        (total, section subtotals, None), or (None, None, error message)
+    """
+    total = Decimal("0")
+    subtotals = [Decimal("0")] * len(compiled.section_ids)
+    for criterion_id, max_points, weight, local_weight, section in zip(
+        compiled.criterion_ids, compiled.max_points, compiled.weights,
+        compiled.local_weights, compiled.criterion_sections,
+    ):
+        awarded = points_by_id[criterion_id]
+        
+        if awarded < 0 or awarded > max_points:
+            return None, None, (
+                f"Invalid points for '{criterion_id}': {awarded} "
+                f"not in range [0, {max_points}]"
+            )
+        
+        total += awarded * weight
+        if section >= 0:
+            subtotals[section] += awarded * local_weight
+    
+    _roll_up(compiled, subtotals)
+    return total, subtotals, None
+
+
+def _totals_or_error(
+    compiled: CompiledRubric, points_by_id: Dict[str, Decimal]
+) -> Tuple[Optional[Decimal], Optional[List[Decimal]], Optional[str]]:
+    """Weighted total, plus section subtotals when the rubric has sections"""
+    if compiled.section_ids:
+        return _sectioned_sum_or_error(compiled, points_by_id)
+    total, error = _weighted_sum_or_error(compiled, points_by_id)
+    return total, None, error
+
+
+def _scored_totals_or_error(
+    compiled: CompiledRubric, extracted: ExtractedScores
+) -> Tuple[Optional[Decimal], Optional[List[Decimal]], Optional[str]]:
+    """_weighted_total_or_error, plus section subtotals for sectioned rubrics"""
+    points_by_id = {score.criterion_id: score.points_awarded for score in extracted.scores}
+    error = _criterion_mismatch_error(compiled, points_by_id)
+    if error is not None:
+        return None, None, error
+    return _sectioned_sum_or_error(compiled, points_by_id)
+
+
+def _weighted_total_or_error(
+    compiled: CompiledRubric, extracted: ExtractedScores
+) -> Tuple[Optional[Decimal], Optional[str]]:
+    """
+    Calculate total weighted points awarded without raising.
+    
+    Returns:
+        (total, None) on success, or (None, error message) if validation fails
     """
     # Create lookup of awarded points by criterion_id
     points_by_id = {score.criterion_id: score.points_awarded for score in extracted.scores}
     
     # Validate all criteria present
-    rubric_criterion_ids = {c.id for c in rubric.criteria}
-    awarded_criterion_ids = set(points_by_id.keys())
-    
-    if rubric_criterion_ids != awarded_criterion_ids:
-        missing = rubric_criterion_ids - awarded_criterion_ids
-        extra = awarded_criterion_ids - rubric_criterion_ids
-        error_parts = []
-        if missing:
-            error_parts.append(f"Missing criteria: {missing}")
-        if extra:
-            error_parts.append(f"Extra criteria: {extra}")
-        raise ValueError(f"Criterion mismatch. {', '.join(error_parts)}")
+    error = _criterion_mismatch_error(compiled, points_by_id)
+    if error is not None:
+        return None, error
     
     # Calculate weighted total with range validation
-    total = Decimal("0")
-    for criterion in rubric.criteria:
-        awarded = points_by_id[criterion.id]
-        
-        # Validate range
-        if awarded < 0 or awarded > criterion.max_points:
-            raise ValueError(
-                f"Invalid points for '{criterion.id}': {awarded} "
-                f"not in range [0, {criterion.max_points}]"
-            )
-        
-        total += awarded * criterion.weight
+    return _weighted_sum_or_error(compiled, points_by_id)
+
+
+def _sum_awarded_points(rubric: RubricLike, extracted: ExtractedScores) -> Decimal:
+    """
+    Calculate total weighted points awarded.
     
+    Validates that:
+    - All criteria are present
+    - Points are within valid range [0, max_points]
+    - No duplicate criteria
+    """
+    total, error = _weighted_total_or_error(_as_compiled(rubric), extracted)
+    if error is not None:
+        raise ValueError(error)
     return total
 
 
+def _scale_error(compiled: CompiledRubric) -> Optional[str]:
+    """Return the rubric-level error that prevents scoring, if any"""
+    if compiled.max_weighted == 0:
+        return "Maximum points cannot be zero"
+    if compiled.scale_mode == "points" and compiled.total_points is None:
+        return "scale.total_points required when mode='points'"
+    return None
+
+
+def _level_error(compiled: CompiledRubric, extracted: ExtractedScores) -> Optional[str]:
+    """Return the first label/points disagreement with the rubric's levels, if any"""
+    for score in extracted.scores:
+        position = compiled.index.get(score.criterion_id)
+        if position is None:
+            continue
+        level_points = compiled.level_points[position].get(score.level)
+        if level_points is None:
+            return f"Unknown level '{score.level}' for criterion '{score.criterion_id}'"
+        if level_points != score.points_awarded:
+            return (
+                f"Level mismatch for '{score.criterion_id}': level '{score.level}' "
+                f"is worth {level_points}, awarded {score.points_awarded}"
+            )
+    return None
+
+
 def _round_decimal(value: Decimal, rounding: Rounding) -> Decimal:
     """Round Decimal value using specified rounding mode and precision"""
     quantizer = _quantizer(rounding.decimals)
@@ -83,13 +413,69 @@ def _round_decimal(value: Decimal, rounding: Rounding) -> Decimal:
     return value.quantize(quantizer, rounding=rounding_mode)
 
 
-def compute_scores(rubric: Rubric, extracted: ExtractedScores) -> Dict[str, str]:
+def _section_scores(compiled: CompiledRubric, subtotals: List[Decimal]) -> Dict[str, Dict[str, str]]:
+    """Rounded raw/max/percent per section, keyed by section id"""
+    sections = {}
+    for section_id, raw, max_points in zip(compiled.section_ids, subtotals, compiled.section_max):
+        sections[section_id] = {
+            "raw_points": str(compiled.round(raw)),
+            "max_points": str(compiled.round(max_points)),
+            "percent": str(compiled.round((raw / max_points) * Decimal("100"))),
+        }
+    return sections
+
+
+def _build_scores(
+    compiled: CompiledRubric, raw_weighted: Decimal, section_subtotals: Optional[List[Decimal]] = None
+) -> Dict[str, str]:
+    """Turn a validated weighted total into rounded score strings"""
+    max_weighted = compiled.max_weighted
+    
+    # Calculate percentage
+    percent = (raw_weighted / max_weighted) * Decimal("100")
+    
+    # Round values
+    raw_rounded = compiled.round(raw_weighted)
+    max_rounded = compiled.round(max_weighted)
+    percent_rounded = compiled.round(percent)
+    
+    # Return based on scale mode
+    if compiled.scale_mode == "percent":
+        result = {
+            "raw_points": str(raw_rounded),
+            "max_points": str(max_rounded),
+            "percent": str(percent_rounded),
+            "final_points": None
+        }
+    else:
+        # Points mode - scale: final = (raw / max) * total_points
+        scaled = (raw_weighted / max_weighted) * compiled.total_points
+        final_rounded = compiled.round(scaled)
+        
+        result = {
+            "raw_points": str(raw_rounded),
+            "max_points": str(max_rounded),
+            "percent": str(percent_rounded),
+            "final_points": str(final_rounded)
+        }
+    
+    if section_subtotals is not None:
+        result["sections"] = _section_scores(compiled, section_subtotals)
+    return result
+
+
+def compute_scores(
+    rubric: RubricLike, extracted: ExtractedScores, strict_levels: bool = False
+) -> Dict[str, str]:
     """
     Compute final scores deterministically using Decimal math.
     
     Args:
-        rubric: Grading rubric with criteria and scale configuration
+        rubric: Grading rubric with criteria and scale configuration, or a
+            CompiledRubric from compile_rubric() to skip per-rubric setup
         extracted: LLM-extracted per-criterion scores
+        strict_levels: If True, also reject awards whose level label is not
+            one of the criterion's levels or whose points differ from it
     
     Returns:
         Dictionary with computed scores as strings:
@@ -97,49 +483,444 @@ def compute_scores(rubric: Rubric, extracted: ExtractedScores) -> Dict[str, str]
         - max_points: Maximum possible weighted points
         - percent: Percentage score (0-100)
         - final_points: Scaled points (only in points mode)
+        - sections: {section_id: {raw_points, max_points, percent}} (only
+          for rubrics with sections)
     
     Raises:
         ValueError: If validation fails or points are out of range
     """
-    # Calculate raw weighted totals
-    max_weighted = _sum_max_points(rubric)
-    raw_weighted = _sum_awarded_points(rubric, extracted)
+    compiled = _as_compiled(rubric)
     
-    # Calculate percentage
-    if max_weighted == 0:
-        raise ValueError("Maximum points cannot be zero")
+    if _metrics is not None:
+        result, error = _score_instrumented(compiled, extracted, _metrics)
+        if error is None and strict_levels:
+            error = _level_error(compiled, extracted)
+        if error is not None:
+            raise ValueError(error)
+        return result
     
-    percent = (raw_weighted / max_weighted) * Decimal("100")
+    if compiled.section_ids:
+        raw_weighted, subtotals, error = _scored_totals_or_error(compiled, extracted)
+        if error is None:
+            error = _scale_error(compiled)
+        if error is None and strict_levels:
+            error = _level_error(compiled, extracted)
+        if error is not None:
+            raise ValueError(error)
+        return _build_scores(compiled, raw_weighted, subtotals)
     
-    # Round values
-    rounding = rubric.scale.rounding
-    raw_rounded = _round_decimal(raw_weighted, rounding)
-    max_rounded = _round_decimal(max_weighted, rounding)
-    percent_rounded = _round_decimal(percent, rounding)
+    # Calculate raw weighted total
+    raw_weighted = _sum_awarded_points(compiled, extracted)
     
-    # Return based on scale mode
-    if rubric.scale.mode == "percent":
-        return {
-            "raw_points": str(raw_rounded),
-            "max_points": str(max_rounded),
-            "percent": str(percent_rounded),
-            "final_points": None
-        }
+    error = _scale_error(compiled)
+    if error is None and strict_levels:
+        error = _level_error(compiled, extracted)
+    if error is not None:
+        raise ValueError(error)
+    
+    return _build_scores(compiled, raw_weighted)
+
+
+def compute_scores_json(
+    rubric: RubricLike, raw: Union[str, bytes], strict_levels: bool = False, exact: bool = False
+) -> Dict[str, str]:
+    """
+    Compute scores straight from LLM output JSON.
+    
+    Skips building an ExtractedScores/Award model per submission (see
+    models.parse_extracted_scores_json). Points are read as Decimals with
+    the same digits ExtractedScores.model_validate_json gives (JSON floats
+    keep at most 17 significant digits), so unless exact is set, results
+    are identical to validating the JSON into ExtractedScores and calling
+    compute_scores.
+    
+    Args:
+        rubric: Grading rubric or CompiledRubric
+        raw: ExtractedScores JSON text or bytes
+        strict_levels: See compute_scores
+        exact: Read point values as exact Decimals instead of through a float
+    
+    Raises:
+        ValueError: If the JSON is malformed or invalid (pydantic's
+            ValidationError is a ValueError), or scoring validation fails
+    """
+    from models import parse_extracted_scores_json
+    return compute_scores(rubric, parse_extracted_scores_json(raw, exact), strict_levels)
+
+
+class ScoringError(NamedTuple):
+    """Per-submission failure reported by compute_scores_many(collect_errors=True)"""
+    index: int
+    submission_id: Optional[str]
+    error: ValueError
+
+
+def compute_scores_many(
+    rubric: RubricLike,
+    extracted_scores: Iterable[ExtractedScores],
+    collect_errors: bool = False,
+    strict_levels: bool = False,
+) -> Iterator[Union[Dict[str, str], ScoringError]]:
+    """
+    Score many submissions against one rubric, lazily and in input order.
+    
+    The rubric is compiled once and per-submission validation reports errors
+    as values, so no exception is raised and unwound per bad submission.
+    
+    Args:
+        rubric: Grading rubric or CompiledRubric shared by all submissions
+        extracted_scores: Iterable of LLM-extracted per-submission scores
+        collect_errors: If True, yield a ScoringError in place of each
+            submission that fails validation instead of raising
+        strict_levels: If True, also fail submissions whose level labels
+            disagree with the rubric (see compute_scores)
+    
+    Yields:
+        compute_scores() result dicts, or ScoringError entries when collecting
+    
+    Raises:
+        ValueError: On the first invalid submission when collect_errors is False
+    """
+    compiled = _as_compiled(rubric)
+    scale_error = _scale_error(compiled)
+    
+    for index, extracted in enumerate(extracted_scores):
+        if _metrics is not None:
+            result, error = _score_instrumented(compiled, extracted, _metrics)
+        elif compiled.section_ids:
+            raw_weighted, subtotals, error = _scored_totals_or_error(compiled, extracted)
+            if error is None:
+                error = scale_error
+            if error is None:
+                result = _build_scores(compiled, raw_weighted, subtotals)
+        else:
+            raw_weighted, error = _weighted_total_or_error(compiled, extracted)
+            if error is None:
+                error = scale_error
+            if error is None:
+                result = _build_scores(compiled, raw_weighted)
+        
+        if error is None and strict_levels:
+            error = _level_error(compiled, extracted)
+        if error is None:
+            yield result
+        elif collect_errors:
+            yield ScoringError(index, extracted.submission_id, ValueError(error))
+        else:
+            raise ValueError(error)
+
+
+def compute_scores_by_level(rubric: RubricLike, level_scores: LevelExtractedScores) -> Dict[str, str]:
+    """
+    Compute scores from level labels alone.
+    
+    Each award's points come from the rubric's level-label index in O(1);
+    any points carried by the awards are ignored. The result is identical to
+    compute_scores with every award's points set to its level's points.
+    
+    Raises:
+        ValueError: If criteria do not match, a label is not one of the
+            criterion's levels, or the rubric cannot be scored
+    """
+    compiled = _as_compiled(rubric)
+    labels_by_id = {score.criterion_id: score.level for score in level_scores.scores}
+    
+    error = _criterion_mismatch_error(compiled, labels_by_id)
+    if error is not None:
+        raise ValueError(error)
+    
+    points_by_id = {}
+    for position, criterion_id in enumerate(compiled.criterion_ids):
+        label = labels_by_id[criterion_id]
+        points = compiled.level_points[position].get(label)
+        if points is None:
+            raise ValueError(f"Unknown level '{label}' for criterion '{criterion_id}'")
+        points_by_id[criterion_id] = points
+    
+    raw_weighted, subtotals, error = _totals_or_error(compiled, points_by_id)
+    if error is None:
+        error = _scale_error(compiled)
+    if error is not None:
+        raise ValueError(error)
+    
+    return _build_scores(compiled, raw_weighted, subtotals)
+
+
+class IncrementalScorer:
+    """
+    Running score for one submission that rescores single-criterion overrides.
     
-    # Points mode - scale to total_points
-    if rubric.scale.total_points is None:
-        raise ValueError("scale.total_points required when mode='points'")
+    Keeps the weighted total and awarded points by criterion position, so
+    update_award() revalidates only the changed criterion and returns fresh
+    scores in O(1) (section subtotals, if any, are re-summed). Results are
+    identical to a full compute_scores call.
+    """
+    
+    __slots__ = ("compiled", "submission_id", "_points", "_raw_weighted")
+    
+    def __init__(self, rubric: RubricLike, extracted: ExtractedScores):
+        """
+        Raises:
+            ValueError: If the initial scores fail compute_scores validation
+        """
+        self.compiled = _as_compiled(rubric)
+        self.submission_id = extracted.submission_id
+        
+        raw_weighted, error = _weighted_total_or_error(self.compiled, extracted)
+        if error is None:
+            error = _scale_error(self.compiled)
+        if error is not None:
+            raise ValueError(error)
+        
+        points_by_id = {score.criterion_id: score.points_awarded for score in extracted.scores}
+        self._points = [points_by_id[criterion_id] for criterion_id in self.compiled.criterion_ids]
+        self._raw_weighted = raw_weighted
+    
+    @property
+    def raw_weighted(self) -> Decimal:
+        """Unrounded weighted points awarded"""
+        return self._raw_weighted
+    
+    def points_for(self, criterion_id: str) -> Decimal:
+        """Currently awarded points for a criterion"""
+        return self._points[self._position(criterion_id)]
+    
+    def update_award(self, criterion_id: str, points: Decimal) -> Dict[str, str]:
+        """
+        Override one criterion's awarded points and rescore.
+        
+        Raises:
+            ValueError: If the criterion is unknown or points are out of range
+        """
+        position = self._position(criterion_id)
+        max_points = self.compiled.max_points[position]
+        
+        if points < 0 or points > max_points:
+            raise ValueError(
+                f"Invalid points for '{criterion_id}': {points} "
+                f"not in range [0, {max_points}]"
+            )
+        
+        weight = self.compiled.weights[position]
+        self._raw_weighted += (points - self._points[position]) * weight
+        self._points[position] = points
+        return self.scores()
+    
+    def scores(self) -> Dict[str, str]:
+        """Current scores in compute_scores format"""
+        compiled = self.compiled
+        if compiled.section_ids:
+            return _build_scores(compiled, self._raw_weighted, compiled._section_subtotals(self._points))
+        return _build_scores(compiled, self._raw_weighted)
     
-    # Scale: final = (raw / max) * total_points
-    scaled = (raw_weighted / max_weighted) * rubric.scale.total_points
-    final_rounded = _round_decimal(scaled, rounding)
+    def _position(self, criterion_id: str) -> int:
+        position = self.compiled.index.get(criterion_id)
+        if position is None:
+            raise ValueError(f"Unknown criterion '{criterion_id}'")
+        return position
+
+
+# Instrumentation
+#
+# Optional per-stage timing and error counters for compute_scores and
+# compute_scores_many. Disabled by default: the hot path then pays a single
+# "is None" check per call. Enable with enable_metrics().
+
+class CalculatorMetrics:
+    """Thread-safe accumulated stage timings and error counts"""
+    
+    STAGES = ("validation", "summation", "division", "rounding", "result")
+    ERROR_TYPES = ("missing_criteria", "extra_criteria", "out_of_range", "scale")
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self) -> None:
+        """Zero all counters"""
+        with self._lock:
+            self._calls = 0
+            self._stage_seconds = dict.fromkeys(self.STAGES, 0.0)
+            self._stage_counts = dict.fromkeys(self.STAGES, 0)
+            self._errors = dict.fromkeys(self.ERROR_TYPES, 0)
+    
+    def record(self, timings: Dict[str, float], errors: Tuple[str, ...] = ()) -> None:
+        """Add one call's stage timings and error types"""
+        with self._lock:
+            self._calls += 1
+            for stage, seconds in timings.items():
+                self._stage_seconds[stage] += seconds
+                self._stage_counts[stage] += 1
+            for error_type in errors:
+                self._errors[error_type] += 1
     
-    return {
+    def snapshot(self) -> Dict[str, object]:
+        """Copy of the current counters"""
+        with self._lock:
+            return {
+                "calls": self._calls,
+                "stages": {
+                    stage: {"count": self._stage_counts[stage], "seconds": self._stage_seconds[stage]}
+                    for stage in self.STAGES
+                },
+                "errors": dict(self._errors),
+            }
+    
+    def prometheus(self, prefix: str = "calculator") -> str:
+        """Counters in Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_calls_total Submissions scored with metrics enabled",
+            f"# TYPE {prefix}_calls_total counter",
+            f"{prefix}_calls_total {snapshot['calls']}",
+            f"# HELP {prefix}_stage_seconds_total Time spent per compute_scores stage",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        for stage, values in snapshot["stages"].items():
+            lines.append(f'{prefix}_stage_seconds_total{{stage="{stage}"}} {values["seconds"]:.9f}')
+        lines += [
+            f"# HELP {prefix}_stage_runs_total Times each compute_scores stage ran",
+            f"# TYPE {prefix}_stage_runs_total counter",
+        ]
+        for stage, values in snapshot["stages"].items():
+            lines.append(f'{prefix}_stage_runs_total{{stage="{stage}"}} {values["count"]}')
+        lines += [
+            f"# HELP {prefix}_errors_total Scoring errors by type",
+            f"# TYPE {prefix}_errors_total counter",
+        ]
+        for error_type, count in snapshot["errors"].items():
+            lines.append(f'{prefix}_errors_total{{type="{error_type}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+_metrics: Optional[CalculatorMetrics] = None
+
+
+def enable_metrics() -> CalculatorMetrics:
+    """Start recording stage timings (keeps existing counters if already enabled)"""
+    global _metrics
+    if _metrics is None:
+        _metrics = CalculatorMetrics()
+    return _metrics
+
+
+def disable_metrics() -> None:
+    """Stop recording and drop the counters"""
+    global _metrics
+    _metrics = None
+
+
+def metrics_snapshot() -> Optional[Dict[str, object]]:
+    """Current counters, or None when metrics are disabled"""
+    metrics = _metrics
+    return None if metrics is None else metrics.snapshot()
+
+
+def reset_metrics() -> None:
+    """Zero the counters if metrics are enabled"""
+    if _metrics is not None:
+        _metrics.reset()
+
+
+def metrics_prometheus() -> str:
+    """Prometheus text dump of the counters (empty when disabled)"""
+    metrics = _metrics
+    return "" if metrics is None else metrics.prometheus()
+
+
+def _score_instrumented(
+    compiled: CompiledRubric, extracted: ExtractedScores, metrics: CalculatorMetrics
+) -> Tuple[Optional[Dict[str, str]], Optional[str]]:
+    """compute_scores stages with timing; returns (result, error message)"""
+    clock = time.perf_counter
+    timings: Dict[str, float] = {}
+    
+    started = clock()
+    points_by_id = {score.criterion_id: score.points_awarded for score in extracted.scores}
+    error = _criterion_mismatch_error(compiled, points_by_id)
+    timings["validation"] = clock() - started
+    if error is not None:
+        error_types = []
+        if compiled.criterion_id_set - points_by_id.keys():
+            error_types.append("missing_criteria")
+        if points_by_id.keys() - compiled.criterion_id_set:
+            error_types.append("extra_criteria")
+        metrics.record(timings, tuple(error_types))
+        return None, error
+    
+    started = clock()
+    raw_weighted, subtotals, error = _totals_or_error(compiled, points_by_id)
+    timings["summation"] = clock() - started
+    if error is None:
+        error = _scale_error(compiled)
+        if error is not None:
+            metrics.record(timings, ("scale",))
+            return None, error
+    else:
+        metrics.record(timings, ("out_of_range",))
+        return None, error
+    
+    max_weighted = compiled.max_weighted
+    started = clock()
+    ratio = raw_weighted / max_weighted
+    percent = ratio * Decimal("100")
+    scaled = ratio * compiled.total_points if compiled.scale_mode == "points" else None
+    timings["division"] = clock() - started
+    
+    started = clock()
+    raw_rounded = compiled.round(raw_weighted)
+    max_rounded = compiled.round(max_weighted)
+    percent_rounded = compiled.round(percent)
+    final_rounded = None if scaled is None else compiled.round(scaled)
+    timings["rounding"] = clock() - started
+    
+    started = clock()
+    result = {
         "raw_points": str(raw_rounded),
         "max_points": str(max_rounded),
         "percent": str(percent_rounded),
-        "final_points": str(final_rounded)
+        "final_points": None if final_rounded is None else str(final_rounded)
     }
+    if subtotals is not None:
+        result["sections"] = _section_scores(compiled, subtotals)
+    timings["result"] = clock() - started
+    
+    metrics.record(timings)
+    return result, None
+
+
+# Cold start
+
+_PREWARM_RUBRIC = (
+    b'{"rubric_id":"prewarm","title":"Prewarm","scale":{"mode":"points","total_points":"10",'
+    b'"rounding":{"mode":"HALF_UP","decimals":2}},"criteria":[{"id":"c","name":"C",'
+    b'"max_points":"4","weight":"1.5","levels":[{"label":"L","points":"3","descriptor":"D"}]}]}'
+)
+_PREWARM_SCORES = (
+    b'{"submission_id":"prewarm","scores":[{"criterion_id":"c","level":"L",'
+    b'"points_awarded":"3","rationale":"R"}]}'
+)
+
+
+def prewarm() -> float:
+    """
+    Pay one-time costs before the first real grade.
+    
+    Imports the models, builds the Pydantic validators for rubric and score
+    JSON (deferred until first use) and scores a tiny submission. Call it
+    from serverless init code so the first request after idle is not slower
+    than the rest. Safe to call more than once.
+    
+    Returns:
+        Seconds spent
+    """
+    started = time.perf_counter()
+    from models import Rubric, ExtractedScores, ComputedScores
+    
+    rubric = Rubric.model_validate_json(_PREWARM_RUBRIC)
+    extracted = ExtractedScores.model_validate_json(_PREWARM_SCORES)
+    ComputedScores(**compute_scores(compile_rubric(rubric), extracted, strict_levels=True))
+    return time.perf_counter() - started
 
 
 def validate_rubric(rubric: Rubric) -> None:
@@ -149,12 +930,26 @@ def validate_rubric(rubric: Rubric) -> None:
     Raises:
         ValueError: If rubric is invalid
     """
+    criteria = rubric.criteria
+    if rubric.sections:
+        layout = _flatten(rubric)
+        criteria = layout.criteria
+        duplicates = sorted({sid for sid in layout.section_ids if layout.section_ids.count(sid) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate section ids: {duplicates}")
+        # Criterion ids must be unique across top-level criteria and sections
+        # (flat rubrics are left as they always were)
+        criterion_ids = [criterion.id for criterion in criteria]
+        duplicates = sorted({cid for cid in criterion_ids if criterion_ids.count(cid) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate criterion ids: {duplicates}")
+    
     # Validate at least one criterion
-    if not rubric.criteria:
+    if not criteria:
         raise ValueError("Rubric must have at least one criterion")
     
     # Validate each criterion has at least one level
-    for criterion in rubric.criteria:
+    for criterion in criteria:
         if not criterion.levels:
             raise ValueError(f"Criterion '{criterion.id}' must have at least one level")
         
@@ -0,0 +1,272 @@
+"""
+Streaming Class Statistics
+
+Single-pass, bounded-memory aggregation of scored submissions for one rubric.
+Per criterion and overall it tracks count, mean and variance (Welford), min
+and max, the level-label distribution (labels outside the rubric share one
+bucket) and a fixed-range histogram sketch for approximate percentiles. Every aggregate is mergeable, so shards (classes,
+schools, worker processes) can be aggregated independently and combined.
+
+Statistics are descriptive (dashboards), so they use floats; scores
+themselves stay Decimal strings in the calculator.
+"""
+
+import math
+from collections import Counter
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from calculator import RubricLike, _as_compiled
+from models import ExtractedScores, ComputedScores
+
+
+DEFAULT_BINS = 50
+# Level-count bucket for labels the rubric does not define (free-text LLM output)
+OTHER_LEVEL = "(other)"
+
+Computed = Union[Mapping[str, Optional[str]], ComputedScores]
+
+
+class RunningStats:
+    """Count, mean, variance (Welford) and min/max of a stream of numbers"""
+
+    __slots__ = ("count", "mean", "_m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: "RunningStats") -> None:
+        """Combine with another stream (Chan et al. parallel update)"""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self._m2 = other.count, other.mean, other._m2
+            self.min, self.max = other.min, other.max
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        """Population variance (0 for fewer than two values)"""
+        return self._m2 / self.count if self.count > 1 else 0.0
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean if self.count else None,
+            "variance": self.variance,
+            "stddev": self.stddev,
+            "min": self.min,
+            "max": self.max,
+        }
+
+
+class HistogramSketch:
+    """
+    Fixed-range equal-width histogram with approximate percentiles.
+
+    Scores are bounded ([0, max_points] or [0, 100]), so fixed bins give a
+    small, exactly mergeable sketch; percentile error is at most one bin width.
+    """
+
+    __slots__ = ("lower", "upper", "counts")
+
+    def __init__(self, lower: float, upper: float, bins: int = DEFAULT_BINS):
+        if bins < 1 or upper <= lower:
+            raise ValueError("Histogram needs at least one bin and upper > lower")
+        self.lower = lower
+        self.upper = upper
+        self.counts = [0] * bins
+
+    def add(self, value: float) -> None:
+        bins = len(self.counts)
+        position = int((value - self.lower) / (self.upper - self.lower) * bins)
+        self.counts[min(max(position, 0), bins - 1)] += 1
+
+    def matches(self, other: "HistogramSketch") -> bool:
+        """True if both sketches have the same range and bin count"""
+        return (self.lower, self.upper, len(self.counts)) == (other.lower, other.upper, len(other.counts))
+
+    def merge(self, other: "HistogramSketch") -> None:
+        if not self.matches(other):
+            raise ValueError("Cannot merge histograms with different bins")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+    @property
+    def bin_edges(self) -> List[float]:
+        width = (self.upper - self.lower) / len(self.counts)
+        return [self.lower + width * i for i in range(len(self.counts) + 1)]
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Approximate q-th percentile (0-100) by interpolating within a bin"""
+        total = sum(self.counts)
+        if total == 0:
+            return None
+        target = min(max(q, 0.0), 100.0) / 100 * total
+        width = (self.upper - self.lower) / len(self.counts)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= target:
+                return self.lower + width * (index + (target - seen) / count)
+            seen += count
+        return self.upper
+
+
+class _FieldStats:
+    """RunningStats plus a histogram for one numeric field"""
+
+    __slots__ = ("stats", "histogram")
+
+    def __init__(self, upper: float, bins: int):
+        self.stats = RunningStats()
+        self.histogram = HistogramSketch(0.0, upper, bins)
+
+    def add(self, value: float) -> None:
+        self.stats.add(value)
+        self.histogram.add(value)
+
+    def merge(self, other: "_FieldStats") -> None:
+        self.stats.merge(other.stats)
+        self.histogram.merge(other.histogram)
+
+    def to_dict(self, percentiles: Tuple[float, ...]) -> Dict[str, Any]:
+        summary = self.stats.to_dict()
+        summary["percentiles"] = {str(q): self.histogram.percentile(q) for q in percentiles}
+        summary["histogram"] = {"edges": self.histogram.bin_edges, "counts": list(self.histogram.counts)}
+        return summary
+
+
+def _field(computed: Computed, name: str) -> Optional[str]:
+    if isinstance(computed, Mapping):
+        return computed.get(name)
+    return getattr(computed, name)
+
+
+class ClassStats:
+    """
+    Mergeable per-criterion and overall statistics for one rubric.
+
+    Feed (ExtractedScores, computed scores) pairs with add()/update(); memory
+    is bounded by the number of criteria, bins and distinct level labels.
+    """
+
+    PERCENTILES = (10.0, 25.0, 50.0, 75.0, 90.0)
+
+    def __init__(self, rubric: RubricLike, bins: int = DEFAULT_BINS):
+        compiled = _as_compiled(rubric)
+        self.rubric_id = compiled.rubric.rubric_id
+        self.bins = bins
+        self.criterion_ids = compiled.criterion_ids
+        self._index = compiled.index
+        self.count = 0
+        self.criteria = [_FieldStats(float(m), bins) for m in compiled.max_points]
+        self.levels: List[Counter] = [Counter() for _ in compiled.criterion_ids]
+        self._level_labels = [frozenset(points) for points in compiled.level_points]
+        self.percent = _FieldStats(100.0, bins)
+        self.raw_points = _FieldStats(float(compiled.max_weighted), bins)
+        self.final_points: Optional[_FieldStats] = None
+        if compiled.scale_mode == "points" and compiled.total_points is not None:
+            self.final_points = _FieldStats(float(compiled.total_points), bins)
+
+    def add(self, extracted: ExtractedScores, computed: Computed) -> None:
+        """
+        Add one scored submission.
+
+        Raises:
+            ValueError: If an award names a criterion not in the rubric
+        """
+        positions = []
+        for award in extracted.scores:
+            position = self._index.get(award.criterion_id)
+            if position is None:
+                raise ValueError(f"Unknown criterion '{award.criterion_id}'")
+            positions.append(position)
+
+        for position, award in zip(positions, extracted.scores):
+            self.criteria[position].add(float(award.points_awarded))
+            label = award.level if award.level in self._level_labels[position] else OTHER_LEVEL
+            self.levels[position][label] += 1
+
+        self.count += 1
+        self.percent.add(float(Decimal(_field(computed, "percent"))))
+        self.raw_points.add(float(Decimal(_field(computed, "raw_points"))))
+        final_points = _field(computed, "final_points")
+        if self.final_points is not None and final_points is not None:
+            self.final_points.add(float(Decimal(final_points)))
+
+    def update(self, pairs: Iterable[Tuple[ExtractedScores, Computed]]) -> "ClassStats":
+        """Add every (extracted, computed) pair from a stream; returns self"""
+        for extracted, computed in pairs:
+            self.add(extracted, computed)
+        return self
+
+    def merge(self, other: "ClassStats") -> "ClassStats":
+        """
+        Fold another shard's aggregate into this one; returns self.
+
+        Raises:
+            ValueError: If the shards were built for different rubrics, bins
+                or score ranges (nothing is merged in that case)
+        """
+        if (self.rubric_id, self.criterion_ids, self.bins) != (other.rubric_id, other.criterion_ids, other.bins):
+            raise ValueError("Cannot merge statistics for different rubrics or bin counts")
+        fields = list(zip(self.criteria, other.criteria))
+        fields += [(self.percent, other.percent), (self.raw_points, other.raw_points)]
+        if self.final_points is not None and other.final_points is not None:
+            fields.append((self.final_points, other.final_points))
+        # Check every range first so a mismatch cannot leave a half-merged aggregate
+        if not all(mine.histogram.matches(theirs.histogram) for mine, theirs in fields):
+            raise ValueError("Cannot merge statistics with different score ranges")
+
+        self.count += other.count
+        for mine, theirs in fields:
+            mine.merge(theirs)
+        for mine, labels, theirs in zip(self.levels, self._level_labels, other.levels):
+            for label, count in theirs.items():
+                mine[label if label in labels else OTHER_LEVEL] += count
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready summary for dashboards"""
+        overall = {
+            "percent": self.percent.to_dict(self.PERCENTILES),
+            "raw_points": self.raw_points.to_dict(self.PERCENTILES),
+        }
+        if self.final_points is not None:
+            overall["final_points"] = self.final_points.to_dict(self.PERCENTILES)
+        return {
+            "rubric_id": self.rubric_id,
+            "count": self.count,
+            "overall": overall,
+            "criteria": {
+                criterion_id: dict(
+                    self.criteria[i].to_dict(self.PERCENTILES),
+                    levels=dict(self.levels[i]),
+                )
+                for i, criterion_id in enumerate(self.criterion_ids)
+            },
+        }
@@ -0,0 +1,665 @@
+"""
+Differential Conformance and Throughput Harness
+
+Every alternative scoring path (batched, vectorized, cached, incremental,
+streamed, direct JSON) must return exactly the strings the reference compute_scores
+returns. This harness generates random rubrics and submissions within the
+models' constraints -- weights, 0-4 decimals, all three rounding modes,
+percent and points scales, nested sections, and awards chosen so raw
+points, percent or final points land exactly on a rounding midpoint --
+runs every registered engine on the same batches, and compares each row
+with compute_scores on the plain Rubric.
+
+A mismatch is shrunk to a minimal (rubric, submission) pair by greedily
+removing criteria and sections and simplifying values while the engine
+still disagrees. Engines are also timed on the same batches, so
+conformance and throughput are reported side by side.
+
+Engines take a CompiledRubric and a batch of ExtractedScores and return one
+outcome per submission: the compute_scores dict, or a ValueError. Failures
+only have to agree on failing (fail-fast engines may report a different
+first error). Register a new engine with @register_engine("name").
+
+Usage:
+    python -m conformance                         # 200 rubrics x 20 submissions
+    python -m conformance --rubrics 1000 --seed 7 --engines vectorized,cached
+    python -m conformance --output report.json    # exit 1 on any mismatch
+"""
+
+import argparse
+import copy
+import json
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from decimal import Decimal, localcontext
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from calculator import (
+    CompiledRubric, IncrementalScorer, ScoringError, compile_rubric, compute_scores,
+    compute_scores_json, compute_scores_many,
+)
+from extract_stream import score_chunks
+from models import ExtractedScores, Rubric
+from result_cache import ScoreCache
+from vectorized import compute_scores_vectorized
+
+
+DEFAULT_RUBRICS = 200
+DEFAULT_BATCH = 20
+# Shrinking steps tried per mismatch before giving up on a smaller case
+MAX_SHRINK_STEPS = 500
+
+ROUNDING_MODES = ("HALF_UP", "HALF_EVEN", "HALF_DOWN")
+MAX_POINTS = ("1", "2", "3", "4", "5", "7", "8", "10", "16", "20", "25", "0.5", "2.5", "12.75")
+WEIGHTS = ("1", "1", "0.5", "0.25", "1.5", "2", "3", "0.1", "0.3333", "0.125")
+TOTAL_POINTS = ("100", "50", "10", "7", "12.5", "33.3333", "1000", "3")
+POINT_STEPS = ("1", "0.5", "0.25", "0.1", "0.05", "0.005", "0.0001")
+
+Outcome = Union[Dict[str, str], ValueError]
+Engine = Callable[[CompiledRubric, Sequence[ExtractedScores]], List[Outcome]]
+
+ENGINES: Dict[str, Engine] = {}
+
+
+def register_engine(name: str) -> Callable[[Engine], Engine]:
+    """Decorator adding an engine to ENGINES under name"""
+    def register(engine: Engine) -> Engine:
+        ENGINES[name] = engine
+        return engine
+    return register
+
+
+def _per_row(score: Callable[[CompiledRubric, ExtractedScores], Dict[str, str]]) -> Engine:
+    """Batch engine calling score(compiled, extracted) for each submission"""
+    def engine(compiled: CompiledRubric, submissions: Sequence[ExtractedScores]) -> List[Outcome]:
+        outcomes = []
+        for extracted in submissions:
+            try:
+                outcomes.append(score(compiled, extracted))
+            except ValueError as e:
+                outcomes.append(e)
+        return outcomes
+    return engine
+
+
+def _collected(results) -> List[Outcome]:
+    return [result.error if isinstance(result, ScoringError) else result for result in results]
+
+
+# Built-in engines
+
+def _number_literal(value: Decimal, variant: int) -> str:
+    """value as a JSON number literal, in one of several notations"""
+    plain = _plain(value)
+    text = str(plain)
+    if variant % 5 == 1:
+        return text if "." in text else text + ".0"
+    if variant % 5 == 2:
+        return f"{plain:E}"
+    if variant % 5 == 3:
+        # Same value, written with more than 15 significant digits
+        digits = len(plain.as_tuple().digits)
+        return text + ("" if "." in text else ".") + "0" * max(20 - digits, 1)
+    if variant % 5 == 4 and not value:
+        return "-0.0"
+    return text
+
+
+def score_json_literals(compiled: CompiledRubric, extracted: ExtractedScores, exact: bool = False) -> Dict[str, str]:
+    """
+    compute_scores_json on the submission written with numeric points.
+
+    model_dump_json writes Decimals as strings, which pydantic must coerce,
+    so that payload would never reach the parser's numeric fast path.
+    """
+    # Vary the notation across submissions as well as awards
+    offset = sum(map(ord, extracted.submission_id))
+    awards = ",".join(
+        '{"criterion_id":%s,"level":%s,"points_awarded":%s,"rationale":%s}' % (
+            json.dumps(award.criterion_id), json.dumps(award.level),
+            _number_literal(award.points_awarded, offset + n), json.dumps(award.rationale))
+        for n, award in enumerate(extracted.scores)
+    )
+    raw = '{"submission_id":%s,"scores":[%s],"notes":%s}' % (
+        json.dumps(extracted.submission_id), awards, json.dumps(extracted.notes))
+    return compute_scores_json(compiled, raw, exact=exact)
+
+
+register_engine("compiled")(_per_row(compute_scores))
+register_engine("json")(_per_row(score_json_literals))
+register_engine("json-exact")(_per_row(lambda compiled, extracted: score_json_literals(compiled, extracted, True)))
+
+
+@register_engine("many")
+def _many(compiled: CompiledRubric, submissions: Sequence[ExtractedScores]) -> List[Outcome]:
+    return _collected(compute_scores_many(compiled, submissions, collect_errors=True))
+
+
+@register_engine("vectorized")
+def _vectorized(compiled: CompiledRubric, submissions: Sequence[ExtractedScores]) -> List[Outcome]:
+    return _collected(compute_scores_vectorized(compiled, submissions, collect_errors=True))
+
+
+@register_engine("cached")
+def _cached(compiled: CompiledRubric, submissions: Sequence[ExtractedScores]) -> List[Outcome]:
+    # Each submission twice: a miss, then a hit served from the cache
+    cache = ScoreCache()
+    score = _per_row(cache.compute)
+    score(compiled, submissions)
+    return score(compiled, submissions)
+
+
+@register_engine("incremental")
+def _incremental(compiled: CompiledRubric, submissions: Sequence[ExtractedScores]) -> List[Outcome]:
+    # One running scorer, moved from each submission to the next with update_award
+    outcomes = []
+    scorer = None
+    for extracted in submissions:
+        points_by_id = {score.criterion_id: score.points_awarded for score in extracted.scores}
+        try:
+            if scorer is None or points_by_id.keys() != compiled.criterion_id_set:
+                scorer = IncrementalScorer(compiled, extracted)
+                outcomes.append(scorer.scores())
+                continue
+            result = scorer.scores()
+            for criterion_id, points in points_by_id.items():
+                if points != scorer.points_for(criterion_id):
+                    result = scorer.update_award(criterion_id, points)
+            outcomes.append(result)
+        except ValueError as e:
+            scorer = None
+            outcomes.append(e)
+    return outcomes
+
+
+@register_engine("stream")
+def _stream(compiled: CompiledRubric, submissions: Sequence[ExtractedScores]) -> List[Outcome]:
+    def score(compiled, extracted):
+        text = extracted.model_dump_json()
+        return score_chunks(compiled, (text[n:n + 7] for n in range(0, len(text), 7)))
+    return _per_row(score)(compiled, submissions)
+
+
+def reference_outcomes(rubric: Rubric, submissions: Sequence[ExtractedScores]) -> List[Outcome]:
+    """compute_scores on the plain (uncompiled) Rubric, the reference result"""
+    return _per_row(compute_scores)(rubric, submissions)
+
+
+def same_outcome(expected: Outcome, actual: Outcome) -> bool:
+    """Identical score strings, or both failed validation (crashes never agree)"""
+    if isinstance(expected, Exception) or isinstance(actual, Exception):
+        return isinstance(expected, ValueError) and isinstance(actual, ValueError)
+    return expected == actual
+
+
+def _describe(outcome: Outcome):
+    if isinstance(outcome, Exception):
+        return {"error": f"{type(outcome).__name__}: {outcome}"}
+    return outcome
+
+
+# Generation
+#
+# Cases are plain JSON dicts so they can be shrunk, reported and replayed.
+
+def _plain(value: Decimal) -> Decimal:
+    """value without trailing zeros, never in exponent notation"""
+    value = value.normalize()
+    return value.quantize(Decimal("1")) if value.as_tuple().exponent > 0 else value
+
+
+def _levels(rng: random.Random, max_points: Decimal) -> List[Dict]:
+    count = rng.randint(1, 4)
+    levels = []
+    for n in range(count):
+        points = max_points * (count - n) / count
+        levels.append({
+            "label": f"L{n}",
+            "points": str(_plain(points.quantize(Decimal("0.0001"), rounding="ROUND_DOWN"))),
+            "descriptor": "Generated level",
+        })
+    return levels
+
+
+def _criterion(rng: random.Random, number: int) -> Dict:
+    max_points = Decimal(rng.choice(MAX_POINTS))
+    return {
+        "id": f"c{number}",
+        "name": f"Criterion {number}",
+        "max_points": str(max_points),
+        "weight": rng.choice(WEIGHTS),
+        "levels": _levels(rng, max_points),
+    }
+
+
+def random_rubric(rng: random.Random) -> Dict:
+    """Random valid rubric JSON dict"""
+    mode = rng.choice(("percent", "points"))
+    criteria = [_criterion(rng, n) for n in range(rng.randint(1, 8))]
+    rubric = {
+        "rubric_id": "generated",
+        "title": "Generated Rubric",
+        "scale": {
+            "mode": mode,
+            "total_points": rng.choice(TOTAL_POINTS) if mode == "points" else None,
+            "rounding": {"mode": rng.choice(ROUNDING_MODES), "decimals": rng.randint(0, 4)},
+        },
+        "criteria": criteria,
+        "sections": [],
+    }
+    if len(criteria) > 1 and rng.random() < 0.3:
+        # Move a tail of the criteria into a section, optionally with a nested one
+        split = rng.randint(0, len(criteria) - 1)
+        inner = criteria[split:]
+        section = {"id": "s0", "name": "Section 0", "weight": rng.choice(WEIGHTS), "criteria": inner, "sections": []}
+        if len(inner) > 1 and rng.random() < 0.5:
+            nested = rng.randint(1, len(inner) - 1)
+            section["criteria"] = inner[:nested]
+            section["sections"] = [{"id": "s1", "name": "Section 1", "weight": rng.choice(WEIGHTS),
+                                    "criteria": inner[nested:], "sections": []}]
+        rubric["criteria"] = criteria[:split]
+        rubric["sections"] = [section]
+    return rubric
+
+
+def _random_points(rng: random.Random, max_points: Decimal) -> Decimal:
+    step = Decimal(rng.choice(POINT_STEPS))
+    return step * rng.randint(0, int(max_points // step))
+
+
+def _force_midpoint(rng: random.Random, compiled: CompiledRubric, points: Dict[str, Decimal]) -> None:
+    """
+    Adjust one award so raw points, percent or final points land exactly
+    halfway between two rounded values (left unchanged if not exact).
+    """
+    position = rng.randrange(len(compiled.criterion_ids))
+    criterion_id = compiled.criterion_ids[position]
+    weight = compiled.weights[position]
+    others = sum((points[cid] * w for cid, w in zip(compiled.criterion_ids, compiled.weights)
+                  if cid != criterion_id), Decimal("0"))
+    target = rng.choice(("raw", "percent", "final") if compiled.scale_mode == "points" else ("raw", "percent"))
+    # raw -> target metric is raw * factor
+    factor = {
+        "raw": Decimal("1"),
+        "percent": Decimal("100") / compiled.max_weighted,
+        "final": (compiled.total_points or Decimal("1")) / compiled.max_weighted,
+    }[target]
+    decimals = -compiled.quantizer.as_tuple().exponent
+    unit = Decimal(1).scaleb(-decimals)
+
+    with localcontext() as context:
+        context.prec = 60
+        low = others * factor
+        high = (others + compiled.max_points[position] * weight) * factor
+        value = low + (high - low) * Decimal(rng.random())
+        midpoint = ((value / unit).to_integral_value(rounding="ROUND_FLOOR") + Decimal("0.5")) * unit
+        awarded = (midpoint / factor - others) / weight
+        if awarded.adjusted() < -8 or not 0 <= awarded <= compiled.max_points[position]:
+            return
+        awarded = _plain(awarded.quantize(Decimal("1e-8")))
+        if (others + awarded * weight) * factor != midpoint:
+            return
+    points[criterion_id] = awarded
+
+
+def random_submissions(rng: random.Random, rubric: Dict, count: int) -> List[Dict]:
+    """Random ExtractedScores JSON dicts for a rubric: mostly valid, many on midpoints"""
+    compiled = CompiledRubric(Rubric.model_validate(rubric))
+    submissions = []
+    for n in range(count):
+        points = {cid: _random_points(rng, max_points)
+                  for cid, max_points in zip(compiled.criterion_ids, compiled.max_points)}
+        if rng.random() < 0.5:
+            _force_midpoint(rng, compiled, points)
+        roll = rng.random()
+        if roll < 0.03:
+            cid = rng.choice(compiled.criterion_ids)
+            points[cid] = compiled.max_points[compiled.index[cid]] + Decimal("0.01")
+        elif roll < 0.05 and len(points) > 1:
+            points.pop(rng.choice(compiled.criterion_ids))
+        order = list(points)
+        if rng.random() < 0.2:
+            rng.shuffle(order)
+        submissions.append({
+            "submission_id": f"g{n}",
+            "scores": [{"criterion_id": cid, "level": "L0", "points_awarded": str(points[cid]),
+                        "rationale": "Generated"} for cid in order],
+        })
+    return submissions
+
+
+def random_cases(seed: int, rubrics: int, batch: int) -> Iterator[Tuple[Dict, List[Dict]]]:
+    """(rubric, submissions) batches, reproducible from seed"""
+    rng = random.Random(seed)
+    for _ in range(rubrics):
+        rubric = random_rubric(rng)
+        yield rubric, random_submissions(rng, rubric, batch)
+
+
+def is_midpoint(value: Decimal, decimals: int) -> bool:
+    """True if value sits exactly halfway between two values rounded to decimals"""
+    return (value.scaleb(decimals) % 1) == Decimal("0.5")
+
+
+# Shrinking
+
+def _load(case: Dict) -> Tuple[Rubric, ExtractedScores]:
+    return Rubric.model_validate(case["rubric"]), ExtractedScores.model_validate(case["extracted"])
+
+
+def _disagrees(engine: Engine, case: Dict) -> bool:
+    try:
+        rubric, extracted = _load(case)
+        compiled = compile_rubric(rubric)
+    except ValueError:
+        return False
+    expected = reference_outcomes(rubric, [extracted])[0]
+    try:
+        actual = engine(compiled, [extracted])[0]
+    except Exception as e:
+        actual = e
+    return not same_outcome(expected, actual)
+
+
+def _all_criteria(rubric: Dict) -> Iterator[Dict]:
+    yield from rubric["criteria"]
+    stack = list(rubric["sections"])
+    while stack:
+        section = stack.pop()
+        yield from section["criteria"]
+        stack.extend(section["sections"])
+
+
+def _without_criterion(case: Dict, criterion_id: str) -> Dict:
+    smaller = copy.deepcopy(case)
+
+    def prune(container: Dict) -> None:
+        container["criteria"] = [c for c in container["criteria"] if c["id"] != criterion_id]
+        for section in container["sections"]:
+            prune(section)
+        container["sections"] = [s for s in container["sections"] if s["criteria"] or s["sections"]]
+
+    prune(smaller["rubric"])
+    smaller["extracted"]["scores"] = [s for s in smaller["extracted"]["scores"] if s["criterion_id"] != criterion_id]
+    return smaller
+
+
+def _candidates(case: Dict) -> Iterator[Dict]:
+    """Smaller or simpler variants of a case, most aggressive first"""
+    rubric = case["rubric"]
+    criteria = list(_all_criteria(rubric))
+    if len(criteria) > 1:
+        for criterion in criteria:
+            yield _without_criterion(case, criterion["id"])
+    if rubric["sections"]:
+        flat = copy.deepcopy(case)
+        flat["rubric"]["criteria"] = copy.deepcopy(criteria)
+        flat["rubric"]["sections"] = []
+        yield flat
+    if len(case["extracted"]["scores"]) > 1:
+        for n in range(len(case["extracted"]["scores"])):
+            smaller = copy.deepcopy(case)
+            del smaller["extracted"]["scores"][n]
+            yield smaller
+
+    scale = rubric["scale"]
+    if scale["mode"] != "percent":
+        simpler = copy.deepcopy(case)
+        simpler["rubric"]["scale"].update(mode="percent", total_points=None)
+        yield simpler
+    if scale["total_points"] not in (None, "100"):
+        simpler = copy.deepcopy(case)
+        simpler["rubric"]["scale"]["total_points"] = "100"
+        yield simpler
+    for key, simple in (("mode", "HALF_UP"), ("decimals", 2)):
+        if scale["rounding"][key] != simple:
+            simpler = copy.deepcopy(case)
+            simpler["rubric"]["scale"]["rounding"][key] = simple
+            yield simpler
+
+    for n, criterion in enumerate(criteria):
+        for key, simple in (("weight", "1"), ("max_points", "4")):
+            if criterion[key] != simple:
+                simpler = copy.deepcopy(case)
+                target = list(_all_criteria(simpler["rubric"]))[n]
+                target[key] = simple
+                if key == "max_points":
+                    target["levels"] = [{"label": "L0", "points": simple, "descriptor": "Generated level"}]
+                yield simpler
+        if len(criterion["levels"]) > 1:
+            simpler = copy.deepcopy(case)
+            target = list(_all_criteria(simpler["rubric"]))[n]
+            target["levels"] = target["levels"][:1]
+            yield simpler
+    for section_path in _section_paths(rubric):
+        simpler = copy.deepcopy(case)
+        section = simpler["rubric"]
+        for index in section_path:
+            section = section["sections"][index]
+        if section["weight"] != "1":
+            section["weight"] = "1"
+            yield simpler
+
+    for n, score in enumerate(case["extracted"]["scores"]):
+        points = Decimal(score["points_awarded"])
+        for simple in (Decimal("0"), points.to_integral_value(rounding="ROUND_FLOOR")):
+            if simple != points:
+                simpler = copy.deepcopy(case)
+                simpler["extracted"]["scores"][n]["points_awarded"] = str(simple)
+                yield simpler
+
+
+def _section_paths(container: Dict, prefix: Tuple[int, ...] = ()) -> Iterator[Tuple[int, ...]]:
+    for index, section in enumerate(container["sections"]):
+        yield prefix + (index,)
+        yield from _section_paths(section, prefix + (index,))
+
+
+def shrink(engine: Engine, case: Dict, max_steps: int = MAX_SHRINK_STEPS) -> Dict:
+    """
+    Greedily simplify a disagreeing case while the engine still disagrees.
+
+    Args:
+        engine: Engine that disagrees with the reference on case
+        case: {"rubric": rubric dict, "extracted": ExtractedScores dict}
+
+    Returns:
+        The smallest disagreeing case found (case itself if nothing smaller fails)
+    """
+    steps = 0
+    progress = True
+    while progress and steps < max_steps:
+        progress = False
+        for candidate in _candidates(case):
+            steps += 1
+            if _disagrees(engine, candidate):
+                case = candidate
+                progress = True
+                break
+            if steps >= max_steps:
+                break
+    return case
+
+
+# Harness
+
+@dataclass
+class Mismatch:
+    """One row where an engine disagreed with the reference"""
+    engine: str
+    case: Dict
+    expected: Dict
+    actual: Dict
+    # False when the disagreement only reproduces inside its original batch
+    shrunk: bool
+
+
+@dataclass
+class EngineReport:
+    """Conformance and timing of one engine over every generated batch"""
+    name: str
+    rows: int = 0
+    seconds: float = 0.0
+    mismatches: List[Mismatch] = field(default_factory=list)
+    mismatched_rows: int = 0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else float("inf")
+
+
+@dataclass
+class ConformanceReport:
+    seed: int
+    rubrics: int
+    rows: int
+    midpoint_rows: int
+    error_rows: int
+    reference: EngineReport
+    engines: List[EngineReport]
+
+    @property
+    def ok(self) -> bool:
+        return not any(engine.mismatched_rows for engine in self.engines)
+
+    def to_dict(self) -> Dict:
+        summary = {
+            key: getattr(self, key) for key in ("seed", "rubrics", "rows", "midpoint_rows", "error_rows", "ok")
+        }
+        summary["engines"] = [
+            {
+                "name": engine.name,
+                "rows": engine.rows,
+                "seconds": round(engine.seconds, 6),
+                "rows_per_sec": round(engine.rows_per_sec, 1),
+                "speedup": round(self.reference.seconds / engine.seconds, 2) if engine.seconds > 0 else None,
+                "mismatched_rows": engine.mismatched_rows,
+                "mismatches": [asdict(mismatch) for mismatch in engine.mismatches],
+            }
+            for engine in [self.reference] + self.engines
+        ]
+        return summary
+
+
+def _timed(run: Callable[[], List[Outcome]], rows: int) -> Tuple[List[Outcome], float]:
+    start = time.perf_counter()
+    try:
+        outcomes = run()
+    except Exception as e:
+        # A crashed batch is a mismatch on every row that should have scored
+        outcomes = [e] * rows
+    return outcomes, time.perf_counter() - start
+
+
+def _midpoint_row(compiled: CompiledRubric, outcome: Outcome, extracted: ExtractedScores) -> bool:
+    """True if any unrounded value of a scored row sits on a rounding midpoint"""
+    if isinstance(outcome, Exception):
+        return False
+    points = {score.criterion_id: score.points_awarded for score in extracted.scores}
+    raw = sum((points[cid] * w for cid, w in zip(compiled.criterion_ids, compiled.weights)), Decimal("0"))
+    decimals = -compiled.quantizer.as_tuple().exponent
+    values = [raw, raw / compiled.max_weighted * 100]
+    if compiled.total_points is not None and compiled.scale_mode == "points":
+        values.append(raw / compiled.max_weighted * compiled.total_points)
+    return any(is_midpoint(value, decimals) for value in values)
+
+
+def run_conformance(
+    seed: int = 0,
+    rubrics: int = DEFAULT_RUBRICS,
+    batch: int = DEFAULT_BATCH,
+    engines: Optional[Sequence[str]] = None,
+    max_mismatches: int = 5,
+) -> ConformanceReport:
+    """
+    Run engines against the reference on generated batches.
+
+    Args:
+        seed: Generator seed; the same seed replays the same cases
+        rubrics: Generated rubrics (one batch of submissions each)
+        batch: Submissions per rubric
+        engines: Names from ENGINES (default: all registered engines)
+        max_mismatches: Shrunk mismatches kept per engine (all are counted)
+
+    Raises:
+        ValueError: If an engine name is not registered
+    """
+    names = list(ENGINES) if engines is None else list(engines)
+    unknown = [name for name in names if name not in ENGINES]
+    if unknown:
+        raise ValueError(f"Unknown engines: {unknown}")
+
+    reference = EngineReport("reference")
+    reports = [EngineReport(name) for name in names]
+    rows = midpoint_rows = error_rows = 0
+    for rubric_dict, submission_dicts in random_cases(seed, rubrics, batch):
+        rubric = Rubric.model_validate(rubric_dict)
+        compiled = compile_rubric(rubric)
+        submissions = [ExtractedScores.model_validate(s) for s in submission_dicts]
+
+        expected, seconds = _timed(lambda: reference_outcomes(rubric, submissions), len(submissions))
+        reference.rows += len(submissions)
+        reference.seconds += seconds
+        rows += len(submissions)
+        error_rows += sum(isinstance(outcome, Exception) for outcome in expected)
+        midpoint_rows += sum(_midpoint_row(compiled, outcome, extracted)
+                             for outcome, extracted in zip(expected, submissions))
+
+        for report in reports:
+            engine = ENGINES[report.name]
+            actual, seconds = _timed(lambda: engine(compiled, submissions), len(submissions))
+            report.rows += len(submissions)
+            report.seconds += seconds
+            for n, (want, got) in enumerate(zip(expected, actual)):
+                if same_outcome(want, got):
+                    continue
+                report.mismatched_rows += 1
+                if len(report.mismatches) >= max_mismatches:
+                    continue
+                case = {"rubric": rubric_dict, "extracted": submission_dicts[n]}
+                reproduces = _disagrees(engine, case)
+                if reproduces:
+                    case = shrink(engine, case)
+                    small_rubric, small_extracted = _load(case)
+                    want = reference_outcomes(small_rubric, [small_extracted])[0]
+                    try:
+                        got = engine(compile_rubric(small_rubric), [small_extracted])[0]
+                    except Exception as e:
+                        got = e
+                report.mismatches.append(Mismatch(report.name, case, _describe(want), _describe(got), reproduces))
+
+    return ConformanceReport(seed, rubrics, rows, midpoint_rows, error_rows, reference, reports)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check scoring engines against compute_scores and time them")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rubrics", type=int, default=DEFAULT_RUBRICS)
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="Submissions per rubric")
+    parser.add_argument("--engines", help=f"Comma-separated engines (default: {','.join(ENGINES)})")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args(argv)
+
+    engines = args.engines.split(",") if args.engines else None
+    report = run_conformance(args.seed, args.rubrics, args.batch, engines)
+    summary = report.to_dict()
+
+    print(f"{report.rows} rows over {report.rubrics} rubrics (seed {report.seed}): "
+          f"{report.midpoint_rows} on a rounding midpoint, {report.error_rows} expected errors")
+    for engine in summary["engines"]:
+        speedup = "" if engine["speedup"] is None else f"{engine['speedup']:>7.2f}x"
+        print(f"{engine['name']:<14} {engine['rows_per_sec']:>14,.0f} rows/s {speedup}"
+              f" {engine['mismatched_rows']:>8} mismatched")
+        for mismatch in engine["mismatches"]:
+            print(json.dumps(mismatch, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
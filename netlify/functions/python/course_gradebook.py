@@ -0,0 +1,323 @@
+"""
+Incremental Course Gradebook
+
+Combines computed assignment scores into course grades per student using
+weighted categories, drop-lowest-N and per-category percent caps.
+
+Each (student, category) keeps its scores split across two heaps: a max-heap
+of the N lowest (dropped) scores and a min-heap of the kept ones, with
+running earned/possible sums over the kept side. Recording, rescoring or
+removing one submission is O(log n) in the category's assignment count;
+heap entries are invalidated lazily instead of searched for, and the heaps
+are rebuilt from the live entries once stale ones outnumber them. A student's
+course grade is then a weighted average over the categories, O(number of
+categories), with no rescan of the student's assignments.
+
+Scores are taken as raw_points / max_points from compute_scores results (or
+ComputedScores), so percent- and points-mode rubrics combine alike. The
+"lowest" scores are the lowest raw/max ratios, ties broken by assignment
+order; a category with N drops always keeps at least one score. Categories
+with no scores are left out and the remaining weights renormalized.
+
+compute_course_grade() recomputes one student's grade from scratch and is
+identical to the incremental result.
+"""
+
+import heapq
+from decimal import Decimal
+from fractions import Fraction
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+from pydantic import BaseModel, Field, model_validator
+
+from calculator import _round_decimal
+from models import ComputedScores, Rounding
+
+
+ScoreLike = Union[Mapping[str, Optional[str]], ComputedScores]
+
+
+class GradeCategory(BaseModel):
+    """Weighted group of assignments (e.g. homework, exams)"""
+    id: str = Field(..., min_length=1, max_length=100)
+    name: str = Field(..., min_length=1, max_length=255)
+    weight: Decimal = Field(..., gt=0)
+    drop_lowest: int = Field(default=0, ge=0)
+    # Upper bound on the category percent (e.g. 100 with extra credit awarded)
+    cap_percent: Optional[Decimal] = Field(default=None, gt=0)
+
+
+class CoursePolicy(BaseModel):
+    """Categories, the assignments in each, and rounding for reported percents"""
+    categories: List[GradeCategory] = Field(..., min_length=1)
+    # assignment_id -> category id, in assignment order (the drop tie-break)
+    assignments: Dict[str, str]
+    rounding: Rounding = Rounding()
+
+    @model_validator(mode="after")
+    def _check(self) -> "CoursePolicy":
+        ids = [category.id for category in self.categories]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Category ids must be unique")
+        unknown = sorted(set(self.assignments.values()) - set(ids))
+        if unknown:
+            raise ValueError(f"Assignments reference unknown categories: {unknown}")
+        return self
+
+
+def _points(scores: ScoreLike) -> Tuple[Decimal, Decimal]:
+    """(earned, possible) from a compute_scores result"""
+    if isinstance(scores, ComputedScores):
+        return Decimal(scores.raw_points), Decimal(scores.max_points)
+    return Decimal(scores["raw_points"]), Decimal(scores["max_points"])
+
+
+class _Entry:
+    __slots__ = ("earned", "possible", "key", "version")
+
+    def __init__(self, earned: Decimal, possible: Decimal, order: int, version: int):
+        self.earned = earned
+        self.possible = possible
+        # Exact ratio, then assignment order, so drops are deterministic
+        self.key = (Fraction(earned) / Fraction(possible), order)
+        self.version = version
+
+
+class _CategoryScores:
+    """Drop-lowest-N split of one student's scores in one category"""
+
+    __slots__ = ("drop", "entries", "low", "high", "dropped_ids", "earned", "possible", "_version")
+
+    def __init__(self, drop: int):
+        self.drop = drop
+        self.entries: Dict[str, _Entry] = {}
+        # low: max-heap of dropped entries (negated keys); high: min-heap of kept
+        self.low: List[tuple] = []
+        self.high: List[tuple] = []
+        self.dropped_ids = set()
+        self.earned = Decimal("0")
+        self.possible = Decimal("0")
+        self._version = 0
+
+    def set(self, assignment_id: str, earned: Decimal, possible: Decimal, order: int) -> None:
+        if assignment_id in self.entries:
+            self._detach(assignment_id)
+        self._version += 1
+        entry = _Entry(earned, possible, order, self._version)
+        self.entries[assignment_id] = entry
+        self._keep(assignment_id, entry)
+        self._rebalance()
+
+    def remove(self, assignment_id: str) -> bool:
+        if assignment_id not in self.entries:
+            return False
+        self._detach(assignment_id)
+        self._rebalance()
+        return True
+
+    def dropped(self) -> List[str]:
+        """Dropped assignment ids, lowest first"""
+        return sorted(self.dropped_ids, key=lambda aid: self.entries[aid].key)
+
+    def _detach(self, assignment_id: str) -> None:
+        # Heap entries for it go stale (version mismatch) and are skipped later
+        entry = self.entries.pop(assignment_id)
+        if assignment_id in self.dropped_ids:
+            self.dropped_ids.discard(assignment_id)
+        else:
+            self.earned -= entry.earned
+            self.possible -= entry.possible
+
+    def _keep(self, assignment_id: str, entry: _Entry) -> None:
+        self.dropped_ids.discard(assignment_id)
+        self.earned += entry.earned
+        self.possible += entry.possible
+        heapq.heappush(self.high, (entry.key, entry.version, assignment_id))
+
+    def _drop(self, assignment_id: str, entry: _Entry) -> None:
+        self.dropped_ids.add(assignment_id)
+        self.earned -= entry.earned
+        self.possible -= entry.possible
+        ratio, order = entry.key
+        heapq.heappush(self.low, ((-ratio, -order), entry.version, assignment_id))
+
+    def _top(self, heap: List[tuple], dropped: bool) -> Optional[Tuple[str, _Entry]]:
+        """Current top of a heap, discarding stale entries"""
+        while heap:
+            _, version, assignment_id = heap[0]
+            entry = self.entries.get(assignment_id)
+            if entry is not None and entry.version == version and (assignment_id in self.dropped_ids) == dropped:
+                return assignment_id, entry
+            heapq.heappop(heap)
+        return None
+
+    def _pop(self, heap: List[tuple], dropped: bool) -> Tuple[str, _Entry]:
+        top = self._top(heap, dropped)
+        heapq.heappop(heap)
+        return top
+
+    def _rebalance(self) -> None:
+        # Always keep at least one score
+        target = min(self.drop, max(len(self.entries) - 1, 0))
+        while len(self.dropped_ids) > target:
+            self._keep(*self._pop(self.low, True))
+        while len(self.dropped_ids) < target:
+            self._drop(*self._pop(self.high, False))
+        # Swap while a dropped score ranks above a kept one
+        while self.dropped_ids:
+            low = self._top(self.low, True)
+            high = self._top(self.high, False)
+            if high is None or low[1].key <= high[1].key:
+                break
+            self._pop(self.low, True)
+            self._pop(self.high, False)
+            self._keep(*low)
+            self._drop(*high)
+        self._compact()
+
+    def _compact(self) -> None:
+        """Rebuild both heaps from live entries once stale ones outnumber them"""
+        live = len(self.entries)
+        if len(self.low) + len(self.high) - live <= live:
+            return
+        self.low = []
+        self.high = []
+        for assignment_id, entry in self.entries.items():
+            if assignment_id in self.dropped_ids:
+                ratio, order = entry.key
+                self.low.append(((-ratio, -order), entry.version, assignment_id))
+            else:
+                self.high.append((entry.key, entry.version, assignment_id))
+        heapq.heapify(self.low)
+        heapq.heapify(self.high)
+
+
+def _category_percent(category: GradeCategory, earned: Decimal, possible: Decimal) -> Decimal:
+    percent = (earned / possible) * Decimal("100")
+    if category.cap_percent is not None and percent > category.cap_percent:
+        return category.cap_percent
+    return percent
+
+
+def _course_grade(policy: CoursePolicy, kept: Dict[str, Tuple[Decimal, Decimal, List[str]]]) -> Dict:
+    """Report for kept (earned, possible, dropped ids) per category with scores"""
+    weighted = Decimal("0")
+    weight_total = Decimal("0")
+    categories = {}
+    for category in policy.categories:
+        if category.id not in kept:
+            continue
+        earned, possible, dropped = kept[category.id]
+        percent = _category_percent(category, earned, possible)
+        weighted += percent * category.weight
+        weight_total += category.weight
+        categories[category.id] = {
+            "earned": str(_round_decimal(earned, policy.rounding)),
+            "possible": str(_round_decimal(possible, policy.rounding)),
+            "percent": str(_round_decimal(percent, policy.rounding)),
+            "dropped": dropped,
+        }
+    percent = None if weight_total == 0 else str(_round_decimal(weighted / weight_total, policy.rounding))
+    return {"percent": percent, "categories": categories}
+
+
+class CourseGradebook:
+    """
+    Course grades for every student, maintained incrementally.
+
+    Args:
+        policy: Categories, assignment-to-category map and rounding
+    """
+
+    def __init__(self, policy: CoursePolicy):
+        self.policy = policy
+        self._categories = {category.id: category for category in policy.categories}
+        self._order = {assignment_id: n for n, assignment_id in enumerate(policy.assignments)}
+        # student_id -> category id -> scores
+        self._students: Dict[str, Dict[str, _CategoryScores]] = {}
+
+    def _category_of(self, assignment_id: str) -> str:
+        category_id = self.policy.assignments.get(assignment_id)
+        if category_id is None:
+            raise ValueError(f"Unknown assignment '{assignment_id}'")
+        return category_id
+
+    def record(self, student_id: str, assignment_id: str, scores: ScoreLike) -> Dict:
+        """
+        Record (or replace) one submission's computed scores.
+
+        Returns:
+            The student's updated course grade (see grade())
+
+        Raises:
+            ValueError: If the assignment is not in the policy
+        """
+        category_id = self._category_of(assignment_id)
+        earned, possible = _points(scores)
+        categories = self._students.setdefault(student_id, {})
+        state = categories.get(category_id)
+        if state is None:
+            state = categories[category_id] = _CategoryScores(self._categories[category_id].drop_lowest)
+        state.set(assignment_id, earned, possible, self._order[assignment_id])
+        return self.grade(student_id)
+
+    def remove(self, student_id: str, assignment_id: str) -> bool:
+        """Forget one submission; returns False if it was not recorded"""
+        category_id = self._category_of(assignment_id)
+        state = self._students.get(student_id, {}).get(category_id)
+        return state is not None and state.remove(assignment_id)
+
+    def grade(self, student_id: str) -> Dict:
+        """
+        Course grade for one student.
+
+        Returns:
+            {"percent": str or None, "categories": {category_id: {"earned",
+            "possible", "percent", "dropped"}}} for categories with scores
+        """
+        kept = {
+            category_id: (state.earned, state.possible, state.dropped())
+            for category_id, state in self._students.get(student_id, {}).items()
+            if state.entries
+        }
+        return _course_grade(self.policy, kept)
+
+    def students(self) -> List[str]:
+        return list(self._students)
+
+    def report(self) -> Iterator[Tuple[str, Dict]]:
+        """(student_id, grade) for every student, in first-recorded order"""
+        for student_id in self._students:
+            yield student_id, self.grade(student_id)
+
+
+def compute_course_grade(policy: CoursePolicy, scores: Mapping[str, ScoreLike]) -> Dict:
+    """
+    One student's course grade computed from scratch.
+
+    Args:
+        policy: Course policy
+        scores: assignment_id -> computed scores for the student
+
+    Returns:
+        The same report CourseGradebook.grade() maintains incrementally
+    """
+    order = {assignment_id: n for n, assignment_id in enumerate(policy.assignments)}
+    by_category: Dict[str, List[Tuple[tuple, str, Decimal, Decimal]]] = {}
+    for assignment_id, computed in scores.items():
+        category_id = policy.assignments.get(assignment_id)
+        if category_id is None:
+            raise ValueError(f"Unknown assignment '{assignment_id}'")
+        earned, possible = _points(computed)
+        key = (Fraction(earned) / Fraction(possible), order[assignment_id])
+        by_category.setdefault(category_id, []).append((key, assignment_id, earned, possible))
+
+    drops = {category.id: category.drop_lowest for category in policy.categories}
+    kept = {}
+    for category_id, items in by_category.items():
+        items.sort()
+        drop = min(drops[category_id], len(items) - 1)
+        earned = sum((item[2] for item in items[drop:]), Decimal("0"))
+        possible = sum((item[3] for item in items[drop:]), Decimal("0"))
+        kept[category_id] = (earned, possible, [item[1] for item in items[:drop]])
+    return _course_grade(policy, kept)
@@ -0,0 +1,406 @@
+"""
+Incremental Scoring of Streamed ExtractedScores
+
+The LLM streams one ExtractedScores JSON document token by token. Instead of
+buffering the whole payload, StreamingScorer parses it as it arrives: each
+entry of "scores" is validated as an Award the moment its closing brace is
+seen, checked against the compiled rubric (unknown criterion, points out of
+range, and with strict_levels the level label), and added to a running
+weighted subtotal. A bad generation fails with ValueError on the award that
+makes it bad, so the caller can cancel the stream early, and when the last
+byte arrives only the criterion-set check and rounding are left.
+
+Only the top-level object and the "scores" array are parsed here; every
+award, and every other top-level value, is handed to pydantic / json as one
+complete span, so value syntax is checked exactly as in a full parse.
+Results are identical to compute_scores on the complete document (later
+duplicate awards win, as there).
+
+Usage:
+    scorer = StreamingScorer(compiled)
+    for chunk in llm_stream:
+        scorer.feed(chunk)          # raises ValueError on a bad award
+    result = scorer.finish()
+"""
+
+import codecs
+import json
+import re
+from decimal import Decimal
+from typing import AsyncIterable, Dict, Iterable, List, Optional, Union
+
+from pydantic import ValidationError
+
+from calculator import (
+    RubricLike, _as_compiled, _build_scores, _criterion_mismatch_error, _scale_error,
+)
+from models import Award, ExtractedScores
+
+
+Chunk = Union[str, bytes]
+
+# Next character that matters outside / inside a string
+_STRUCTURAL = re.compile(r'["{}\[\],:]|[^\s"{}\[\],:]')
+_NESTED = re.compile(r'["{}\[\]]')
+_GENERIC = re.compile(r'["{}\[\],]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_WHITESPACE = re.compile(r"\s*")
+
+# Parser states for the top-level object and the "scores" array
+_START, _KEY, _COLON, _VALUE, _GENERIC_VALUE, _NEXT_MEMBER, \
+    _ELEMENT, _AWARD, _NEXT_ELEMENT, _END = range(10)
+
+
+def _validation_message(error: ValidationError, position: int) -> str:
+    details = "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()
+    )
+    return f"Invalid award at scores[{position}]: {details}"
+
+
+class StreamingScorer:
+    """
+    Score one streamed ExtractedScores document while it is being received.
+
+    Args:
+        rubric: Rubric or CompiledRubric (compile once and share across streams)
+        strict_levels: Also reject awards whose level label is unknown or
+            worth different points (as compute_scores(strict_levels=True))
+
+    Raises:
+        ValueError: On construction, if the rubric cannot produce a score
+    """
+
+    def __init__(self, rubric: RubricLike, strict_levels: bool = False):
+        self.compiled = _as_compiled(rubric)
+        error = _scale_error(self.compiled)
+        if error is not None:
+            raise ValueError(error)
+        self.strict_levels = strict_levels
+        self.awards: List[Award] = []
+        self._points: Dict[str, Decimal] = {}
+        self._raw_weighted = Decimal("0")
+        self._fields: Dict[str, object] = {}
+        self._decoder = None
+
+        self._buffer = ""
+        self._pos = 0
+        self._state = _START
+        # Start of the span being collected (key, award or top-level value)
+        self._start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._depth = 0
+        self._in_string = False
+        self._seen_scores = False
+        self._need_element = False
+
+    @property
+    def raw_weighted(self) -> Decimal:
+        """Unrounded weighted points of the awards received so far"""
+        return self._raw_weighted
+
+    @property
+    def done(self) -> bool:
+        """True once the top-level object has been closed"""
+        return self._state == _END
+
+    def feed(self, chunk: Chunk) -> List[Award]:
+        """
+        Parse the next piece of the document.
+
+        Returns:
+            Awards completed by this chunk, in document order
+
+        Raises:
+            ValueError: On malformed JSON, an invalid award, an unknown
+                criterion or out-of-range points
+        """
+        if isinstance(chunk, bytes):
+            if self._decoder is None:
+                self._decoder = codecs.getincrementaldecoder("utf-8")()
+            chunk = self._decoder.decode(chunk)
+        start = len(self.awards)
+        self._buffer += chunk
+        self._scan()
+        # Drop what has been consumed unless a span is still open
+        keep = self._pos if self._start is None else self._start
+        if keep:
+            self._buffer = self._buffer[keep:]
+            self._pos -= keep
+            if self._start is not None:
+                self._start = 0
+        return self.awards[start:]
+
+    def finish(self) -> Dict[str, str]:
+        """
+        Complete the document and return its scores.
+
+        Returns:
+            compute_scores() result for the whole document
+
+        Raises:
+            ValueError: If the document is incomplete or fails validation
+        """
+        if self._decoder is not None:
+            self.feed(self._decoder.decode(b"", final=True))
+        if self._state != _END:
+            raise ValueError("Incomplete ExtractedScores document")
+        self.extracted()
+
+        error = _criterion_mismatch_error(self.compiled, self._points)
+        if error is not None:
+            raise ValueError(error)
+        compiled = self.compiled
+        if compiled.section_ids:
+            points = (self._points[criterion_id] for criterion_id in compiled.criterion_ids)
+            return _build_scores(compiled, self._raw_weighted, compiled._section_subtotals(points))
+        return _build_scores(compiled, self._raw_weighted)
+
+    def extracted(self) -> ExtractedScores:
+        """
+        The complete document as ExtractedScores.
+
+        Raises:
+            ValueError: If the document is incomplete or fails validation
+        """
+        if self._state != _END:
+            raise ValueError("Incomplete ExtractedScores document")
+        # Awards are already validated instances and are not revalidated
+        return ExtractedScores.model_validate({**self._fields, "scores": self.awards})
+
+    # Parsing
+
+    def _error(self, message: str) -> ValueError:
+        return ValueError(f"Malformed ExtractedScores JSON: {message}")
+
+    def _skip_string(self) -> bool:
+        """Advance past the end of the open string; False if it is not complete yet"""
+        buffer = self._buffer
+        pos = self._pos
+        while True:
+            match = _STRING_SPECIAL.search(buffer, pos)
+            if match is None:
+                self._pos = len(buffer)
+                return False
+            pos = match.start()
+            if buffer[pos] == '"':
+                self._pos = pos + 1
+                self._in_string = False
+                return True
+            if pos + 1 >= len(buffer):
+                # Escape split across chunks
+                self._pos = pos
+                return False
+            pos += 2
+
+    def _scan_nested(self, pattern: "re.Pattern") -> Optional[str]:
+        """
+        Advance through a nested value to a structural character at depth 0.
+
+        Returns:
+            That character (not consumed), or None if the buffer ran out
+        """
+        buffer = self._buffer
+        while True:
+            if self._in_string and not self._skip_string():
+                return None
+            match = pattern.search(buffer, self._pos)
+            if match is None:
+                self._pos = len(buffer)
+                return None
+            char = match.group()
+            self._pos = match.start()
+            if char == '"':
+                self._in_string = True
+                self._pos += 1
+            elif char in "{[":
+                self._depth += 1
+                self._pos += 1
+            elif self._depth and char in "}]":
+                self._depth -= 1
+                self._pos += 1
+                if self._depth == 0 and pattern is _NESTED:
+                    return char
+            elif self._depth:
+                self._pos += 1
+            else:
+                return char
+
+    def _scan(self) -> None:
+        buffer = self._buffer
+        while self._pos < len(buffer):
+            state = self._state
+
+            if state == _AWARD:
+                if self._scan_nested(_NESTED) is None:
+                    return
+                self._award(buffer[self._start:self._pos])
+                self._start = None
+                self._state = _NEXT_ELEMENT
+                continue
+
+            if state == _GENERIC_VALUE:
+                char = self._scan_nested(_GENERIC)
+                if char is None:
+                    return
+                if char not in ",}":
+                    raise self._error(f"unexpected {char!r}")
+                try:
+                    self._fields[self._key] = json.loads(buffer[self._start:self._pos])
+                except ValueError:
+                    raise self._error(f"invalid value for {self._key!r}") from None
+                self._start = None
+                self._state = _NEXT_MEMBER
+                continue
+
+            if state == _KEY and self._start is not None:
+                if not self._skip_string():
+                    return
+                self._key = json.loads(buffer[self._start:self._pos])
+                self._start = None
+                self._state = _COLON
+                continue
+
+            match = _STRUCTURAL.search(buffer, self._pos)
+            if match is None:
+                self._pos = len(buffer)
+                return
+            char = match.group()
+            self._pos = match.start()
+
+            if state == _START:
+                if char != "{":
+                    raise self._error("expected an object")
+                self._pos += 1
+                self._state = _KEY
+                self._need_element = False
+            elif state == _KEY:
+                if char == "}" and not self._need_element:
+                    self._pos += 1
+                    self._state = _END
+                elif char == '"':
+                    self._start = self._pos
+                    self._pos += 1
+                    self._in_string = True
+                else:
+                    raise self._error(f"expected a key, got {char!r}")
+            elif state == _COLON:
+                if char != ":":
+                    raise self._error(f"expected ':', got {char!r}")
+                self._pos += 1
+                self._state = _VALUE
+            elif state == _VALUE:
+                if self._key == "scores":
+                    if char != "[":
+                        raise self._error("scores must be an array")
+                    if self._seen_scores:
+                        raise self._error("duplicate scores")
+                    self._seen_scores = True
+                    self._pos += 1
+                    self._state = _ELEMENT
+                    self._need_element = False
+                elif char in ",}:]":
+                    raise self._error(f"expected a value, got {char!r}")
+                else:
+                    self._start = self._pos
+                    self._depth = 0
+                    self._state = _GENERIC_VALUE
+            elif state == _NEXT_MEMBER:
+                self._pos += 1
+                if char == ",":
+                    self._state = _KEY
+                    self._need_element = True
+                elif char == "}":
+                    self._state = _END
+                else:
+                    raise self._error(f"expected ',' or '}}', got {char!r}")
+            elif state == _ELEMENT:
+                if char == "]" and not self._need_element:
+                    self._pos += 1
+                    self._state = _NEXT_MEMBER
+                elif char == "{":
+                    self._start = self._pos
+                    self._depth = 0
+                    self._state = _AWARD
+                else:
+                    raise self._error(f"scores[{len(self.awards)}] must be an object")
+            elif state == _NEXT_ELEMENT:
+                self._pos += 1
+                if char == ",":
+                    self._state = _ELEMENT
+                    self._need_element = True
+                elif char == "]":
+                    self._state = _NEXT_MEMBER
+                else:
+                    raise self._error(f"expected ',' or ']', got {char!r}")
+            else:
+                raise self._error("data after the end of the document")
+
+    def _award(self, span: str) -> None:
+        """Validate one complete award and add it to the running subtotal"""
+        try:
+            award = Award.model_validate_json(span)
+        except ValidationError as e:
+            raise ValueError(_validation_message(e, len(self.awards))) from None
+
+        compiled = self.compiled
+        criterion_id = award.criterion_id
+        position = compiled.index.get(criterion_id)
+        if position is None:
+            raise ValueError(f"Unknown criterion '{criterion_id}'")
+        awarded = award.points_awarded
+        max_points = compiled.max_points[position]
+        if awarded < 0 or awarded > max_points:
+            raise ValueError(
+                f"Invalid points for '{criterion_id}': {awarded} "
+                f"not in range [0, {max_points}]"
+            )
+        if self.strict_levels:
+            level_points = compiled.level_points[position].get(award.level)
+            if level_points is None:
+                raise ValueError(f"Unknown level '{award.level}' for criterion '{criterion_id}'")
+            if level_points != awarded:
+                raise ValueError(
+                    f"Level mismatch for '{criterion_id}': level '{award.level}' "
+                    f"is worth {level_points}, awarded {awarded}"
+                )
+
+        # Later duplicates replace earlier ones, as in compute_scores
+        previous = self._points.get(criterion_id, Decimal("0"))
+        self._raw_weighted += (awarded - previous) * compiled.weights[position]
+        self._points[criterion_id] = awarded
+        self.awards.append(award)
+
+
+def score_chunks(rubric: RubricLike, chunks: Iterable[Chunk], strict_levels: bool = False) -> Dict[str, str]:
+    """
+    Score a streamed document, stopping at the first invalid award.
+
+    Raises:
+        ValueError: As StreamingScorer.feed() and finish()
+    """
+    scorer = StreamingScorer(rubric, strict_levels)
+    for chunk in chunks:
+        scorer.feed(chunk)
+    return scorer.finish()
+
+
+async def score_chunks_async(
+    rubric: RubricLike, chunks: AsyncIterable[Chunk], strict_levels: bool = False
+) -> Dict[str, str]:
+    """
+    score_chunks() for an async token stream.
+
+    The stream is closed (aclose) as soon as an award fails, so the
+    generation can be cancelled instead of read to the end.
+    """
+    scorer = StreamingScorer(rubric, strict_levels)
+    try:
+        async for chunk in chunks:
+            scorer.feed(chunk)
+    except ValueError:
+        close = getattr(chunks, "aclose", None)
+        if close is not None:
+            await close()
+        raise
+    return scorer.finish()
@@ -0,0 +1,269 @@
+"""
+Class-Level Grade Curves and Letter Bands
+
+Applies a configured curve to a whole class's computed percents at once and
+maps the curved percents to letter grades:
+
+- shift: add a fixed number of percentage points
+- sqrt: the square-root curve, sqrt(percent) * 10
+- target_mean: shift every percent by (target mean - class mean)
+
+Curved values are clamped to [floor, cap] and rounded with the curve's
+Rounding, exactly like calculator._round_decimal. Letters come from a binary
+search over the sorted band thresholds (np.searchsorted over the batch).
+
+apply_curve works in int64 fixed point. The square-root curve is rounded
+from an exact integer square root, so no float or 28-digit rounding is
+involved; percents are bounded (at most 4 decimal places), which keeps
+every non-tie far enough from a rounding midpoint that Decimal's own
+28-digit sqrt lands on the same side. Its output is string-identical to
+apply_curve_decimal, the per-row Decimal reference. Percents that do not fit
+(more than 4 decimal places, or huge values) are evaluated with Decimal.
+"""
+
+from bisect import bisect_right
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN
+from typing import List, Literal, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+from pydantic import BaseModel, Field, model_validator
+
+from calculator import _quantizer, _round_decimal
+from models import Rounding
+from vectorized import _format_fixed, _places, _round_ratio, _scaled
+
+
+# Decimal places of input percents handled in fixed point, and of the
+# target_mean shift (which is rounded HALF_EVEN to this precision)
+PERCENT_PLACES = 4
+
+# Largest fixed-point input percent (1000.0000); larger values use Decimal
+_MAX_PERCENT_INT = 1000 * 10 ** PERCENT_PLACES
+
+Percent = Union[str, Decimal]
+
+
+class Curve(BaseModel):
+    """Curve applied to computed percents before letter bands"""
+    kind: Literal["none", "shift", "sqrt", "target_mean"] = "none"
+    amount: Decimal = Decimal("0")  # Percentage points added (kind='shift')
+    target_mean: Optional[Decimal] = Field(default=None, ge=0)  # kind='target_mean'
+    floor: Decimal = Field(default=Decimal("0"), ge=0)
+    cap: Decimal = Field(default=Decimal("100"), gt=0)
+    rounding: Rounding = Rounding()
+
+    @model_validator(mode="after")
+    def _check(self) -> "Curve":
+        if self.kind == "target_mean" and self.target_mean is None:
+            raise ValueError("target_mean required when kind='target_mean'")
+        if self.floor > self.cap:
+            raise ValueError("floor must not exceed cap")
+        return self
+
+
+class LetterBand(BaseModel):
+    """Letter awarded at or above min_percent (up to the next band)"""
+    letter: str = Field(..., min_length=1, max_length=10)
+    min_percent: Decimal = Field(..., ge=0)
+
+
+class GradeScale(BaseModel):
+    """Letter bands; the lowest must start at 0 so every percent gets a letter"""
+    bands: List[LetterBand] = Field(..., min_length=1)
+
+    @model_validator(mode="after")
+    def _check(self) -> "GradeScale":
+        thresholds = [band.min_percent for band in self.bands]
+        if len(set(thresholds)) != len(thresholds):
+            raise ValueError("Letter band thresholds must be unique")
+        if min(thresholds) != 0:
+            raise ValueError("The lowest letter band must start at 0")
+        return self
+
+    def sorted_bands(self) -> List[LetterBand]:
+        return sorted(self.bands, key=lambda band: band.min_percent)
+
+
+DEFAULT_GRADE_SCALE = GradeScale(bands=[
+    LetterBand(letter="A", min_percent=Decimal("90")),
+    LetterBand(letter="B", min_percent=Decimal("80")),
+    LetterBand(letter="C", min_percent=Decimal("70")),
+    LetterBand(letter="D", min_percent=Decimal("60")),
+    LetterBand(letter="F", min_percent=Decimal("0")),
+])
+
+
+class CurvedScores(NamedTuple):
+    """Curved percents (and letters, if a scale was given) in input order"""
+    percents: List[str]
+    letters: Optional[List[str]]
+    # Percentage points added to every percent before clamping (shift curves)
+    shift: Decimal
+
+
+# Decimal reference
+
+def class_shift(percents: Sequence[Decimal], curve: Curve) -> Decimal:
+    """Points added to every percent by a shift or target_mean curve"""
+    if curve.kind == "shift":
+        return curve.amount
+    if curve.kind != "target_mean" or not percents:
+        return Decimal("0")
+    mean = sum(percents, Decimal("0")) / len(percents)
+    return (curve.target_mean - mean).quantize(_quantizer(PERCENT_PLACES), rounding=ROUND_HALF_EVEN)
+
+
+def curve_percent(percent: Decimal, curve: Curve, shift: Decimal = Decimal("0")) -> Decimal:
+    """
+    Curve one percent with Decimal math.
+
+    Args:
+        percent: Computed percent
+        curve: Curve configuration
+        shift: class_shift() for the batch (shift and target_mean curves)
+    """
+    if curve.kind == "sqrt":
+        value = (percent * 100).sqrt()
+    else:
+        value = percent + shift
+    value = min(max(value, curve.floor), curve.cap)
+    return _round_decimal(value, curve.rounding)
+
+
+def letter_for(percent: Decimal, scale: GradeScale) -> str:
+    """Letter of the highest band whose threshold is at or below percent"""
+    bands = scale.sorted_bands()
+    position = bisect_right([band.min_percent for band in bands], percent) - 1
+    return bands[max(position, 0)].letter
+
+
+def apply_curve_decimal(
+    percents: Sequence[Percent], curve: Curve, scale: Optional[GradeScale] = None
+) -> CurvedScores:
+    """Per-row Decimal evaluation of apply_curve (the reference result)"""
+    values = [Decimal(p) for p in percents]
+    shift = class_shift(values, curve)
+    curved = [curve_percent(value, curve, shift) for value in values]
+    letters = None if scale is None else [letter_for(value, scale) for value in curved]
+    return CurvedScores([str(value) for value in curved], letters, shift)
+
+
+# Fixed point
+
+def _to_fixed(percent: Percent) -> Optional[int]:
+    """Percent scaled by 10**PERCENT_PLACES, or None if it needs Decimal"""
+    whole, _, fraction = str(percent).partition(".")
+    if len(fraction) > PERCENT_PLACES or not whole.isdigit() or (fraction and not fraction.isdigit()):
+        return None
+    value = int(whole + fraction.ljust(PERCENT_PLACES, "0"))
+    return value if value <= _MAX_PERCENT_INT else None
+
+
+def _round_scaled(values: np.ndarray, places: int, decimals: int, mode: str) -> np.ndarray:
+    """Round non-negative integers scaled by 10**places to 10**decimals"""
+    if places <= decimals:
+        return values * 10 ** (decimals - places)
+    return _round_ratio(values, 10 ** (places - decimals), mode)
+
+
+def _isqrt(values: np.ndarray) -> np.ndarray:
+    """Exact floor square root of non-negative int64 values below 2**62"""
+    roots = np.floor(np.sqrt(values.astype(np.float64))).astype(np.int64)
+    # The float estimate is off by at most one either way at this magnitude
+    roots -= roots * roots > values
+    roots += (roots + 1) * (roots + 1) <= values
+    return roots
+
+
+def _sqrt_rounded(percents: np.ndarray, decimals: int, mode: str) -> np.ndarray:
+    """round(sqrt(100 * percent)) scaled by 10**decimals, from exact integers"""
+    # sqrt(100 * p) * 10**d == sqrt(m) / 100 with p = P / 10**4 (PERCENT_PLACES)
+    m = percents * (100 * 10 ** (2 * decimals))
+    quotient = _isqrt(m) // 100
+    # Compare the exact root with the midpoint (quotient + 1/2) * 100, squared
+    four_m = m * 4
+    midpoint = (quotient * 2 + 1) * 100
+    midpoint_sq = midpoint * midpoint
+    if mode == "HALF_UP":
+        up = four_m >= midpoint_sq
+    elif mode == "HALF_DOWN":
+        up = four_m > midpoint_sq
+    else:
+        up = (four_m > midpoint_sq) | ((four_m == midpoint_sq) & (quotient % 2 == 1))
+    return quotient + up
+
+
+def apply_curve(
+    percents: Sequence[Percent], curve: Curve, scale: Optional[GradeScale] = None
+) -> CurvedScores:
+    """
+    Curve a batch of computed percents and assign letters.
+
+    Args:
+        percents: compute_scores() "percent" strings (or Decimals)
+        curve: Curve to apply
+        scale: Letter bands; omit to skip letters
+
+    Returns:
+        CurvedScores identical to apply_curve_decimal(percents, curve, scale)
+
+    Raises:
+        ValueError: If a percent is not a non-negative number
+    """
+    decimals = curve.rounding.decimals
+    mode = curve.rounding.mode
+    bound_places = max(_places(curve.floor), _places(curve.cap), _places(curve.amount))
+    limit = Decimal(_MAX_PERCENT_INT).scaleb(-PERCENT_PLACES)
+    if bound_places > PERCENT_PLACES or max(curve.cap, abs(curve.amount), curve.target_mean or 0) > limit:
+        return apply_curve_decimal(percents, curve, scale)
+
+    fixed = [_to_fixed(p) for p in percents]
+    slow_rows = [row for row, value in enumerate(fixed) if value is None]
+    slow_values = {}
+    for row in slow_rows:
+        try:
+            value = Decimal(percents[row])
+        except InvalidOperation:
+            raise ValueError(f"Invalid percent: {percents[row]!r}") from None
+        if not value.is_finite() or value < 0:
+            raise ValueError(f"Invalid percent: {percents[row]!r}")
+        slow_values[row] = value
+    ints = np.array([0 if value is None else value for value in fixed], dtype=np.int64)
+
+    if curve.kind == "target_mean":
+        total = Decimal(int(ints.sum())).scaleb(-PERCENT_PLACES) + sum(slow_values.values(), Decimal("0"))
+        shift = Decimal("0")
+        if len(fixed):
+            mean = total / len(fixed)
+            shift = (curve.target_mean - mean).quantize(_quantizer(PERCENT_PLACES), rounding=ROUND_HALF_EVEN)
+    else:
+        shift = class_shift([], curve)
+
+    floor_int = _scaled(curve.floor, PERCENT_PLACES)
+    cap_int = _scaled(curve.cap, PERCENT_PLACES)
+    if curve.kind == "sqrt":
+        # Clamp on the exact root: sqrt(100 p) <= bound  <=>  100 p <= bound**2
+        hundred_p = ints * (100 * 10 ** PERCENT_PLACES)
+        curved = _sqrt_rounded(ints, decimals, mode)
+        floor_rounded = _round_scaled(np.array([floor_int]), PERCENT_PLACES, decimals, mode)[0]
+        cap_rounded = _round_scaled(np.array([cap_int]), PERCENT_PLACES, decimals, mode)[0]
+        curved = np.where(hundred_p <= floor_int * floor_int, floor_rounded, curved)
+        curved = np.where(hundred_p >= cap_int * cap_int, cap_rounded, curved)
+    else:
+        shifted = np.clip(ints + _scaled(shift, PERCENT_PLACES), floor_int, cap_int)
+        curved = _round_scaled(shifted, PERCENT_PLACES, decimals, mode)
+
+    quantizer = _quantizer(decimals)
+    for row, value in slow_values.items():
+        curved[row] = _scaled(curve_percent(value, curve, shift).quantize(quantizer), decimals)
+
+    letters = None
+    if scale is not None:
+        bands = scale.sorted_bands()
+        places = max([decimals] + [_places(band.min_percent) for band in bands])
+        thresholds = np.array([_scaled(band.min_percent, places) for band in bands], dtype=np.int64)
+        positions = np.searchsorted(thresholds, curved * 10 ** (places - decimals), side="right") - 1
+        labels = [band.letter for band in bands]
+        letters = [labels[position] for position in positions.tolist()]
+
+    return CurvedScores(_format_fixed(curved, decimals), letters, shift)
@@ -0,0 +1,411 @@
+"""
+Memory-Mapped Columnar Gradebook Store
+
+Compact on-disk format for awards and computed scores, read through
+numpy.memmap without copying. One file holds one rubric's submissions:
+
+    magic (8 bytes) | header capacity (uint64 LE) | JSON header (space padded) | records
+
+The JSON header interns criterion ids (column order) and level labels; each
+record is fixed width:
+
+    submission_id   UTF-8 bytes, NUL padded (submission_id_bytes)
+    points          int64 per criterion, scaled by 10**point_places
+    levels          int32 per criterion, index into level_labels (-1 if empty)
+    score_decimals  int8 rounding decimals of the stored scores (-1 if none)
+    raw_points, max_points, percent, final_points
+                    int64 scaled by 10**SCORE_PLACES (final_points is
+                    NO_SCORE in percent mode)
+
+Records are appended in bounded chunks and recompute_store() streams the
+points matrix through the fixed-point engine chunk by chunk, so neither
+direction builds a Pydantic Award per row. Rationales and notes are text
+and stay in the database; converters back to ExtractedScores fill in a
+placeholder rationale.
+"""
+
+import json
+import struct
+from decimal import Decimal, InvalidOperation, ROUND_FLOOR
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+from calculator import RubricLike, ScoringError, _as_compiled, _build_scores, _scale_error
+from models import Award, ComputedScores, ExtractedScores
+from vectorized import POINT_PLACES, _FixedPointPlan, _places, _score_fixed_point
+
+
+MAGIC = b"GRDBOOK1"
+FORMAT_VERSION = 1
+# Rounding decimals are at most 4, so computed scores fit exactly at 4 places
+SCORE_PLACES = 4
+NO_SCORE = np.iinfo(np.int64).min
+DEFAULT_SUBMISSION_ID_BYTES = 64
+DEFAULT_HEADER_BYTES = 64 * 1024
+DEFAULT_CHUNK_ROWS = 65_536
+DEFAULT_RATIONALE = "Loaded from gradebook store"
+
+_PREAMBLE = struct.Struct("<8sQ")
+_INT64_LIMIT = 2 ** 63 - 1
+
+Computed = Union[Mapping[str, Optional[str]], ComputedScores]
+
+
+def _scaled_int(value: Decimal, places: int, what: str) -> int:
+    """value * 10**places as an int64, or ValueError if not exact"""
+    try:
+        exact = value.scaleb(places)
+        scaled = int(exact)
+    except (InvalidOperation, OverflowError, ValueError):
+        raise ValueError(f"Cannot store {what} {value}") from None
+    if scaled != exact or abs(scaled) > _INT64_LIMIT:
+        raise ValueError(f"Cannot store {what} {value} with {places} decimal places")
+    return scaled
+
+
+def _score_field(computed: Computed, name: str) -> Optional[str]:
+    if isinstance(computed, Mapping):
+        return computed.get(name)
+    return getattr(computed, name)
+
+
+class GradebookStore:
+    """
+    Append-only columnar file of one rubric's awards and computed scores.
+
+    Create with GradebookStore.create(); open an existing file with
+    GradebookStore(path).
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            magic, capacity = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f"{self.path} is not a gradebook store")
+            header = json.loads(f.read(capacity))
+        if header.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported gradebook format {header.get('format_version')}")
+
+        self.header_bytes = capacity
+        self.data_offset = _PREAMBLE.size + capacity
+        self.rubric_id: str = header["rubric_id"]
+        self.criterion_ids: Tuple[str, ...] = tuple(header["criterion_ids"])
+        self.level_labels: List[str] = list(header["level_labels"])
+        self.point_places: int = header["point_places"]
+        self.submission_id_bytes: int = header["submission_id_bytes"]
+
+        self._criterion_index = {cid: i for i, cid in enumerate(self.criterion_ids)}
+        self._label_index = {label: i for i, label in enumerate(self.level_labels)}
+        k = len(self.criterion_ids)
+        self.dtype = np.dtype([
+            ("submission_id", f"S{self.submission_id_bytes}"),
+            ("points", "<i8", (k,)),
+            ("levels", "<i4", (k,)),
+            ("score_decimals", "i1"),
+            ("raw_points", "<i8"),
+            ("max_points", "<i8"),
+            ("percent", "<i8"),
+            ("final_points", "<i8"),
+        ])
+
+    @classmethod
+    def create(
+        cls,
+        path: Union[str, Path],
+        rubric: RubricLike,
+        submission_id_bytes: int = DEFAULT_SUBMISSION_ID_BYTES,
+        header_bytes: int = DEFAULT_HEADER_BYTES,
+        point_places: Optional[int] = None,
+    ) -> "GradebookStore":
+        """
+        Create an empty store laid out for a rubric's criteria.
+
+        Level labels from the rubric are interned up front; labels first seen
+        in appended awards are added while the header has room.
+
+        Args:
+            point_places: Decimal places kept for awarded points; at least
+                POINT_PLACES and the places of every max_points and level
+                (the default). Awards with more places cannot be stored.
+        """
+        compiled = _as_compiled(rubric)
+        needed = [POINT_PLACES] + [_places(m) for m in compiled.max_points]
+        needed += [_places(level.points) for criterion in compiled.criteria for level in criterion.levels]
+        point_places = max(needed + [point_places or 0])
+        labels: List[str] = []
+        for criterion in compiled.criteria:
+            for level in criterion.levels:
+                if level.label not in labels:
+                    labels.append(level.label)
+        header = {
+            "format_version": FORMAT_VERSION,
+            "rubric_id": compiled.rubric.rubric_id,
+            "criterion_ids": list(compiled.criterion_ids),
+            "level_labels": labels,
+            "point_places": point_places,
+            "submission_id_bytes": submission_id_bytes,
+        }
+        # Keep records 64-byte aligned
+        capacity = -(-header_bytes // 64) * 64 - _PREAMBLE.size
+        with open(path, "wb") as f:
+            f.write(_PREAMBLE.pack(MAGIC, capacity))
+            f.write(cls._encode_header(header, capacity))
+        return cls(path)
+
+    @staticmethod
+    def _encode_header(header: Dict[str, Any], capacity: int) -> bytes:
+        encoded = json.dumps(header, separators=(",", ":")).encode()
+        if len(encoded) > capacity:
+            raise ValueError(f"Gradebook header needs {len(encoded)} bytes; capacity is {capacity}")
+        return encoded.ljust(capacity, b" ")
+
+    def _write_header(self) -> None:
+        header = {
+            "format_version": FORMAT_VERSION,
+            "rubric_id": self.rubric_id,
+            "criterion_ids": list(self.criterion_ids),
+            "level_labels": self.level_labels,
+            "point_places": self.point_places,
+            "submission_id_bytes": self.submission_id_bytes,
+        }
+        encoded = self._encode_header(header, self.header_bytes)
+        with open(self.path, "r+b") as f:
+            f.seek(_PREAMBLE.size)
+            f.write(encoded)
+
+    def __len__(self) -> int:
+        return (self.path.stat().st_size - self.data_offset) // self.dtype.itemsize
+
+    def records(self, writable: bool = False) -> np.ndarray:
+        """Zero-copy structured view of every record (memmap)"""
+        count = len(self)
+        if count == 0:
+            return np.zeros(0, dtype=self.dtype)
+        return np.memmap(self.path, dtype=self.dtype, mode="r+" if writable else "r",
+                         offset=self.data_offset, shape=(count,))
+
+    def _intern_label(self, label: str) -> int:
+        if not label:
+            return -1
+        index = self._label_index.get(label)
+        if index is None:
+            index = len(self.level_labels)
+            self.level_labels.append(label)
+            self._label_index[label] = index
+        return index
+
+    def _fill(self, record: np.void, extracted: ExtractedScores, computed: Optional[Computed]) -> None:
+        """Fill one record; on ValueError neither the record nor the label table is changed"""
+        submission_id = extracted.submission_id.encode()
+        if len(submission_id) > self.submission_id_bytes:
+            raise ValueError(
+                f"submission_id '{extracted.submission_id}' exceeds {self.submission_id_bytes} bytes"
+            )
+        points_by_id = {score.criterion_id: score for score in extracted.scores}
+        if points_by_id.keys() != self._criterion_index.keys():
+            missing = set(self.criterion_ids) - points_by_id.keys()
+            extra = points_by_id.keys() - set(self.criterion_ids)
+            raise ValueError(
+                f"Submission '{extracted.submission_id}' does not match the store's criteria "
+                f"(missing {sorted(missing)}, extra {sorted(extra)})"
+            )
+
+        # Scale every value before writing anything
+        points = [
+            _scaled_int(points_by_id[criterion_id].points_awarded, self.point_places, "points")
+            for criterion_id in self.criterion_ids
+        ]
+        score_decimals = -1
+        scores = []
+        if computed is not None:
+            percent = Decimal(_score_field(computed, "percent"))
+            score_decimals = max(-percent.as_tuple().exponent, 0)
+            for field in ("raw_points", "max_points", "percent", "final_points"):
+                value = _score_field(computed, field)
+                scores.append((field, NO_SCORE if value is None else _scaled_int(Decimal(value), SCORE_PLACES, field)))
+
+        record["submission_id"] = submission_id
+        record["points"] = points
+        record["levels"] = [self._intern_label(points_by_id[cid].level) for cid in self.criterion_ids]
+        record["score_decimals"] = score_decimals
+        for field, value in scores:
+            record[field] = value
+
+    def append(
+        self,
+        extracted_scores: Iterable[ExtractedScores],
+        computed: Optional[Iterable[Optional[Computed]]] = None,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        errors: Optional[List[ScoringError]] = None,
+    ) -> int:
+        """
+        Append submissions (and optionally their computed scores).
+
+        Args:
+            extracted_scores: Submissions to store, in order
+            computed: Parallel compute_scores results (None entries allowed)
+            chunk_rows: Records buffered per write
+            errors: If given, rows that cannot be stored are skipped and
+                recorded here as ScoringError (input index, submission_id,
+                error) instead of raising
+
+        Returns:
+            Number of records appended
+
+        Raises:
+            ValueError: If a submission does not match the store's criteria or
+                a value cannot be stored exactly (unless errors is given).
+                Every row before it is written first, with its labels.
+        """
+        computed_iter = iter(computed) if computed is not None else None
+        labels_before = len(self.level_labels)
+        buffer = np.zeros(chunk_rows, dtype=self.dtype)
+        appended = 0
+        filled = 0
+        with open(self.path, "ab") as f:
+            for index, extracted in enumerate(extracted_scores):
+                scores = next(computed_iter, None) if computed_iter is not None else None
+                try:
+                    self._fill(buffer[filled], extracted, scores)
+                except ValueError as e:
+                    if errors is None:
+                        self._flush_labels(labels_before)
+                        buffer[:filled].tofile(f)
+                        raise
+                    errors.append(ScoringError(index, extracted.submission_id, e))
+                    continue
+                filled += 1
+                if filled == chunk_rows:
+                    self._flush_labels(labels_before)
+                    labels_before = len(self.level_labels)
+                    buffer.tofile(f)
+                    appended += filled
+                    filled = 0
+                    buffer[:] = 0
+            self._flush_labels(labels_before)
+            buffer[:filled].tofile(f)
+            appended += filled
+        return appended
+
+    def _flush_labels(self, labels_before: int) -> None:
+        """Persist newly interned labels before records that reference them"""
+        if len(self.level_labels) != labels_before:
+            self._write_header()
+
+    def extracted(self, row: int, rationale: str = DEFAULT_RATIONALE) -> ExtractedScores:
+        """Rebuild one record as ExtractedScores"""
+        return self._to_extracted(self.records()[row], rationale)
+
+    def iter_extracted(self, rationale: str = DEFAULT_RATIONALE) -> Iterator[ExtractedScores]:
+        """Rebuild every record as ExtractedScores, in file order"""
+        for record in self.records():
+            yield self._to_extracted(record, rationale)
+
+    def _to_extracted(self, record: np.void, rationale: str) -> ExtractedScores:
+        return ExtractedScores(
+            submission_id=record["submission_id"].decode(),
+            scores=[
+                Award(
+                    criterion_id=criterion_id,
+                    level=self.level_labels[level] if level >= 0 else "",
+                    points_awarded=Decimal(int(points)).scaleb(-self.point_places),
+                    rationale=rationale,
+                )
+                for criterion_id, points, level in zip(self.criterion_ids, record["points"], record["levels"])
+            ],
+        )
+
+    def computed(self, row: int) -> Optional[Dict[str, Optional[str]]]:
+        """Stored compute_scores result for one record, or None if never scored"""
+        record = self.records()[row]
+        decimals = int(record["score_decimals"])
+        if decimals < 0:
+            return None
+        quantizer = Decimal(10) ** -decimals
+        result: Dict[str, Optional[str]] = {}
+        for field in ("raw_points", "max_points", "percent", "final_points"):
+            value = int(record[field])
+            result[field] = None if value == NO_SCORE else str(Decimal(value).scaleb(-SCORE_PLACES).quantize(quantizer))
+        return result
+
+
+def recompute_store(
+    store: GradebookStore,
+    rubric: RubricLike,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Tuple[int, int]:
+    """
+    Rescore every record in place, streaming the memmapped points matrix.
+
+    Results are identical to compute_scores on the stored awards (overall
+    scores only; section subtotals are not stored). Records whose awards fail
+    validation (out of range) are marked unscored.
+
+    Returns:
+        (scored, failed) record counts
+
+    Raises:
+        ValueError: If the rubric's criteria differ from the store's, or the
+            rubric cannot score (zero maximum, points mode without total)
+    """
+    compiled = _as_compiled(rubric)
+    if set(compiled.criterion_ids) != set(store.criterion_ids):
+        missing = set(compiled.criterion_ids) - set(store.criterion_ids)
+        extra = set(store.criterion_ids) - set(compiled.criterion_ids)
+        raise ValueError(f"Rubric does not match the store's criteria (missing {sorted(missing)}, extra {sorted(extra)})")
+    error = _scale_error(compiled)
+    if error is not None:
+        raise ValueError(error)
+
+    records = store.records(writable=True)
+    if len(records) == 0:
+        return 0, 0
+
+    columns = [store.criterion_ids.index(cid) for cid in compiled.criterion_ids]
+    plan = _FixedPointPlan(compiled, store.point_places)
+    points_mode = compiled.scale_mode == "points"
+    fixed_point = plan.fits_int64(points_mode)
+    up_scale = 10 ** (plan.point_places - store.point_places)
+    # Largest in-range award in the store's units (max may have more places)
+    store_max = np.array([
+        int(m.scaleb(store.point_places).to_integral_value(rounding=ROUND_FLOOR))
+        for m in compiled.max_points
+    ], dtype=np.int64)
+    decimals = plan.decimals
+    to_score_places = 10 ** (SCORE_PLACES - decimals)
+    max_scaled = _scaled_int(compiled.round(compiled.max_weighted), SCORE_PLACES, "max_points")
+
+    scored = failed = 0
+    for start in range(0, len(records), chunk_rows):
+        chunk = records[start:start + chunk_rows]
+        points = np.ascontiguousarray(chunk["points"][:, columns])
+        invalid = ((points < 0) | (points > store_max)).any(axis=1)
+        points[invalid] = 0
+
+        decimal_rows = np.zeros(len(chunk), dtype=bool) if fixed_point else ~invalid
+        if fixed_point:
+            raw, percent, final, near_midpoint = _score_fixed_point(plan, points * up_scale, points_mode)
+            decimal_rows |= near_midpoint & ~invalid
+            chunk["raw_points"] = raw * to_score_places
+            chunk["percent"] = percent * to_score_places
+            chunk["final_points"] = final * to_score_places if points_mode else NO_SCORE
+        chunk["max_points"] = max_scaled
+        chunk["score_decimals"] = np.where(invalid, -1, decimals)
+
+        for row in np.flatnonzero(decimal_rows):
+            raw_weighted = Decimal("0")
+            for awarded, weight in zip(points[row], compiled.weights):
+                raw_weighted += Decimal(int(awarded)).scaleb(-store.point_places) * weight
+            result = _build_scores(compiled, raw_weighted)
+            for field in ("raw_points", "percent", "final_points"):
+                value = result[field]
+                chunk[field][row] = NO_SCORE if value is None else _scaled_int(Decimal(value), SCORE_PLACES, field)
+
+        failed += int(invalid.sum())
+        scored += len(chunk) - int(invalid.sum())
+
+    records.flush()
+    return scored, failed
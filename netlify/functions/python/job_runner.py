@@ -0,0 +1,406 @@
+"""
+Async Bulk Grading Job Runner
+
+Claims pending 'grading' tasks from a background_tasks queue (modelled on
+migrations/add_background_tasks.sql), scores each task's submission with
+the calculator and writes computed_scores / calculator_version back in one
+transaction per batch, instead of one connection and one UPDATE per
+submission.
+
+SQLite stands in for Postgres locally and in tests; SCHEMA mirrors the
+columns the runner touches. Each claim is a single UPDATE ... RETURNING
+(FOR UPDATE SKIP LOCKED on Postgres), so concurrent runners never process
+the same task. A small connection pool is shared by the runner's claim
+loops; database calls run in threads so scoring one batch overlaps the
+reads and writes of another.
+
+Task input_data is {"submission_id": ...}; the rubric comes from the
+submission's assignment (assignments.rubric_json) and the awards from
+submissions.extracted_scores.
+
+Usage:
+    python -m job_runner grader.sqlite [--batch-size 500] [--concurrency 2] [--drain]
+"""
+
+import argparse
+import asyncio
+import json
+import queue
+import sqlite3
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from calculator import CALCULATOR_VERSION, CompiledRubric, compile_rubric, compute_scores
+from models import load_rubric_json, parse_extracted_scores_json
+
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_CONCURRENCY = 2
+DEFAULT_POOL_SIZE = 4
+DEFAULT_POLL_INTERVAL = 1.0
+TASK_TYPE = "grading"
+# Compiled rubrics kept per runner (least recently used dropped first)
+RUBRIC_CACHE_SIZE = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assignments (
+  assignment_id TEXT PRIMARY KEY,
+  rubric_json TEXT
+);
+
+CREATE TABLE IF NOT EXISTS submissions (
+  submission_id TEXT PRIMARY KEY,
+  assignment_id TEXT REFERENCES assignments(assignment_id),
+  extracted_scores TEXT,
+  computed_scores TEXT,
+  calculator_version TEXT,
+  updated_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS background_tasks (
+  task_id TEXT PRIMARY KEY,
+  tenant_id TEXT NOT NULL,
+  task_type TEXT NOT NULL,
+  status TEXT NOT NULL DEFAULT 'pending'
+    CHECK (status IN ('pending', 'processing', 'completed', 'failed')),
+  input_data TEXT NOT NULL,
+  output_data TEXT,
+  error_message TEXT,
+  created_at REAL NOT NULL,
+  updated_at REAL NOT NULL,
+  completed_at REAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_background_tasks_status
+  ON background_tasks(status, task_type, created_at);
+"""
+
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections shared across threads"""
+
+    def __init__(self, path: str, size: int = DEFAULT_POOL_SIZE, timeout: float = 30.0):
+        self.path = path
+        self._idle: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._all: List[sqlite3.Connection] = []
+        for _ in range(size):
+            # Autocommit mode; transactions are opened explicitly
+            conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._all.append(conn)
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Pooled connection inside BEGIN IMMEDIATE ... COMMIT (ROLLBACK on error)"""
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def close(self) -> None:
+        for conn in self._all:
+            conn.close()
+
+
+def create_schema(pool: ConnectionPool) -> None:
+    with pool.connection() as conn:
+        conn.executescript(SCHEMA)
+
+
+def enqueue_grading_tasks(pool: ConnectionPool, submission_ids: Iterable[str],
+                          tenant_id: str, now: Optional[float] = None) -> List[str]:
+    """Insert one pending grading task per submission; returns the task ids"""
+    now = time.time() if now is None else now
+    rows = [
+        (str(uuid.uuid4()), tenant_id, TASK_TYPE, json.dumps({"submission_id": submission_id}), now, now)
+        for submission_id in submission_ids
+    ]
+    with pool.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO background_tasks (task_id, tenant_id, task_type, input_data, created_at, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+    return [row[0] for row in rows]
+
+
+def queue_depth(pool: ConnectionPool, now: Optional[float] = None) -> Tuple[int, float]:
+    """(pending task count, age in seconds of the oldest pending task)"""
+    now = time.time() if now is None else now
+    with pool.connection() as conn:
+        count, oldest = conn.execute(
+            "SELECT COUNT(*), MIN(created_at) FROM background_tasks WHERE status = 'pending' AND task_type = ?",
+            (TASK_TYPE,),
+        ).fetchone()
+    return count, 0.0 if oldest is None else now - oldest
+
+
+@dataclass
+class RunnerStats:
+    """Throughput and queue-lag counters for one runner"""
+    started_at: float = field(default_factory=time.perf_counter)
+    batches: int = 0
+    claimed: int = 0
+    completed: int = 0
+    failed: int = 0
+    # Seconds between a task being enqueued and claimed
+    lag_total: float = 0.0
+    lag_max: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Finished tasks per second since the runner started"""
+        elapsed = time.perf_counter() - self.started_at
+        return (self.completed + self.failed) / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def lag_mean(self) -> float:
+        return self.lag_total / self.claimed if self.claimed else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "claimed": self.claimed,
+            "completed": self.completed,
+            "failed": self.failed,
+            "throughput_per_sec": round(self.throughput, 1),
+            "queue_lag_mean_sec": round(self.lag_mean, 3),
+            "queue_lag_max_sec": round(self.lag_max, 3),
+        }
+
+
+class _Task:
+    __slots__ = ("task_id", "submission_id", "created_at")
+
+    def __init__(self, task_id: str, submission_id: Optional[str], created_at: float):
+        self.task_id = task_id
+        self.submission_id = submission_id
+        self.created_at = created_at
+
+
+class JobRunner:
+    """
+    Claims, scores and records grading tasks in batches.
+
+    Args:
+        pool: Connection pool for the grading database
+        batch_size: Tasks claimed (and written back) per transaction
+        concurrency: Claim loops run side by side by run()
+        poll_interval: Seconds to wait when the queue is empty
+    """
+
+    def __init__(self, pool: ConnectionPool, batch_size: int = DEFAULT_BATCH_SIZE,
+                 concurrency: int = DEFAULT_CONCURRENCY, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.stats = RunnerStats()
+        # rubric_json text -> compiled rubric (or the error it raised)
+        self._rubrics: "OrderedDict[str, object]" = OrderedDict()
+
+    def _claim(self) -> List[_Task]:
+        now = time.time()
+        with self.pool.transaction() as conn:
+            rows = conn.execute(
+                "UPDATE background_tasks SET status = 'processing', updated_at = ?"
+                " WHERE task_id IN ("
+                "   SELECT task_id FROM background_tasks"
+                "   WHERE status = 'pending' AND task_type = ?"
+                "   ORDER BY created_at LIMIT ?)"
+                " RETURNING task_id, input_data, created_at",
+                (now, TASK_TYPE, self.batch_size),
+            ).fetchall()
+        tasks = []
+        for task_id, input_data, created_at in rows:
+            try:
+                submission_id = json.loads(input_data).get("submission_id")
+            except (ValueError, AttributeError):
+                submission_id = None
+            tasks.append(_Task(task_id, submission_id, created_at))
+        return tasks
+
+    def _load(self, tasks: List[_Task]) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        """submission_id -> (rubric_json, extracted_scores) in one query"""
+        ids = [task.submission_id for task in tasks if isinstance(task.submission_id, str)]
+        if not ids:
+            return {}
+        with self.pool.connection() as conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS claimed_ids (submission_id TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM claimed_ids")
+            conn.executemany("INSERT OR IGNORE INTO claimed_ids VALUES (?)", ((i,) for i in ids))
+            rows = conn.execute(
+                "SELECT s.submission_id, a.rubric_json, s.extracted_scores"
+                " FROM claimed_ids c"
+                " JOIN submissions s ON s.submission_id = c.submission_id"
+                " LEFT JOIN assignments a ON a.assignment_id = s.assignment_id"
+            ).fetchall()
+        return {submission_id: (rubric_json, extracted) for submission_id, rubric_json, extracted in rows}
+
+    def _rubric(self, rubric_json: str) -> CompiledRubric:
+        """Compiled rubric for an assignment's rubric_json (cached); raises ValueError"""
+        cached = self._rubrics.get(rubric_json)
+        if cached is None:
+            try:
+                cached = compile_rubric(load_rubric_json(rubric_json))
+            except ValueError as e:
+                cached = ValueError(f"Invalid rubric: {e}")
+            self._rubrics[rubric_json] = cached
+            if len(self._rubrics) > RUBRIC_CACHE_SIZE:
+                self._rubrics.popitem(last=False)
+        else:
+            self._rubrics.move_to_end(rubric_json)
+        if isinstance(cached, ValueError):
+            raise cached
+        return cached
+
+    def _score(self, tasks: List[_Task], rows) -> Tuple[list, list, list]:
+        """(submission updates, completed task updates, failed task updates)"""
+        now = time.time()
+        submission_updates, completed, failed = [], [], []
+        for task in tasks:
+            row = rows.get(task.submission_id)
+            try:
+                if row is None:
+                    raise ValueError(f"Submission not found: {task.submission_id}")
+                rubric_json, extracted_json = row
+                if rubric_json is None:
+                    raise ValueError("Assignment has no rubric_json")
+                if extracted_json is None:
+                    raise ValueError("Submission has no extracted_scores")
+                computed = compute_scores(self._rubric(rubric_json), parse_extracted_scores_json(extracted_json))
+            except ValueError as e:
+                failed.append((str(e), now, now, task.task_id))
+                continue
+            except Exception as e:
+                # A malformed row must fail its own task, not the whole batch
+                failed.append((f"{type(e).__name__}: {e}", now, now, task.task_id))
+                continue
+            computed_json = json.dumps(computed)
+            submission_updates.append((computed_json, CALCULATOR_VERSION, now, task.submission_id))
+            output = json.dumps({"submission_id": task.submission_id, "computed_scores": computed,
+                                 "calculator_version": CALCULATOR_VERSION})
+            completed.append((output, now, now, task.task_id))
+        return submission_updates, completed, failed
+
+    def _write(self, submission_updates: list, completed: list, failed: list) -> None:
+        with self.pool.transaction() as conn:
+            conn.executemany(
+                "UPDATE submissions SET computed_scores = ?, calculator_version = ?, updated_at = ?"
+                " WHERE submission_id = ?",
+                submission_updates,
+            )
+            conn.executemany(
+                "UPDATE background_tasks SET status = 'completed', output_data = ?, updated_at = ?,"
+                " completed_at = ? WHERE task_id = ?",
+                completed,
+            )
+            conn.executemany(
+                "UPDATE background_tasks SET status = 'failed', error_message = ?, updated_at = ?,"
+                " completed_at = ? WHERE task_id = ?",
+                failed,
+            )
+
+    def process_batch(self) -> int:
+        """Claim, score and record one batch synchronously; returns tasks claimed"""
+        tasks = self._claim()
+        if not tasks:
+            return 0
+        claimed_at = time.time()
+        submission_updates, completed, failed = self._score(tasks, self._load(tasks))
+        self._write(submission_updates, completed, failed)
+        self._record(tasks, claimed_at, len(completed), len(failed))
+        return len(tasks)
+
+    def _record(self, tasks: List[_Task], claimed_at: float, completed: int, failed: int) -> None:
+        stats = self.stats
+        stats.batches += 1
+        stats.claimed += len(tasks)
+        stats.completed += completed
+        stats.failed += failed
+        for task in tasks:
+            lag = max(claimed_at - task.created_at, 0.0)
+            stats.lag_total += lag
+            stats.lag_max = max(stats.lag_max, lag)
+
+    async def _loop(self, drain: bool, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            tasks = await asyncio.to_thread(self._claim)
+            if not tasks:
+                if drain:
+                    return
+                try:
+                    await asyncio.wait_for(stop.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            claimed_at = time.time()
+            rows = await asyncio.to_thread(self._load, tasks)
+            submission_updates, completed, failed = self._score(tasks, rows)
+            await asyncio.to_thread(self._write, submission_updates, completed, failed)
+            self._record(tasks, claimed_at, len(completed), len(failed))
+
+    async def run(self, drain: bool = False, stop: Optional[asyncio.Event] = None) -> RunnerStats:
+        """
+        Process tasks until stop is set (or, with drain=True, the queue is empty).
+
+        Returns:
+            The runner's cumulative stats
+        """
+        stop = stop or asyncio.Event()
+        await asyncio.gather(*(self._loop(drain, stop) for _ in range(self.concurrency)))
+        return self.stats
+
+    def requeue_stale(self, older_than: float) -> int:
+        """Return 'processing' tasks untouched for older_than seconds to pending (crashed runners)"""
+        now = time.time()
+        with self.pool.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE background_tasks SET status = 'pending', updated_at = ?"
+                " WHERE status = 'processing' AND task_type = ? AND updated_at < ?",
+                (now, TASK_TYPE, now - older_than),
+            )
+        return cursor.rowcount
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Batch grading job runner")
+    parser.add_argument("database", help="SQLite database path")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL)
+    parser.add_argument("--drain", action="store_true", help="Exit once the queue is empty")
+    args = parser.parse_args()
+
+    pool = ConnectionPool(args.database, size=args.concurrency * 2)
+    create_schema(pool)
+    runner = JobRunner(pool, args.batch_size, args.concurrency, args.poll_interval)
+    try:
+        asyncio.run(runner.run(drain=args.drain))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pending, oldest = queue_depth(pool)
+        print(json.dumps(dict(runner.stats.to_dict(), pending=pending, oldest_pending_sec=round(oldest, 3))))
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
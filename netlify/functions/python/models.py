@@ -5,32 +5,38 @@ These models enforce strict typing and validation for rubric-based grading.
 All point values use Decimal to eliminate float arithmetic errors.
 """
 
-from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional, Literal
+import json
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+from typing import Any, Dict, List, Optional, Literal, Union
 from decimal import Decimal
 
 
-class Rounding(BaseModel):
+class _DeferredModel(BaseModel):
+    """Base model whose validator is built on first use instead of at import"""
+    model_config = ConfigDict(defer_build=True)
+
+
+class Rounding(_DeferredModel):
     """Rounding configuration for score calculations"""
     mode: Literal["HALF_UP", "HALF_EVEN", "HALF_DOWN"] = "HALF_UP"
     decimals: int = Field(default=2, ge=0, le=4)
 
 
-class Scale(BaseModel):
+class Scale(_DeferredModel):
     """Scoring scale configuration (percent or points mode)"""
     mode: Literal["percent", "points"] = "percent"
     total_points: Optional[Decimal] = None
     rounding: Rounding = Rounding()
 
 
-class Level(BaseModel):
+class Level(_DeferredModel):
     """Individual performance level within a criterion"""
     label: str = Field(..., min_length=1, max_length=100)
     points: Decimal = Field(..., ge=0)
     descriptor: str = Field(..., min_length=1)
 
 
-class Criterion(BaseModel):
+class Criterion(_DeferredModel):
     """Single grading criterion with levels and weighting"""
     id: str = Field(..., min_length=1, max_length=100)
     name: str = Field(..., min_length=1, max_length=255)
@@ -39,16 +45,44 @@ class Criterion(BaseModel):
     levels: List[Level] = Field(..., min_length=1)
 
 
-class Rubric(BaseModel):
-    """Complete grading rubric with criteria and scale"""
+class Section(_DeferredModel):
+    """Named group of criteria and nested sections, weighted as a whole"""
+    id: str = Field(..., min_length=1, max_length=100)
+    name: str = Field(..., min_length=1, max_length=255)
+    weight: Decimal = Field(default=Decimal("1.00"), gt=0)
+    criteria: List[Criterion] = Field(default_factory=list)
+    sections: List["Section"] = Field(default_factory=list)
+
+    @model_validator(mode="after")
+    def _not_empty(self) -> "Section":
+        if not self.criteria and not self.sections:
+            raise ValueError(f"Section '{self.id}' must have at least 1 item in criteria or sections")
+        return self
+
+
+class Rubric(_DeferredModel):
+    """
+    Complete grading rubric with criteria and scale.
+    
+    Criteria may be listed directly, grouped into (nested) sections, or both.
+    A criterion's effective weight is its own weight times the weights of
+    every enclosing section.
+    """
     rubric_id: str
     title: str = Field(..., min_length=1, max_length=255)
-    criteria: List[Criterion] = Field(..., min_length=1)
+    criteria: List[Criterion] = Field(default_factory=list)
+    sections: List[Section] = Field(default_factory=list)
     scale: Scale
     schema_version: int = 1
 
+    @model_validator(mode="after")
+    def _not_empty(self) -> "Rubric":
+        if not self.criteria and not self.sections:
+            raise ValueError("Rubric must have at least 1 item in criteria or sections")
+        return self
 
-class Award(BaseModel):
+
+class Award(_DeferredModel):
     """Points awarded for a single criterion"""
     criterion_id: str
     level: str
@@ -56,16 +90,348 @@ class Award(BaseModel):
     rationale: str = Field(..., min_length=1)
 
 
-class ExtractedScores(BaseModel):
+class ExtractedScores(_DeferredModel):
     """LLM-extracted scores for all criteria (no totals computed)"""
     submission_id: str
     scores: List[Award] = Field(..., min_length=1)
     notes: Optional[str] = None
 
 
-class ComputedScores(BaseModel):
+class LevelAward(_DeferredModel):
+    """Level label chosen for a single criterion (points come from the rubric)"""
+    criterion_id: str
+    level: str = Field(..., min_length=1)
+    rationale: str = Field(..., min_length=1)
+
+
+class LevelExtractedScores(_DeferredModel):
+    """LLM-extracted level labels for all criteria (level-based scoring)"""
+    submission_id: str
+    scores: List[LevelAward] = Field(..., min_length=1)
+    notes: Optional[str] = None
+
+
+class SectionScores(_DeferredModel):
+    """Subtotal for one rubric section (weights below the section only)"""
+    raw_points: str
+    max_points: str
+    percent: str
+
+
+class ComputedScores(_DeferredModel):
     """Deterministically computed final scores"""
     raw_points: str  # Decimal as string for JSON serialization
     max_points: str
     percent: str
     final_points: Optional[str] = None  # Only present in points mode
+    sections: Optional[Dict[str, SectionScores]] = None  # Only for rubrics with sections
+
+
+
+# Trusted construction
+#
+# Rubrics loaded from our own rubric_json column (and scores we stored
+# ourselves) were validated when they were written. These __slots__ classes
+# mirror the attributes the calculator reads, and the loaders build them
+# straight from JSON without re-running any validators. (model_construct is
+# slower than pydantic-core's own JSON validation, so it is not used here.)
+# Never use them for LLM-originated input.
+
+class TrustedRounding:
+    """Unvalidated Rounding"""
+    __slots__ = ("mode", "decimals")
+
+    def __init__(self, mode: str = "HALF_UP", decimals: int = 2):
+        self.mode = mode
+        self.decimals = decimals
+
+
+class TrustedScale:
+    """Unvalidated Scale"""
+    __slots__ = ("mode", "total_points", "rounding")
+
+    def __init__(self, mode: str, total_points: Optional[Decimal], rounding: TrustedRounding):
+        self.mode = mode
+        self.total_points = total_points
+        self.rounding = rounding
+
+
+class TrustedLevel:
+    """Unvalidated Level"""
+    __slots__ = ("label", "points", "descriptor")
+
+    def __init__(self, label: str, points: Decimal, descriptor: str):
+        self.label = label
+        self.points = points
+        self.descriptor = descriptor
+
+
+class TrustedCriterion:
+    """Unvalidated Criterion"""
+    __slots__ = ("id", "name", "max_points", "weight", "levels")
+
+    def __init__(self, id: str, name: str, max_points: Decimal, weight: Decimal,
+                 levels: List[TrustedLevel]):
+        self.id = id
+        self.name = name
+        self.max_points = max_points
+        self.weight = weight
+        self.levels = levels
+
+
+class TrustedSection:
+    """Unvalidated Section"""
+    __slots__ = ("id", "name", "weight", "criteria", "sections")
+
+    def __init__(self, id: str, name: str, weight: Decimal, criteria: List[TrustedCriterion],
+                 sections: List["TrustedSection"]):
+        self.id = id
+        self.name = name
+        self.weight = weight
+        self.criteria = criteria
+        self.sections = sections
+
+
+class TrustedRubric:
+    """Unvalidated Rubric"""
+    __slots__ = ("rubric_id", "title", "criteria", "scale", "schema_version", "sections")
+
+    def __init__(self, rubric_id: str, title: str, criteria: List[TrustedCriterion],
+                 scale: TrustedScale, schema_version: int = 1,
+                 sections: Optional[List[TrustedSection]] = None):
+        self.rubric_id = rubric_id
+        self.title = title
+        self.criteria = criteria
+        self.scale = scale
+        self.schema_version = schema_version
+        self.sections = sections if sections is not None else []
+
+    def to_model(self) -> Rubric:
+        """Fully validated Rubric (e.g. before handing it to another process)"""
+        return Rubric.model_validate(_trusted_to_dict(self))
+
+
+class TrustedAward:
+    """Unvalidated Award"""
+    __slots__ = ("criterion_id", "level", "points_awarded", "rationale")
+
+    def __init__(self, criterion_id: str, level: str, points_awarded: Decimal, rationale: str):
+        self.criterion_id = criterion_id
+        self.level = level
+        self.points_awarded = points_awarded
+        self.rationale = rationale
+
+
+class TrustedExtractedScores:
+    """Unvalidated ExtractedScores"""
+    __slots__ = ("submission_id", "scores", "notes")
+
+    def __init__(self, submission_id: str, scores: List[TrustedAward], notes: Optional[str] = None):
+        self.submission_id = submission_id
+        self.scores = scores
+        self.notes = notes
+
+    def to_model(self) -> ExtractedScores:
+        """Fully validated ExtractedScores"""
+        return ExtractedScores.model_validate(_trusted_to_dict(self))
+
+
+_TRUSTED_TYPES = (
+    TrustedRounding, TrustedScale, TrustedLevel, TrustedCriterion,
+    TrustedSection, TrustedRubric, TrustedAward, TrustedExtractedScores,
+)
+
+
+def _trusted_to_dict(obj: Any) -> Any:
+    """Recursively convert trusted objects to plain dicts/lists"""
+    if isinstance(obj, list):
+        return [_trusted_to_dict(item) for item in obj]
+    if isinstance(obj, _TRUSTED_TYPES):
+        return {name: _trusted_to_dict(getattr(obj, name)) for name in obj.__slots__}
+    return obj
+
+
+def _decimal(value: Any) -> Decimal:
+    """Coerce a stored point value (Decimal, str, int) to Decimal"""
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def _construct_criteria(items: List[Dict[str, Any]]) -> List[TrustedCriterion]:
+    return [
+        TrustedCriterion(
+            id=criterion["id"],
+            name=criterion["name"],
+            max_points=_decimal(criterion["max_points"]),
+            weight=_decimal(criterion.get("weight", "1.00")),
+            levels=[
+                TrustedLevel(level["label"], _decimal(level["points"]), level["descriptor"])
+                for level in criterion["levels"]
+            ],
+        )
+        for criterion in items
+    ]
+
+
+def _construct_sections(items: List[Dict[str, Any]]) -> List[TrustedSection]:
+    return [
+        TrustedSection(
+            id=section["id"],
+            name=section["name"],
+            weight=_decimal(section.get("weight", "1.00")),
+            criteria=_construct_criteria(section.get("criteria", [])),
+            sections=_construct_sections(section.get("sections", [])),
+        )
+        for section in items
+    ]
+
+
+def construct_rubric(data: Dict[str, Any]) -> TrustedRubric:
+    """Build a rubric from trusted, previously validated data without validation"""
+    scale = data.get("scale") or {}
+    rounding = scale.get("rounding") or {}
+    total_points = scale.get("total_points")
+
+    return TrustedRubric(
+        rubric_id=data["rubric_id"],
+        title=data["title"],
+        criteria=_construct_criteria(data.get("criteria", [])),
+        sections=_construct_sections(data.get("sections", [])),
+        scale=TrustedScale(
+            mode=scale.get("mode", "percent"),
+            total_points=None if total_points is None else _decimal(total_points),
+            rounding=TrustedRounding(rounding.get("mode", "HALF_UP"), rounding.get("decimals", 2)),
+        ),
+        schema_version=data.get("schema_version", 1),
+    )
+
+
+def construct_extracted_scores(data: Dict[str, Any]) -> TrustedExtractedScores:
+    """Build extracted scores from trusted, previously validated data without validation"""
+    return TrustedExtractedScores(
+        data["submission_id"],
+        [
+            TrustedAward(
+                award["criterion_id"],
+                award["level"],
+                _decimal(award["points_awarded"]),
+                award["rationale"],
+            )
+            for award in data["scores"]
+        ],
+        data.get("notes"),
+    )
+
+
+def _lean_extracted_scores(data: Any) -> Optional[TrustedExtractedScores]:
+    """
+    Check ExtractedScores' constraints on decoded JSON of the usual shape.
+    
+    Returns None whenever full validation is needed (coercions such as
+    numeric strings, or any violation), so the caller can defer to Pydantic
+    for identical acceptance rules and error messages.
+    """
+    if type(data) is not dict:
+        return None
+    submission_id = data.get("submission_id")
+    scores = data.get("scores")
+    notes = data.get("notes")
+    if type(submission_id) is not str or type(scores) is not list or not scores:
+        return None
+    if notes is not None and type(notes) is not str:
+        return None
+
+    awards = []
+    for award in scores:
+        if type(award) is not dict:
+            return None
+        criterion_id = award.get("criterion_id")
+        level = award.get("level")
+        points = award.get("points_awarded")
+        rationale = award.get("rationale")
+        if type(criterion_id) is not str or type(level) is not str:
+            return None
+        if type(rationale) is not str or not rationale:
+            return None
+        if type(points) is int:
+            points = Decimal(points)
+        elif type(points) is not Decimal or not points.is_finite():
+            return None
+        if points < 0:
+            return None
+        awards.append(TrustedAward(criterion_id, level, points, rationale))
+    return TrustedExtractedScores(submission_id, awards, notes)
+
+
+def _float_decimal(text: str) -> Decimal:
+    """A JSON float as ExtractedScores.model_validate_json reads it (via a binary float)"""
+    value = Decimal(repr(float(text)))
+    if value.is_finite() and value == value.to_integral_value():
+        # Integral floats come back without an exponent; -0.0 stays Decimal('-0')
+        return Decimal(int(value)).copy_sign(value)
+    return value
+
+
+def parse_extracted_scores_json(
+    raw: Union[str, bytes], exact: bool = False
+) -> Union[ExtractedScores, TrustedExtractedScores]:
+    """
+    Validate LLM score JSON without building a Pydantic model per award.
+    
+    Payloads of the usual shape are checked against ExtractedScores'
+    constraints directly; anything else goes through ExtractedScores
+    validation, so what is accepted, and every error, is unchanged.
+    
+    points_awarded is always a Decimal, never a float. By default it holds
+    exactly the Decimal that ExtractedScores.model_validate_json produces
+    today: a JSON number with a fraction or exponent is first rounded to
+    the nearest binary float, so at most 17 significant digits survive
+    (3.1000000000000000001 reads as 3.1, -0.0 as Decimal('-0')). That keeps
+    results identical to the validated path. Numeric strings are coerced
+    by pydantic, digit for digit, in both modes.
+    
+    Args:
+        raw: ExtractedScores JSON text or bytes
+        exact: Decode JSON numbers straight to Decimal, keeping every digit
+            the LLM wrote; may differ from model_validate_json beyond 17
+            significant digits
+    
+    Raises:
+        ValidationError: If the JSON is malformed or invalid
+    """
+    try:
+        data = json.loads(raw, parse_float=Decimal if exact else _float_decimal)
+    except ValueError:
+        # Report malformed JSON the way model_validate_json does
+        return ExtractedScores.model_validate_json(raw)
+    extracted = _lean_extracted_scores(data)
+    if extracted is None:
+        return ExtractedScores.model_validate(data) if exact else ExtractedScores.model_validate_json(raw)
+    return extracted
+
+
+def load_rubric_json(raw: Union[str, bytes], trusted: bool = False) -> Union[Rubric, TrustedRubric]:
+    """
+    Load a rubric from JSON.
+    
+    Args:
+        raw: Rubric JSON text or bytes
+        trusted: Skip validation; only for rubric_json we stored ourselves
+    """
+    if not trusted:
+        return Rubric.model_validate_json(raw)
+    return construct_rubric(json.loads(raw, parse_float=Decimal))
+
+
+def load_extracted_scores_json(
+    raw: Union[str, bytes], trusted: bool = False
+) -> Union[ExtractedScores, TrustedExtractedScores]:
+    """
+    Load extracted scores from JSON.
+    
+    Args:
+        raw: ExtractedScores JSON text or bytes
+        trusted: Skip validation; never for LLM output, only for stored scores
+    """
+    if not trusted:
+        return ExtractedScores.model_validate_json(raw)
+    return construct_extracted_scores(json.loads(raw, parse_float=Decimal))
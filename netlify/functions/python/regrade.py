@@ -0,0 +1,203 @@
+"""
+Parallel Regrade Engine
+
+Recomputes every submission for an assignment after a rubric change using a
+process pool. Submissions are split into fixed-size chunks; the rubric is
+serialized once and compiled in each worker by the pool initializer, so
+chunks only carry the awards. Results are merged in input order, so the
+output is identical for any worker count or chunk size.
+
+Submissions may be ExtractedScores objects or the raw extracted_scores JSON
+as stored (str/bytes). Raw JSON is shipped untouched and parsed in the
+workers; objects are packed into plain tuples, since pickling Pydantic models
+costs more than scoring them.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from pydantic import ValidationError
+from calculator import (
+    CompiledRubric,
+    RubricLike,
+    ScoringError,
+    _as_compiled,
+    compile_rubric,
+    compute_scores_many,
+)
+from models import ExtractedScores, TrustedRubric, load_extracted_scores_json, load_rubric_json
+
+
+DEFAULT_CHUNK_SIZE = 500
+
+ScoreResult = Union[Dict[str, str], ScoringError]
+Submission = Union[ExtractedScores, str, bytes]
+
+# Compiled rubric and JSON trust mode for the current worker, set by _init_worker
+_worker_rubric: Optional[CompiledRubric] = None
+_worker_trusted_json = False
+
+
+class _PackedAward(NamedTuple):
+    """Award fields the calculator reads, rebuilt from a packed tuple"""
+    criterion_id: str
+    points_awarded: Decimal
+
+
+class _PackedSubmission(NamedTuple):
+    """ExtractedScores fields the calculator reads, rebuilt from a packed tuple"""
+    submission_id: str
+    scores: Tuple[_PackedAward, ...]
+
+
+def _pack(submission: Submission):
+    """Cheap-to-pickle form of a submission (raw JSON passes through)"""
+    if isinstance(submission, (str, bytes)):
+        return submission
+    return (
+        submission.submission_id,
+        tuple((award.criterion_id, str(award.points_awarded)) for award in submission.scores),
+    )
+
+
+def _unpack(record, trusted_json: bool = False):
+    """Rebuild a submission in the worker; raises ValueError for invalid or malformed JSON"""
+    if isinstance(record, (str, bytes)):
+        if trusted_json:
+            try:
+                return load_extracted_scores_json(record, trusted=True)
+            except (KeyError, TypeError, InvalidOperation) as e:
+                # Unvalidated loading of a malformed row fails below the pydantic layer
+                raise ValueError(f"Malformed stored ExtractedScores: {type(e).__name__}: {e}") from None
+        try:
+            return ExtractedScores.model_validate_json(record)
+        except ValidationError as e:
+            # Pydantic errors do not pickle back to the parent reliably
+            raise ValueError(f"Invalid ExtractedScores: {e}") from None
+    submission_id, awards = record
+    return _PackedSubmission(
+        submission_id,
+        tuple(_PackedAward(criterion_id, Decimal(points)) for criterion_id, points in awards),
+    )
+
+
+def _init_worker(rubric_json: str, trusted_json: bool) -> None:
+    """Pool initializer: parse and compile the rubric once per worker"""
+    global _worker_rubric, _worker_trusted_json
+    # Validated by the parent before the pool was started
+    _worker_rubric = CompiledRubric(load_rubric_json(rubric_json, trusted=True))
+    _worker_trusted_json = trusted_json
+
+
+def _score_records(
+    compiled: CompiledRubric, start: int, records: list, trusted_json: bool
+) -> List[ScoreResult]:
+    """Score one packed chunk, indexing errors by input position"""
+    submissions = []
+    parse_errors: Dict[int, ScoringError] = {}
+    for offset, record in enumerate(records):
+        try:
+            submissions.append(_unpack(record, trusted_json))
+        except ValueError as e:
+            parse_errors[offset] = ScoringError(start + offset, None, e)
+
+    scored = compute_scores_many(compiled, submissions, collect_errors=True)
+    results: List[ScoreResult] = []
+    for offset in range(len(records)):
+        if offset in parse_errors:
+            results.append(parse_errors[offset])
+            continue
+        result = next(scored)
+        if isinstance(result, ScoringError):
+            result = result._replace(index=start + offset)
+        results.append(result)
+    return results
+
+
+def _score_chunk(job: Tuple[int, list]) -> List[ScoreResult]:
+    """Worker task: score one (start index, packed chunk) job"""
+    start, records = job
+    return _score_records(_worker_rubric, start, records, _worker_trusted_json)
+
+
+def _chunks(submissions: Iterable[Submission], chunk_size: int) -> Iterator[Tuple[int, list]]:
+    """Yield (start index, packed chunk) pairs of at most chunk_size submissions"""
+    iterator = iter(submissions)
+    start = 0
+    while True:
+        chunk = [_pack(submission) for submission in islice(iterator, chunk_size)]
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def regrade_parallel(
+    rubric: RubricLike,
+    submissions: Iterable[Submission],
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    collect_errors: bool = False,
+    trusted_json: bool = False,
+) -> List[ScoreResult]:
+    """
+    Recompute scores for many submissions across a process pool.
+
+    Args:
+        rubric: Updated grading rubric (or CompiledRubric)
+        submissions: ExtractedScores or raw extracted_scores JSON, in output order
+        workers: Worker processes (default: CPU count); 1 scores in-process
+        chunk_size: Submissions sent to a worker per task
+        collect_errors: If True, return a ScoringError in place of each
+            submission that fails validation instead of raising
+        trusted_json: Parse raw JSON without Pydantic validation; only for
+            extracted_scores we stored ourselves, never raw LLM output
+
+    Returns:
+        compute_scores() result dicts (or ScoringError entries), in input order
+
+    Raises:
+        ValueError: If the rubric is invalid, or for the first invalid
+            submission (in input order) when collect_errors is False
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    compiled = compile_rubric(_as_compiled(rubric).rubric)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        chunks = (
+            _score_records(compiled, start, records, trusted_json)
+            for start, records in _chunks(submissions, chunk_size)
+        )
+        return _merge(chunks, collect_errors)
+
+    rubric = compiled.rubric
+    if isinstance(rubric, TrustedRubric):
+        rubric = rubric.to_model()
+    rubric_json = rubric.model_dump_json()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(rubric_json, trusted_json)
+    ) as executor:
+        try:
+            return _merge(executor.map(_score_chunk, _chunks(submissions, chunk_size)), collect_errors)
+        except ValueError:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+
+def _merge(chunks: Iterable[List[ScoreResult]], collect_errors: bool) -> List[ScoreResult]:
+    """Concatenate chunk results in order, raising the first error unless collecting"""
+    results: List[ScoreResult] = []
+    for chunk_results in chunks:
+        if not collect_errors:
+            for result in chunk_results:
+                if isinstance(result, ScoringError):
+                    raise result.error
+        results.extend(chunk_results)
+    return results
@@ -0,0 +1,198 @@
+"""
+Content-Addressed Score Cache
+
+Memoizes compute_scores for retried and re-run grading jobs. Keys are a
+SHA-256 over the calculator version, the score-relevant parts of the rubric
+(criteria ids/max points/weights, scale, rounding, schema_version) and the
+awards sorted by criterion id, so identical (rubric, awards) pairs hit
+regardless of submission id, titles, level descriptors or award order.
+
+An in-memory LRU bounded by entry count sits in front of an optional SQLite
+tier that survives restarts, capped at max_disk_entries rows (the oldest
+writes are pruned first). Because CALCULATOR_VERSION is part of every key
+and rows from other versions are purged when the database is opened, a
+calculator change never serves stale scores.
+
+Only successful results are cached; invalid submissions re-raise each time.
+Like CompiledRubric, the cache assumes a rubric object is not mutated after
+it has been scored against.
+"""
+
+import hashlib
+import json
+import sqlite3
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+from calculator import CALCULATOR_VERSION, RubricLike, _as_compiled, compute_scores
+from models import ExtractedScores
+
+
+DEFAULT_MAX_ENTRIES = 100_000
+DEFAULT_MAX_DISK_ENTRIES = 1_000_000
+# Rubric fingerprints remembered per rubric object, so hashing the rubric is
+# paid once per rubric rather than once per submission
+_FINGERPRINT_SLOTS = 64
+
+
+def rubric_fingerprint(rubric: RubricLike) -> str:
+    """Hash of everything in a rubric that can change computed scores"""
+    compiled = _as_compiled(rubric)
+    rounding = compiled.rubric.scale.rounding
+    parts = [
+        compiled.rubric.schema_version,
+        [[cid, str(m), str(w)] for cid, m, w in zip(compiled.criterion_ids, compiled.max_points, compiled.weights)],
+        compiled.scale_mode,
+        None if compiled.total_points is None else str(compiled.total_points),
+        rounding.mode,
+        rounding.decimals,
+    ]
+    if compiled.section_ids:
+        # Section layout only changes the subtotals; flat rubrics keep their keys
+        parts.append([
+            [[sid, parent, str(w)] for sid, parent, w in
+             zip(compiled.section_ids, compiled.section_parents, compiled.section_weights)],
+            list(compiled.criterion_sections),
+            [str(w) for w in compiled.local_weights],
+        ])
+    canonical = json.dumps(parts, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _copy_result(result: Dict) -> Dict:
+    """Copy of a compute_scores result, including its per-section dicts"""
+    copied = dict(result)
+    sections = copied.get("sections")
+    if sections is not None:
+        copied["sections"] = {section_id: dict(scores) for section_id, scores in sections.items()}
+    return copied
+
+
+def score_key(fingerprint: str, extracted: ExtractedScores) -> str:
+    """Cache key for one submission's awards under a fingerprinted rubric"""
+    # Later duplicates win, as in compute_scores, before sorting
+    points_by_id = {score.criterion_id: str(score.points_awarded) for score in extracted.scores}
+    awards = sorted(points_by_id.items())
+    payload = json.dumps([CALCULATOR_VERSION, fingerprint, awards], separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ScoreCache:
+    """
+    LRU memo for compute_scores with an optional persistent SQLite tier.
+
+    Args:
+        max_entries: In-memory entries kept before least-recently-used eviction
+        path: SQLite database file for the on-disk tier (None for memory only)
+        max_disk_entries: Rows kept on disk; older writes are pruned first
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, path: Optional[Union[str, Path]] = None,
+                 max_disk_entries: int = DEFAULT_MAX_DISK_ENTRIES):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if max_disk_entries < 1:
+            raise ValueError("max_disk_entries must be at least 1")
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        self._fingerprints: "OrderedDict[int, Tuple[RubricLike, str]]" = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if path is not None:
+            self._db = sqlite3.connect(str(path))
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS score_cache ("
+                " key TEXT PRIMARY KEY,"
+                " calculator_version TEXT NOT NULL,"
+                " result TEXT NOT NULL)"
+            )
+            # Rows from another calculator version can never be hit again
+            self._db.execute("DELETE FROM score_cache WHERE calculator_version != ?", (CALCULATOR_VERSION,))
+            self._db.commit()
+
+    def _fingerprint(self, rubric: RubricLike) -> str:
+        entry = self._fingerprints.get(id(rubric))
+        # Holding the rubric keeps its id from being reused while remembered
+        if entry is not None and entry[0] is rubric:
+            self._fingerprints.move_to_end(id(rubric))
+            return entry[1]
+        fingerprint = rubric_fingerprint(rubric)
+        self._fingerprints[id(rubric)] = (rubric, fingerprint)
+        if len(self._fingerprints) > _FINGERPRINT_SLOTS:
+            self._fingerprints.popitem(last=False)
+        return fingerprint
+
+    def _remember(self, key: str, result: Dict[str, str]) -> None:
+        self._memory[key] = result
+        if len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def compute(self, rubric: RubricLike, extracted: ExtractedScores) -> Dict[str, str]:
+        """
+        compute_scores(rubric, extracted), served from the cache when possible.
+
+        Raises:
+            ValueError: If validation fails (failures are not cached)
+        """
+        key = score_key(self._fingerprint(rubric), extracted)
+
+        result = self._memory.get(key)
+        if result is not None:
+            self.hits += 1
+            self._memory.move_to_end(key)
+            return _copy_result(result)
+
+        if self._db is not None:
+            row = self._db.execute("SELECT result FROM score_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.disk_hits += 1
+                result = json.loads(row[0])
+                self._remember(key, result)
+                return _copy_result(result)
+
+        self.misses += 1
+        result = compute_scores(rubric, extracted)
+        self._remember(key, _copy_result(result))
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO score_cache (key, calculator_version, result) VALUES (?, ?, ?)",
+                (key, CALCULATOR_VERSION, json.dumps(result)),
+            )
+            # Rowids grow with each write, so this keeps the newest max_disk_entries rows
+            self._db.execute(
+                "DELETE FROM score_cache WHERE rowid <= (SELECT MAX(rowid) FROM score_cache) - ?",
+                (self.max_disk_entries,),
+            )
+            self._db.commit()
+        return result
+
+    def clear(self) -> None:
+        """Drop every cached result, in memory and on disk"""
+        self._memory.clear()
+        if self._db is not None:
+            self._db.execute("DELETE FROM score_cache")
+            self._db.commit()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for monitoring"""
+        return {
+            "entries": len(self._memory),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
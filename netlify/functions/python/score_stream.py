@@ -0,0 +1,129 @@
+"""
+Streaming NDJSON Scoring Pipeline
+
+Scores an NDJSON stream of ExtractedScores records against one rubric with
+constant memory: each line is validated, scored and written before the next
+one is read.
+
+Usage:
+    python -m score_stream rubric.json [scores.ndjson] [--errors errors.ndjson]
+
+Reads records from the file (or stdin when omitted or "-") and writes one
+ComputedScores JSON line per valid record to stdout, tagged with its
+submission_id. Records that fail validation or scoring are written to the
+error channel (stderr by default) as {"line", "submission_id", "error"}.
+
+Exit codes: 0 all records scored, 1 some records failed, 2 invalid rubric.
+"""
+
+import argparse
+import json
+import sys
+from typing import IO, Iterable, Optional, Sequence, Tuple, Union
+
+from pydantic import ValidationError
+from calculator import CompiledRubric, compile_rubric, compute_scores
+from models import Rubric, ExtractedScores
+
+
+def _submission_id_hint(line: Union[str, bytes]) -> Optional[str]:
+    """Best-effort submission_id from a record that failed validation"""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if isinstance(record, dict) and isinstance(record.get("submission_id"), str):
+        return record["submission_id"]
+    return None
+
+
+def _validation_message(error: ValidationError) -> str:
+    """One-line summary of a Pydantic validation error"""
+    details = "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()
+    )
+    return f"Invalid ExtractedScores: {details}"
+
+
+def score_stream(
+    compiled: CompiledRubric,
+    lines: Iterable[Union[str, bytes]],
+    out: IO[str],
+    errors: IO[str],
+) -> Tuple[int, int]:
+    """
+    Score NDJSON ExtractedScores records one at a time.
+
+    Args:
+        compiled: Compiled rubric shared by every record
+        lines: NDJSON lines (str or bytes); blank lines are skipped
+        out: Receives one ComputedScores JSON line per scored record
+        errors: Receives one error JSON line per failed record
+
+    Returns:
+        (scored, failed) record counts
+    """
+    scored = 0
+    failed = 0
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+
+        submission_id = None
+        try:
+            extracted = ExtractedScores.model_validate_json(line)
+            submission_id = extracted.submission_id
+            result = compute_scores(compiled, extracted)
+        except ValidationError as e:
+            error = {
+                "line": line_number,
+                "submission_id": _submission_id_hint(line),
+                "error": _validation_message(e),
+            }
+        except ValueError as e:
+            error = {"line": line_number, "submission_id": submission_id, "error": str(e)}
+        else:
+            out.write(json.dumps({"submission_id": submission_id, **result}) + "\n")
+            scored += 1
+            continue
+
+        errors.write(json.dumps(error) + "\n")
+        failed += 1
+
+    return scored, failed
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command-line entry point; returns the process exit code"""
+    parser = argparse.ArgumentParser(
+        prog="python -m score_stream",
+        description="Score an NDJSON stream of ExtractedScores against a rubric.",
+    )
+    parser.add_argument("rubric", help="Path to rubric JSON")
+    parser.add_argument("input", nargs="?", default="-", help="NDJSON records (default: stdin)")
+    parser.add_argument("--errors", default=None, help="Error NDJSON path (default: stderr)")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.rubric, "rb") as f:
+            compiled = compile_rubric(Rubric.model_validate_json(f.read()))
+    except (OSError, ValueError) as e:
+        print(f"Invalid rubric: {e}", file=sys.stderr)
+        return 2
+
+    source = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    errors = sys.stderr if args.errors is None else open(args.errors, "w", encoding="utf-8")
+    try:
+        _, failed = score_stream(compiled, source, sys.stdout, errors)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if errors is not sys.stderr:
+            errors.close()
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,344 @@
+"""
+Local Asyncio Scoring Service
+
+Long-lived HTTP/JSON service around compute_scores and validate_rubric for
+background grading workers on the same host. Compiled rubrics stay warm in
+an LRU keyed by rubric_id plus a content hash, and concurrent /score
+requests for the same rubric are coalesced into micro-batches scored with
+compute_scores_many. Standard library only (asyncio streams, HTTP/1.1).
+
+Endpoints:
+    POST /score     {"rubric": {...}, "extracted": {...}} -> ComputedScores
+    POST /validate  {"rubric": {...}}                     -> {"valid": true, "rubric_key": ...}
+    GET  /metrics   Prometheus text: request latency histograms, batch counters
+    GET  /health    {"status": "ok"}
+
+Usage:
+    python -m scoring_service [--host 127.0.0.1] [--port 8765]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from calculator import CompiledRubric, ScoringError, compile_rubric, compute_scores_many
+from models import Rubric, ExtractedScores
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE = 256
+# How long the first request for a rubric waits for others to join its batch
+DEFAULT_BATCH_WINDOW = 0.002
+DEFAULT_MAX_BATCH = 256
+MAX_BODY_BYTES = 4 * 1024 * 1024
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class LatencyHistogram:
+    """Cumulative Prometheus-style latency histogram"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.sum += seconds
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+
+    def prometheus(self, name: str, labels: str) -> List[str]:
+        lines = [f'{name}_bucket{{{labels},le="{bound}"}} {count}'
+                 for bound, count in zip(self.buckets, self.counts)]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum:.9f}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+def rubric_key(rubric_data: Dict[str, Any]) -> str:
+    """Cache key: rubric_id plus a hash of the canonical rubric JSON"""
+    canonical = json.dumps(rubric_data, sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.sha256(canonical.encode()).hexdigest()[:16]
+    return f"{rubric_data.get('rubric_id', '')}:{digest}"
+
+
+class RubricCache:
+    """LRU of compiled rubrics keyed by rubric_key()"""
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self._compiled: "OrderedDict[str, CompiledRubric]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, rubric_data: Dict[str, Any]) -> Tuple[str, CompiledRubric]:
+        """
+        Compiled rubric for the request payload, compiling on a miss.
+
+        Raises:
+            ValueError: If the rubric is invalid
+        """
+        key = rubric_key(rubric_data)
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            self.hits += 1
+            self._compiled.move_to_end(key)
+            return key, compiled
+
+        self.misses += 1
+        compiled = compile_rubric(Rubric.model_validate(rubric_data))
+        self._compiled[key] = compiled
+        if len(self._compiled) > self.max_size:
+            self._compiled.popitem(last=False)
+        return key, compiled
+
+    def __len__(self) -> int:
+        return len(self._compiled)
+
+
+class ScoringBatcher:
+    """Coalesces concurrent scoring requests that share a compiled rubric"""
+
+    def __init__(self, window: float = DEFAULT_BATCH_WINDOW, max_batch: int = DEFAULT_MAX_BATCH):
+        self.window = window
+        self.max_batch = max_batch
+        # key -> (compiled rubric, queued requests, window timer)
+        self._pending: Dict[
+            str, Tuple[CompiledRubric, List[Tuple[ExtractedScores, asyncio.Future]], asyncio.TimerHandle]
+        ] = {}
+        self.batches = 0
+        self.scored = 0
+
+    async def score(self, key: str, compiled: CompiledRubric, extracted: ExtractedScores) -> Dict[str, str]:
+        """
+        Score one submission as part of the current batch for its rubric.
+
+        Raises:
+            ValueError: If the submission fails validation
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        entry = self._pending.get(key)
+        if entry is None:
+            entry = (compiled, [], loop.call_later(self.window, self._flush, key))
+            self._pending[key] = entry
+        entry[1].append((extracted, future))
+        if len(entry[1]) >= self.max_batch:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: str) -> None:
+        entry = self._pending.pop(key, None)
+        if entry is None:
+            return
+        compiled, requests, timer = entry
+        # A batch flushed early at max_batch must not cut the next one's window short
+        timer.cancel()
+        self.batches += 1
+        self.scored += len(requests)
+        try:
+            results = compute_scores_many(compiled, [extracted for extracted, _ in requests], collect_errors=True)
+            for (_, future), result in zip(requests, results):
+                if future.done():
+                    continue
+                if isinstance(result, ScoringError):
+                    future.set_exception(result.error)
+                else:
+                    future.set_result(result)
+        except Exception as e:
+            # Runs from a loop callback: an unresolved future would hang its client forever
+            for _, future in requests:
+                if not future.done():
+                    future.set_exception(e)
+
+
+class ScoringService:
+    """Request routing, warm rubric cache, batching and metrics"""
+
+    def __init__(self, cache_size: int = DEFAULT_CACHE_SIZE,
+                 batch_window: float = DEFAULT_BATCH_WINDOW, max_batch: int = DEFAULT_MAX_BATCH):
+        self.cache = RubricCache(cache_size)
+        self.batcher = ScoringBatcher(batch_window, max_batch)
+        self.latency: Dict[Tuple[str, int], LatencyHistogram] = {}
+        self._routes = {
+            "/score": ("POST", self._score),
+            "/validate": ("POST", self._validate),
+            "/metrics": ("GET", self._metrics),
+            "/health": ("GET", self._health),
+        }
+
+    async def handle(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        """Route one request; returns (status, JSON payload or text)"""
+        started = time.perf_counter()
+        status, payload = await self._dispatch(method, path, body)
+        # Unknown paths share one label so client-chosen paths cannot grow the metrics
+        label = path if path in self._routes else "other"
+        histogram = self.latency.setdefault((label, status), LatencyHistogram())
+        histogram.observe(time.perf_counter() - started)
+        return status, payload
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        route = self._routes.get(path)
+        if route is None:
+            return 404, {"error": f"Unknown path {path}"}
+        if method != route[0]:
+            return 405, {"error": f"{path} requires {route[0]}"}
+        try:
+            return await route[1](body)
+        except ValueError as e:
+            return 400, {"error": str(e)}
+
+    @staticmethod
+    def _payload(body: bytes, *fields: str) -> Dict[str, Any]:
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            raise ValueError("Request body must be JSON") from None
+        if not isinstance(payload, dict) or any(not isinstance(payload.get(f), dict) for f in fields):
+            raise ValueError(f"Request body must be an object with {', '.join(fields)}")
+        return payload
+
+    async def _score(self, body: bytes) -> Tuple[int, Any]:
+        payload = self._payload(body, "rubric", "extracted")
+        key, compiled = self.cache.get(payload["rubric"])
+        try:
+            extracted = ExtractedScores.model_validate(payload["extracted"])
+        except ValidationError as e:
+            raise ValueError(f"Invalid ExtractedScores: {e}") from None
+        result = await self.batcher.score(key, compiled, extracted)
+        return 200, dict(result, submission_id=extracted.submission_id, rubric_key=key)
+
+    async def _validate(self, body: bytes) -> Tuple[int, Any]:
+        payload = self._payload(body, "rubric")
+        key, _ = self.cache.get(payload["rubric"])
+        return 200, {"valid": True, "rubric_key": key}
+
+    async def _health(self, body: bytes) -> Tuple[int, Any]:
+        return 200, {"status": "ok", "cached_rubrics": len(self.cache)}
+
+    async def _metrics(self, body: bytes) -> Tuple[int, Any]:
+        return 200, self.prometheus()
+
+    def prometheus(self) -> str:
+        lines = [
+            "# HELP scoring_service_request_seconds Request latency",
+            "# TYPE scoring_service_request_seconds histogram",
+        ]
+        for (path, status), histogram in sorted(self.latency.items()):
+            lines += histogram.prometheus("scoring_service_request_seconds",
+                                          f'path="{path}",status="{status}"')
+        lines += [
+            "# TYPE scoring_service_batches_total counter",
+            f"scoring_service_batches_total {self.batcher.batches}",
+            "# TYPE scoring_service_scored_total counter",
+            f"scoring_service_scored_total {self.batcher.scored}",
+            "# TYPE scoring_service_rubric_cache_hits_total counter",
+            f"scoring_service_rubric_cache_hits_total {self.cache.hits}",
+            "# TYPE scoring_service_rubric_cache_misses_total counter",
+            f"scoring_service_rubric_cache_misses_total {self.cache.misses}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve HTTP/1.1 requests (with keep-alive) on one connection"""
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                if body is None:
+                    status, payload = 413, {"error": "Request body too large"}
+                else:
+                    try:
+                        status, payload = await self.handle(method, path, body)
+                    except Exception as e:  # keep the service up; report the failure
+                        status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                keep_alive = headers.get("connection", "").lower() != "close" and body is not None
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        """Start listening; the caller owns the returned server"""
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], Optional[bytes]]]:
+    """Read one request; None at EOF, body None when it exceeds MAX_BODY_BYTES"""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0"))
+    if length > MAX_BODY_BYTES:
+        return method, target.split("?", 1)[0], headers, None
+    body = await reader.readexactly(length) if length else b""
+    return method, target.split("?", 1)[0], headers, body
+
+
+def _response(status: int, payload: Any, keep_alive: bool) -> bytes:
+    if isinstance(payload, str):
+        body, content_type = payload.encode(), "text/plain; version=0.0.4"
+    else:
+        body, content_type = json.dumps(payload).encode(), "application/json"
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, 'Unknown')}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode() + body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local scoring service")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--batch-window", type=float, default=DEFAULT_BATCH_WINDOW,
+                        help="Seconds to wait for requests to coalesce (default 0.002)")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE)
+    args = parser.parse_args()
+
+    async def run() -> None:
+        service = ScoringService(args.cache_size, args.batch_window, args.max_batch)
+        server = await service.serve(args.host, args.port)
+        print(f"Scoring service listening on http://{args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,522 @@
+"""
+Sharded Recompute with Merge Manifests
+
+District-scale recomputes split into shard files that any number of
+independent workers (processes or hosts sharing a directory) score with
+compute_scores, followed by a deterministic merge:
+
+1. split_job() hash-partitions submissions by submission_id into
+   input/shard-NNNNN.jsonl and records the rubric, shard count and each
+   input shard's SHA-256 in job.json.
+2. run_worker() claims unfinished shards with an O_EXCL lock file, scores
+   them, and publishes results/shard-NNNNN.jsonl plus a manifest with the
+   row count and the input and result checksums. Results are written to a
+   .partial file first; an interrupted shard resumes after its last
+   complete row, and shards with a valid manifest are never redone. Locks
+   of dead local processes, or older than stale_after seconds without a
+   heartbeat, are taken over. Each lock carries its owner's token: a worker
+   whose lock was taken over stops at its next heartbeat and never touches
+   or removes the new owner's lock.
+3. merge_job() verifies every manifest against job.json and the files on
+   disk, then k-way merges the shards back into input order, so the output
+   is byte-identical for any shard count, worker count or interruption.
+
+Usage:
+    python -m sharded_recompute split JOB_DIR rubric.json submissions.jsonl --shards 64
+    python -m sharded_recompute work JOB_DIR [--worker NAME]
+    python -m sharded_recompute merge JOB_DIR merged.jsonl
+    python -m sharded_recompute status JOB_DIR
+"""
+
+import argparse
+import hashlib
+import heapq
+import json
+import os
+import socket
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+from calculator import CALCULATOR_VERSION, CompiledRubric, compile_rubric, compute_scores
+from models import ExtractedScores, Rubric, load_rubric_json, parse_extracted_scores_json
+
+
+FORMAT_VERSION = 1
+JOB_FILE = "job.json"
+# Rows between lock heartbeats and partial-file flushes
+HEARTBEAT_ROWS = 500
+DEFAULT_STALE_AFTER = 600.0
+
+Submission = Union[ExtractedScores, str, bytes]
+
+
+class IncompleteJobError(ValueError):
+    """Raised by merge_job when shards are missing or fail verification"""
+
+    def __init__(self, problems: List[str]):
+        self.problems = problems
+        super().__init__(f"Job is incomplete: {'; '.join(problems)}")
+
+
+class LockLostError(RuntimeError):
+    """Raised by run_shard when another worker has taken over the shard's lock"""
+
+
+class MergeSummary(NamedTuple):
+    rows: int
+    errors: int
+    sha256: str
+
+
+def _shard_name(shard: int) -> str:
+    return f"shard-{shard:05d}"
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_json_atomic(path: Path, data: Dict) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def shard_for(submission_id: str, shards: int) -> int:
+    """Stable shard of a submission id (independent of input order and host)"""
+    return int.from_bytes(hashlib.sha256(submission_id.encode()).digest()[:8], "big") % shards
+
+
+def _as_record(index: int, submission: Submission) -> List:
+    """[index, submission_id, extracted_scores JSON text] for a shard file"""
+    if isinstance(submission, (str, bytes)):
+        text = submission.decode() if isinstance(submission, bytes) else submission
+        try:
+            submission_id = json.loads(text).get("submission_id")
+        except (ValueError, AttributeError):
+            submission_id = None
+        if not isinstance(submission_id, str):
+            # Unparseable rows still get scored (and fail) on a stable shard
+            submission_id = f"#{index}"
+        return [index, submission_id, text]
+    return [index, submission.submission_id, submission.model_dump_json()]
+
+
+def split_job(job_dir: Union[str, Path], rubric: Rubric, submissions: Iterable[Submission], shards: int) -> Dict:
+    """
+    Hash-partition submissions into shard files and write job.json.
+
+    Returns:
+        The job description written to job.json
+
+    Raises:
+        ValueError: If the rubric is invalid, shards < 1, or job_dir already holds a job
+    """
+    if shards < 1:
+        raise ValueError("shards must be at least 1")
+    compile_rubric(rubric)
+    job_dir = Path(job_dir)
+    if (job_dir / JOB_FILE).exists():
+        raise ValueError(f"{job_dir} already contains a job")
+    for sub in ("input", "results", "locks"):
+        (job_dir / sub).mkdir(parents=True, exist_ok=True)
+
+    files = [open(job_dir / "input" / f"{_shard_name(n)}.jsonl", "w") for n in range(shards)]
+    digests = [hashlib.sha256() for _ in range(shards)]
+    counts = [0] * shards
+    total = 0
+    try:
+        for index, submission in enumerate(submissions):
+            record = _as_record(index, submission)
+            shard = shard_for(record[1], shards)
+            line = json.dumps(record, separators=(",", ":")) + "\n"
+            files[shard].write(line)
+            digests[shard].update(line.encode())
+            counts[shard] += 1
+            total = index + 1
+    finally:
+        for f in files:
+            f.close()
+
+    job = {
+        "format_version": FORMAT_VERSION,
+        "calculator_version": CALCULATOR_VERSION,
+        "rubric_json": rubric.model_dump_json(),
+        "rows": total,
+        "shards": [{"rows": counts[n], "sha256": digests[n].hexdigest()} for n in range(shards)],
+    }
+    _write_json_atomic(job_dir / JOB_FILE, job)
+    return job
+
+
+def load_job(job_dir: Union[str, Path]) -> Dict:
+    job = json.loads((Path(job_dir) / JOB_FILE).read_text())
+    if job.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported job format {job.get('format_version')!r}")
+    return job
+
+
+def _manifest_problem(job_dir: Path, job: Dict, shard: int) -> Optional[str]:
+    """Why a shard's published result cannot be trusted (None if it can)"""
+    name = _shard_name(shard)
+    manifest_path = job_dir / "results" / f"{name}.manifest.json"
+    result_path = job_dir / "results" / f"{name}.jsonl"
+    if not manifest_path.exists():
+        return f"{name}: no manifest"
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except ValueError:
+        return f"{name}: unreadable manifest"
+    expected = job["shards"][shard]
+    if manifest.get("calculator_version") != job["calculator_version"]:
+        return f"{name}: calculator version {manifest.get('calculator_version')!r}"
+    if manifest.get("input_sha256") != expected["sha256"] or manifest.get("rows") != expected["rows"]:
+        return f"{name}: manifest does not match the input shard"
+    if not result_path.exists() or _sha256_file(result_path) != manifest.get("sha256"):
+        return f"{name}: result checksum mismatch"
+    return None
+
+
+# Locks
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _stale_lock(lock_path: Path, stale_after: float) -> Optional[bytes]:
+    """The lock's contents if it is stale, else None"""
+    try:
+        contents = lock_path.read_bytes()
+        age = time.time() - lock_path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    try:
+        owner = json.loads(contents)
+    except ValueError:
+        # Half-written lock: stale once it stops being touched
+        return contents if age > stale_after else None
+    if age > stale_after:
+        return contents
+    if owner.get("host") == socket.gethostname() and not _pid_alive(owner.get("pid", -1)):
+        return contents
+    return None
+
+
+def _try_lock(lock_path: Path, worker: str, stale_after: float) -> Optional[str]:
+    """
+    Claim a shard; takes over stale locks (only one contender can win).
+
+    Returns:
+        The owner token written into the lock, or None if not claimed
+    """
+    token = uuid.uuid4().hex
+    for _ in range(2):
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            stale = _stale_lock(lock_path, stale_after)
+            if stale is None:
+                return None
+            moved = lock_path.with_name(f"{lock_path.name}.stale-{worker}-{os.getpid()}")
+            try:
+                # rename is atomic: a single stealer moves the lock away
+                os.replace(lock_path, moved)
+            except FileNotFoundError:
+                return None
+            if moved.read_bytes() != stale:
+                # Another worker replaced the stale lock after it was checked:
+                # hand its lock back (never over a newer one) and back off
+                try:
+                    os.link(moved, lock_path)
+                except FileExistsError:
+                    pass
+                moved.unlink()
+                return None
+            continue
+        with os.fdopen(fd, "w") as f:
+            json.dump({"worker": worker, "host": socket.gethostname(), "pid": os.getpid(),
+                       "started": time.time(), "token": token}, f)
+        return token
+    return None
+
+
+def _owns_lock(lock_path: Path, token: str) -> bool:
+    try:
+        owner = json.loads(lock_path.read_text())
+    except (FileNotFoundError, ValueError):
+        # Gone, or a new owner is still writing it
+        return False
+    return isinstance(owner, dict) and owner.get("token") == token
+
+
+def _heartbeat(lock_path: Path, token: Optional[str]) -> None:
+    """Touch the shard's lock; raises LockLostError once it belongs to someone else"""
+    if token is not None and not _owns_lock(lock_path, token):
+        raise LockLostError(f"{lock_path.stem}: lock was taken over by another worker")
+    try:
+        os.utime(lock_path)
+    except FileNotFoundError:
+        if token is not None:
+            raise LockLostError(f"{lock_path.stem}: lock was removed") from None
+
+
+def _release_lock(lock_path: Path, token: str) -> None:
+    """Remove a lock only if it still carries this owner's token"""
+    if _owns_lock(lock_path, token):
+        lock_path.unlink(missing_ok=True)
+
+
+# Scoring
+
+def _score_line(compiled: CompiledRubric, line: str) -> str:
+    index, submission_id, text = json.loads(line)
+    try:
+        result, error = compute_scores(compiled, parse_extracted_scores_json(text)), None
+    except ValueError as e:
+        result, error = None, str(e)
+    return json.dumps([index, submission_id, result, error], separators=(",", ":")) + "\n"
+
+
+def _resume_point(partial_path: Path, input_lines: List[str]) -> int:
+    """Complete rows already in a partial result file; truncates any torn tail"""
+    if not partial_path.exists():
+        return 0
+    done = 0
+    keep = 0
+    with open(partial_path, "rb") as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            try:
+                index = json.loads(raw)[0]
+            except (ValueError, IndexError, KeyError, TypeError):
+                break
+            if done >= len(input_lines) or index != json.loads(input_lines[done])[0]:
+                break
+            done += 1
+            keep += len(raw)
+    with open(partial_path, "r+b") as f:
+        f.truncate(keep)
+    return done
+
+
+def run_shard(job_dir: Union[str, Path], shard: int, worker: str = "local",
+              job: Optional[Dict] = None, compiled: Optional[CompiledRubric] = None,
+              token: Optional[str] = None) -> int:
+    """
+    Score one claimed shard, resuming its partial output, and publish it.
+
+    The caller must hold the shard's lock (run_worker does this). With the
+    lock's token, ownership is rechecked at every heartbeat and before
+    publishing.
+
+    Returns:
+        Rows scored by this call (0 if the shard was already complete)
+
+    Raises:
+        LockLostError: If another worker took the lock over; nothing is published
+    """
+    job_dir = Path(job_dir)
+    job = job or load_job(job_dir)
+    name = _shard_name(shard)
+    if _manifest_problem(job_dir, job, shard) is None:
+        return 0
+    if compiled is None:
+        compiled = compile_rubric(load_rubric_json(job["rubric_json"]))
+
+    input_path = job_dir / "input" / f"{name}.jsonl"
+    if _sha256_file(input_path) != job["shards"][shard]["sha256"]:
+        raise ValueError(f"{name}: input checksum mismatch")
+    input_lines = input_path.read_text().splitlines()
+    partial_path = job_dir / "results" / f"{name}.jsonl.partial"
+    result_path = job_dir / "results" / f"{name}.jsonl"
+    lock_path = job_dir / "locks" / f"{name}.lock"
+    if result_path.exists() and not partial_path.exists():
+        # Interrupted between publishing the result and its manifest
+        os.replace(result_path, partial_path)
+    start = _resume_point(partial_path, input_lines)
+
+    scored = 0
+    while start < len(input_lines):
+        with open(partial_path, "a") as out:
+            for count, line in enumerate(input_lines[start:], 1):
+                out.write(_score_line(compiled, line))
+                if count % HEARTBEAT_ROWS == 0:
+                    out.flush()
+                    _heartbeat(lock_path, token)
+            out.flush()
+            os.fsync(out.fileno())
+        scored += len(input_lines) - start
+        # Rows a previous owner appended before noticing it lost the lock are cut off and redone
+        start = _resume_point(partial_path, input_lines)
+
+    _heartbeat(lock_path, token)
+    os.replace(partial_path, result_path)
+    _write_json_atomic(job_dir / "results" / f"{name}.manifest.json", {
+        "shard": shard,
+        "rows": len(input_lines),
+        "input_sha256": job["shards"][shard]["sha256"],
+        "sha256": _sha256_file(result_path),
+        "calculator_version": CALCULATOR_VERSION,
+        "worker": worker,
+        "host": socket.gethostname(),
+    })
+    return scored
+
+
+def run_worker(job_dir: Union[str, Path], worker: Optional[str] = None,
+               stale_after: float = DEFAULT_STALE_AFTER) -> List[int]:
+    """
+    Claim and score unfinished shards until none are left to claim.
+
+    Returns:
+        Shards this worker completed
+    """
+    job_dir = Path(job_dir)
+    job = load_job(job_dir)
+    if job["calculator_version"] != CALCULATOR_VERSION:
+        raise ValueError(f"Job was split for calculator version {job['calculator_version']!r}")
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+    compiled = compile_rubric(load_rubric_json(job["rubric_json"]))
+
+    completed = []
+    for shard in range(len(job["shards"])):
+        if _manifest_problem(job_dir, job, shard) is None:
+            continue
+        lock_path = job_dir / "locks" / f"{_shard_name(shard)}.lock"
+        token = _try_lock(lock_path, worker, stale_after)
+        if token is None:
+            continue
+        try:
+            run_shard(job_dir, shard, worker, job, compiled, token)
+            completed.append(shard)
+        except LockLostError:
+            # The new owner finishes the shard
+            continue
+        finally:
+            _release_lock(lock_path, token)
+    return completed
+
+
+def job_status(job_dir: Union[str, Path]) -> Dict[str, List[int]]:
+    """Shards grouped as complete, running (locked) or pending"""
+    job_dir = Path(job_dir)
+    job = load_job(job_dir)
+    status: Dict[str, List[int]] = {"complete": [], "running": [], "pending": []}
+    for shard in range(len(job["shards"])):
+        name = _shard_name(shard)
+        if _manifest_problem(job_dir, job, shard) is None:
+            status["complete"].append(shard)
+        elif (job_dir / "locks" / f"{name}.lock").exists():
+            status["running"].append(shard)
+        else:
+            status["pending"].append(shard)
+    return status
+
+
+def _result_rows(path: Path) -> Iterator[List]:
+    with open(path) as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def merge_job(job_dir: Union[str, Path], output: Union[str, Path]) -> MergeSummary:
+    """
+    Verify every shard and write all results in input order.
+
+    Output lines are {"submission_id", "computed_scores"} or
+    {"submission_id", "error"}.
+
+    Raises:
+        IncompleteJobError: If any shard is missing, stale or corrupt, or
+            rows are missing or duplicated
+    """
+    job_dir = Path(job_dir)
+    job = load_job(job_dir)
+    problems = [p for p in (_manifest_problem(job_dir, job, n) for n in range(len(job["shards"]))) if p]
+    if problems:
+        raise IncompleteJobError(problems)
+
+    paths = [job_dir / "results" / f"{_shard_name(n)}.jsonl" for n in range(len(job["shards"]))]
+    digest = hashlib.sha256()
+    rows = errors = 0
+    tmp = Path(f"{output}.tmp")
+    with open(tmp, "w") as out:
+        for index, submission_id, result, error in heapq.merge(*map(_result_rows, paths), key=lambda row: row[0]):
+            if index != rows:
+                out.close()
+                tmp.unlink()
+                raise IncompleteJobError([f"row {rows} missing or duplicated (found {index})"])
+            record = {"submission_id": submission_id}
+            if error is None:
+                record["computed_scores"] = result
+            else:
+                record["error"] = error
+                errors += 1
+            line = json.dumps(record, separators=(",", ":")) + "\n"
+            out.write(line)
+            digest.update(line.encode())
+            rows += 1
+    if rows != job["rows"]:
+        tmp.unlink()
+        raise IncompleteJobError([f"merged {rows} rows, expected {job['rows']}"])
+    os.replace(tmp, output)
+    return MergeSummary(rows, errors, digest.hexdigest())
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Sharded recompute with checksummed merge")
+    commands = parser.add_subparsers(dest="command", required=True)
+    split = commands.add_parser("split", help="Partition submissions into shards")
+    split.add_argument("job_dir")
+    split.add_argument("rubric", help="Rubric JSON file")
+    split.add_argument("submissions", help="JSONL of extracted_scores")
+    split.add_argument("--shards", type=int, default=16)
+    work = commands.add_parser("work", help="Score unfinished shards")
+    work.add_argument("job_dir")
+    work.add_argument("--worker")
+    work.add_argument("--stale-after", type=float, default=DEFAULT_STALE_AFTER)
+    merge = commands.add_parser("merge", help="Verify and merge results")
+    merge.add_argument("job_dir")
+    merge.add_argument("output")
+    status = commands.add_parser("status", help="Show shard progress")
+    status.add_argument("job_dir")
+    args = parser.parse_args(argv)
+
+    if args.command == "split":
+        rubric = load_rubric_json(Path(args.rubric).read_text())
+        with open(args.submissions) as f:
+            job = split_job(args.job_dir, rubric, (line.rstrip("\n") for line in f if line.strip()), args.shards)
+        print(json.dumps({"rows": job["rows"], "shards": len(job["shards"])}))
+    elif args.command == "work":
+        print(json.dumps({"completed": run_worker(args.job_dir, args.worker, args.stale_after)}))
+    elif args.command == "merge":
+        try:
+            summary = merge_job(args.job_dir, args.output)
+        except IncompleteJobError as e:
+            print(str(e), file=sys.stderr)
+            return 1
+        print(json.dumps(summary._asdict()))
+    else:
+        print(json.dumps(job_status(args.job_dir)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
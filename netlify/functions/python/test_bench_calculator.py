@@ -0,0 +1,56 @@
+"""
+Smoke tests for the calculator benchmark suite
+"""
+
+import json
+import pytest
+from bench_calculator import BenchResult, compare_to_baseline, main, run_suite, to_json
+
+
+def _result(ops_per_sec, criteria=4):
+    return BenchResult("compute_scores", {"criteria": criteria, "submissions": 10},
+                       10, 0.1, ops_per_sec, 1.0)
+
+
+def test_run_suite_covers_every_benchmark():
+    """Test a tiny grid produces each benchmark and mode combination"""
+    results = run_suite([2], [3])
+
+    names = {r.name for r in results}
+    assert names == {"sum_awarded_points", "parse_extracted_scores", "compute_scores",
+                     "parse_rubric", "validate_rubric"}
+    assert len([r for r in results if r.name == "compute_scores"]) == 6
+    assert all(r.ops_per_sec > 0 and r.peak_kib >= 0 for r in results)
+
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    """Test regressions are flagged relative to the baseline"""
+    baseline = to_json([_result(1000, criteria=4), _result(1000, criteria=50)])
+
+    regressions = compare_to_baseline(
+        [_result(850, criteria=4), _result(700, criteria=50), _result(1, criteria=200)],
+        baseline,
+        tolerance=0.2,
+    )
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("compute_scores[criteria=50,submissions=10]")
+    assert "-30.0%" in regressions[0]
+
+
+def test_main_saves_and_compares_baseline(tmp_path):
+    """Test the CLI round-trips a baseline and writes JSON output"""
+    baseline = tmp_path / "baseline.json"
+    output = tmp_path / "results.json"
+    args = ["--criteria", "2", "--submissions", "2", "--filter", "validate_rubric",
+            "--baseline", str(baseline)]
+
+    assert main(args + ["--save-baseline", "--output", str(output)]) == 0
+    assert {r["key"] for r in json.loads(output.read_text())["results"]} == {
+        "validate_rubric[criteria=2,mode=percent]", "validate_rubric[criteria=2,mode=points]"
+    }
+    assert main(args + ["--compare", "--tolerance", "0.99"]) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
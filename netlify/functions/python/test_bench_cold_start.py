@@ -0,0 +1,42 @@
+"""
+Cold-start budget tests
+"""
+
+import calculator
+from bench_cold_start import DEFAULT_BUDGETS_MS, check_budgets, measure
+
+
+def test_calculator_import_within_budget_and_without_pydantic():
+    """Test a fresh 'import calculator' stays under budget and skips Pydantic"""
+    result = measure("import_calculator", repeat=3)
+
+    assert "pydantic" not in result["modules"]
+    assert check_budgets([result], DEFAULT_BUDGETS_MS) == []
+
+
+def test_first_grade_within_budget():
+    """Test import plus the first validated grade stays under budget"""
+    result = measure("first_grade", repeat=1)
+
+    assert check_budgets([result], DEFAULT_BUDGETS_MS) == []
+
+
+def test_check_budgets_reports_failures():
+    """Test over-budget cases and forbidden imports are reported"""
+    results = [
+        {"name": "import_calculator", "median_ms": 150.0, "modules": ["calculator", "pydantic"]},
+        {"name": "import_models", "median_ms": 10.0, "modules": []},
+    ]
+
+    failures = check_budgets(results, DEFAULT_BUDGETS_MS)
+
+    assert failures == [
+        "import_calculator: 150.0 ms exceeds budget 100.0 ms",
+        "import_calculator loads pydantic",
+    ]
+
+
+def test_prewarm_is_repeatable():
+    """Test prewarm runs the full validate-and-score path and can be called again"""
+    assert calculator.prewarm() >= 0
+    assert calculator.prewarm() >= 0
@@ -7,10 +7,16 @@ Tests all edge cases, rounding modes, and validation logic.
 import pytest
 from decimal import Decimal
 from pydantic import ValidationError
-from calculator import compute_scores, validate_rubric, _sum_max_points, _sum_awarded_points
+from calculator import (
+    compute_scores, compute_scores_many, compute_scores_by_level, validate_rubric, compile_rubric,
+    CompiledRubric, IncrementalScorer, ScoringError,
+    _sum_max_points, _sum_awarded_points
+)
+import calculator
 from models import (
-    Rubric, Criterion, Level, Scale, Rounding,
-    ExtractedScores, Award
+    Rubric, Criterion, Level, Scale, Rounding, Section,
+    ExtractedScores, Award, LevelExtractedScores, LevelAward,
+    ComputedScores, load_rubric_json,
 )
 
 
@@ -387,5 +393,488 @@ def test_validate_rubric_level_exceeds_max():
         validate_rubric(rubric)
 
 
+# Tests: Compiled Rubric
+
+def test_compiled_rubric_precomputes_totals_and_index():
+    """Test compiled rubric holds max points, index and vectors"""
+    rubric = create_simple_rubric(rounding_mode="HALF_EVEN", decimals=1)
+    compiled = compile_rubric(rubric)
+    
+    assert isinstance(compiled, CompiledRubric)
+    assert compiled.max_weighted == _sum_max_points(rubric)
+    assert compiled.criterion_ids == ("org", "evidence", "grammar", "style")
+    assert compiled.index == {"org": 0, "evidence": 1, "grammar": 2, "style": 3}
+    assert compiled.weights == (Decimal("1.0"),) * 4
+    assert compiled.max_points == (Decimal("4.0"),) * 4
+    assert compiled.quantizer == Decimal("0.1")
+
+
+@pytest.mark.parametrize("mode,total_points", [("percent", None), ("points", 50)])
+@pytest.mark.parametrize("rounding_mode", ["HALF_UP", "HALF_EVEN", "HALF_DOWN"])
+def test_compiled_rubric_matches_plain_rubric(mode, total_points, rounding_mode):
+    """Test compute_scores gives identical results for Rubric and CompiledRubric"""
+    rubric = create_simple_rubric(mode=mode, total_points=total_points, rounding_mode=rounding_mode)
+    compiled = compile_rubric(rubric)
+    extracted = create_extracted_scores({
+        "org": ("Proficient", 3.5, "Good"),
+        "evidence": ("Exemplary", 4.0, "Strong"),
+        "grammar": ("Proficient", 2.75, "Some errors"),
+        "style": ("Developing", 1.0, "Needs work"),
+    })
+    
+    assert compute_scores(compiled, extracted) == compute_scores(rubric, extracted)
+
+
+def test_compiled_rubric_still_validates_awards():
+    """Test compiled rubric keeps criterion and range validation"""
+    compiled = compile_rubric(create_simple_rubric())
+    extracted = create_extracted_scores({
+        "org": ("Proficient", 5.0, "Too many"),
+        "evidence": ("Proficient", 3.0, "Good"),
+        "grammar": ("Proficient", 3.0, "Good"),
+        "style": ("Proficient", 3.0, "Good"),
+    })
+    
+    with pytest.raises(ValueError, match="not in range"):
+        compute_scores(compiled, extracted)
+    
+    with pytest.raises(ValueError, match="Missing criteria"):
+        _sum_awarded_points(compiled, create_extracted_scores({"org": ("Proficient", 3.0, "Good")}))
+
+
+def test_compile_rubric_validates():
+    """Test compile_rubric rejects invalid rubrics"""
+    rubric = create_simple_rubric(mode="points", total_points=None)
+    
+    with pytest.raises(ValueError, match="requires scale.total_points"):
+        compile_rubric(rubric)
+
+
+# Tests: Batch Scoring
+
+def _batch_submissions():
+    """Valid, out-of-range and mismatched submissions in a fixed order"""
+    valid = create_extracted_scores({
+        "org": ("Proficient", 3.0, "Good"),
+        "evidence": ("Exemplary", 4.0, "Strong"),
+        "grammar": ("Proficient", 3.0, "Few errors"),
+        "style": ("Developing", 2.0, "Needs work"),
+    })
+    over_max = create_extracted_scores({
+        "org": ("Proficient", 5.0, "Too many"),
+        "evidence": ("Proficient", 3.0, "Good"),
+        "grammar": ("Proficient", 3.0, "Good"),
+        "style": ("Proficient", 3.0, "Good"),
+    })
+    missing = create_extracted_scores({"org": ("Proficient", 3.0, "Good")})
+    return [valid, over_max, missing, valid]
+
+
+def test_compute_scores_many_matches_compute_scores():
+    """Test batch results equal per-submission compute_scores, in order"""
+    rubric = create_simple_rubric(mode="points", total_points=50)
+    submissions = [_batch_submissions()[0]] * 3
+    
+    results = list(compute_scores_many(rubric, iter(submissions)))
+    
+    assert results == [compute_scores(rubric, s) for s in submissions]
+
+
+def test_compute_scores_many_is_lazy():
+    """Test batch scoring returns a generator"""
+    results = compute_scores_many(create_simple_rubric(), _batch_submissions())
+    
+    assert next(results)["percent"] == "75.00"
+
+
+def test_compute_scores_many_raises_on_first_error():
+    """Test batch scoring stops at the first invalid submission by default"""
+    results = compute_scores_many(compile_rubric(create_simple_rubric()), _batch_submissions())
+    
+    assert next(results)["raw_points"] == "12.00"
+    with pytest.raises(ValueError, match="not in range"):
+        next(results)
+
+
+def test_compute_scores_many_collects_errors():
+    """Test collect_errors reports per-submission errors and keeps going"""
+    rubric = create_simple_rubric()
+    
+    results = list(compute_scores_many(rubric, _batch_submissions(), collect_errors=True))
+    
+    assert len(results) == 4
+    assert results[0] == results[3] == compute_scores(rubric, _batch_submissions()[0])
+    assert isinstance(results[1], ScoringError)
+    assert results[1].index == 1
+    assert results[1].submission_id == "test-submission-1"
+    assert "not in range" in str(results[1].error)
+    assert isinstance(results[2].error, ValueError)
+    assert "Missing criteria" in str(results[2].error)
+
+
+def test_compute_scores_many_reports_scale_errors():
+    """Test points mode without total_points is reported per submission"""
+    rubric = create_simple_rubric(mode="points", total_points=None)
+    
+    results = list(compute_scores_many(rubric, _batch_submissions()[:2], collect_errors=True))
+    
+    assert "total_points required" in str(results[0].error)
+    assert "not in range" in str(results[1].error)
+
+
+# Tests: Incremental Scoring
+
+def test_incremental_scorer_initial_scores_match():
+    """Test initial scores equal compute_scores"""
+    rubric = create_simple_rubric(mode="points", total_points=50)
+    extracted = _batch_submissions()[0]
+    
+    scorer = IncrementalScorer(rubric, extracted)
+    
+    assert scorer.scores() == compute_scores(rubric, extracted)
+    assert scorer.raw_weighted == Decimal("12.0")
+    assert scorer.points_for("style") == Decimal("2.0")
+
+
+@pytest.mark.parametrize("rounding_mode", ["HALF_UP", "HALF_EVEN", "HALF_DOWN"])
+def test_incremental_scorer_matches_full_recompute(rounding_mode):
+    """Test every override matches a full compute_scores on the same awards"""
+    rubric = compile_rubric(create_simple_rubric(
+        mode="points", total_points=7, rounding_mode=rounding_mode, decimals=1
+    ))
+    awards = {
+        "org": ("Proficient", 3.0, "Good"),
+        "evidence": ("Exemplary", 4.0, "Strong"),
+        "grammar": ("Proficient", 3.0, "Few errors"),
+        "style": ("Developing", 2.0, "Needs work"),
+    }
+    scorer = IncrementalScorer(rubric, create_extracted_scores(awards))
+    overrides = [("org", "0.5"), ("style", "4"), ("org", "3.25"), ("grammar", "0"), ("evidence", "1.75")]
+    
+    for criterion_id, points in overrides:
+        result = scorer.update_award(criterion_id, Decimal(points))
+        awards[criterion_id] = ("Override", points, "Teacher override")
+        
+        assert result == compute_scores(rubric, create_extracted_scores(awards))
+
+
+def test_incremental_scorer_rejects_bad_override():
+    """Test invalid overrides raise and leave the running total unchanged"""
+    scorer = IncrementalScorer(create_simple_rubric(), _batch_submissions()[0])
+    before = scorer.scores()
+    
+    with pytest.raises(ValueError, match="not in range"):
+        scorer.update_award("org", Decimal("4.5"))
+    with pytest.raises(ValueError, match="Unknown criterion 'extra'"):
+        scorer.update_award("extra", Decimal("1"))
+    
+    assert scorer.scores() == before
+
+
+def test_incremental_scorer_validates_initial_scores():
+    """Test the initial submission is validated like compute_scores"""
+    with pytest.raises(ValueError, match="not in range"):
+        IncrementalScorer(create_simple_rubric(), _batch_submissions()[1])
+
+
+# Tests: Instrumentation
+
+@pytest.fixture
+def metrics():
+    """Enable calculator metrics for one test"""
+    enabled = calculator.enable_metrics()
+    enabled.reset()
+    yield enabled
+    calculator.disable_metrics()
+
+
+def test_metrics_disabled_by_default():
+    """Test no counters are exposed unless metrics are enabled"""
+    assert calculator.metrics_snapshot() is None
+    assert calculator.metrics_prometheus() == ""
+
+
+@pytest.mark.parametrize("mode,total_points", [("percent", None), ("points", 30)])
+def test_metrics_results_unchanged(metrics, mode, total_points):
+    """Test instrumented scoring returns identical results"""
+    rubric = create_simple_rubric(mode=mode, total_points=total_points, rounding_mode="HALF_EVEN")
+    submissions = [_batch_submissions()[0]]
+    
+    instrumented = compute_scores(rubric, submissions[0])
+    batch = list(compute_scores_many(rubric, submissions))
+    calculator.disable_metrics()
+    
+    assert instrumented == compute_scores(rubric, submissions[0])
+    assert batch == [instrumented]
+
+
+def test_metrics_count_stages_and_errors(metrics):
+    """Test stage timings and error types are accumulated"""
+    rubric = create_simple_rubric()
+    extra = create_extracted_scores({
+        "org": ("Proficient", 3.0, "Good"),
+        "evidence": ("Proficient", 3.0, "Good"),
+        "grammar": ("Proficient", 3.0, "Good"),
+        "bonus": ("Proficient", 3.0, "Extra"),
+    })
+    
+    list(compute_scores_many(rubric, _batch_submissions() + [extra], collect_errors=True))
+    with pytest.raises(ValueError):
+        compute_scores(create_simple_rubric(mode="points"), _batch_submissions()[0])
+    snapshot = calculator.metrics_snapshot()
+    
+    assert snapshot["calls"] == 6
+    assert snapshot["stages"]["validation"]["count"] == 6
+    assert snapshot["stages"]["summation"]["count"] == 4
+    assert snapshot["stages"]["rounding"]["count"] == 2
+    assert snapshot["stages"]["result"]["seconds"] > 0
+    assert snapshot["errors"] == {
+        "missing_criteria": 2, "extra_criteria": 1, "out_of_range": 1, "scale": 1
+    }
+
+
+def test_metrics_reset_and_prometheus(metrics):
+    """Test reset zeroes counters and the text dump is Prometheus-style"""
+    compute_scores(create_simple_rubric(), _batch_submissions()[0])
+    text = calculator.metrics_prometheus()
+    
+    assert "# TYPE calculator_calls_total counter" in text
+    assert "calculator_calls_total 1" in text
+    assert 'calculator_stage_runs_total{stage="division"} 1' in text
+    assert 'calculator_errors_total{type="out_of_range"} 0' in text
+    
+    calculator.reset_metrics()
+    
+    assert calculator.metrics_snapshot()["calls"] == 0
+
+
+# Tests: Level Index
+
+def _consistent_submission():
+    """Awards whose points match their level labels in create_simple_rubric"""
+    return create_extracted_scores({
+        "org": ("Developing", 2.0, "Fair"),
+        "evidence": ("Exemplary", 4.0, "Strong"),
+        "grammar": ("Proficient", 3.0, "Few errors"),
+        "style": ("Proficient", 3.0, "Good"),
+    })
+
+
+def test_compiled_rubric_level_index():
+    """Test level labels map to points per criterion"""
+    compiled = compile_rubric(create_simple_rubric())
+    
+    assert compiled.level_points[0] == {
+        "Exemplary": Decimal("4.0"), "Proficient": Decimal("3.0"),
+        "Developing": Decimal("2.0"), "Beginning": Decimal("1.0"),
+    }
+    assert compiled.points_for_level("grammar", "Proficient") == Decimal("3.0")
+    with pytest.raises(ValueError, match="Unknown level 'Developing' for criterion 'style'"):
+        compiled.points_for_level("style", "Developing")
+    with pytest.raises(ValueError, match="Unknown criterion 'bonus'"):
+        compiled.points_for_level("bonus", "Exemplary")
+
+
+def test_compute_scores_by_level_matches_points():
+    """Test level-only awards score like awards carrying the level points"""
+    rubric = create_simple_rubric(mode="points", total_points=30)
+    extracted = _consistent_submission()
+    level_scores = LevelExtractedScores(
+        submission_id=extracted.submission_id,
+        scores=[
+            LevelAward(criterion_id=a.criterion_id, level=a.level, rationale=a.rationale)
+            for a in extracted.scores
+        ],
+    )
+    
+    assert compute_scores_by_level(rubric, level_scores) == compute_scores(rubric, extracted)
+
+
+def test_compute_scores_by_level_rejects_unknown_level():
+    """Test level-only scoring fails on labels outside the criterion's levels"""
+    level_scores = LevelExtractedScores(
+        submission_id="s1",
+        scores=[
+            LevelAward(criterion_id=cid, level=label, rationale="r")
+            for cid, label in [("org", "Exemplary"), ("evidence", "Exemplary"),
+                               ("grammar", "Exemplary"), ("style", "Beginning")]
+        ],
+    )
+    
+    with pytest.raises(ValueError, match="Unknown level 'Beginning' for criterion 'style'"):
+        compute_scores_by_level(create_simple_rubric(), level_scores)
+    with pytest.raises(ValueError, match="Missing criteria"):
+        compute_scores_by_level(create_simple_rubric(), LevelExtractedScores(
+            submission_id="s2", scores=[LevelAward(criterion_id="org", level="Exemplary", rationale="r")]
+        ))
+
+
+def test_strict_levels_flags_label_points_disagreement():
+    """Test strict_levels rejects unknown labels and points that differ from the label"""
+    rubric = create_simple_rubric()
+    mismatched = _consistent_submission()
+    mismatched.scores[0].points_awarded = Decimal("2.5")
+    
+    assert compute_scores(rubric, _consistent_submission(), strict_levels=True) == \
+        compute_scores(rubric, _consistent_submission())
+    # Lenient by default
+    compute_scores(rubric, mismatched)
+    with pytest.raises(ValueError, match="Level mismatch for 'org': level 'Developing' is worth 2.0, awarded 2.5"):
+        compute_scores(rubric, mismatched, strict_levels=True)
+    with pytest.raises(ValueError, match="Unknown level 'Developing' for criterion 'style'"):
+        compute_scores(rubric, _batch_submissions()[0], strict_levels=True)
+
+
+def test_compute_scores_many_strict_levels_collects_errors():
+    """Test level disagreements are reported per submission in batches"""
+    rubric = create_simple_rubric()
+    results = list(compute_scores_many(
+        rubric, [_consistent_submission(), _batch_submissions()[0]],
+        collect_errors=True, strict_levels=True,
+    ))
+    
+    assert results[0] == compute_scores(rubric, _consistent_submission())
+    assert isinstance(results[1], ScoringError)
+    assert "Unknown level" in str(results[1].error)
+
+
+def test_strict_levels_with_metrics(metrics):
+    """Test the strict check also runs on the instrumented path"""
+    with pytest.raises(ValueError, match="Unknown level"):
+        compute_scores(create_simple_rubric(), _batch_submissions()[0], strict_levels=True)
+
+
+# Tests: Sections
+
+def create_sectioned_rubric(mode="percent", total_points=None):
+    """org at the top level; Writing (x2) holds grammar, style and Mechanics (x0.5) with evidence"""
+    org, evidence, grammar, style = create_simple_rubric(mode, total_points).criteria
+    return Rubric(
+        rubric_id="test-rubric-sections",
+        title="Sectioned Rubric",
+        scale=create_simple_rubric(mode, total_points).scale,
+        criteria=[org],
+        sections=[
+            Section(
+                id="writing", name="Writing", weight=Decimal("2"),
+                criteria=[grammar, style],
+                sections=[Section(id="mechanics", name="Mechanics", weight=Decimal("0.5"), criteria=[evidence])],
+            )
+        ],
+    )
+
+
+def _sectioned_submission():
+    return create_extracted_scores({
+        "org": ("Proficient", 3.0, "Good"),
+        "grammar": ("Proficient", 3.0, "Few errors"),
+        "style": ("Developing", 2.5, "Needs work"),
+        "evidence": ("Exemplary", 4.0, "Strong"),
+    })
+
+
+def test_sections_flatten_to_effective_weights():
+    """Test the tree compiles to pre-order sections and multiplied weights"""
+    compiled = compile_rubric(create_sectioned_rubric())
+    
+    assert compiled.criterion_ids == ("org", "grammar", "style", "evidence")
+    assert compiled.weights == (Decimal("1.0"), Decimal("2.0"), Decimal("2.0"), Decimal("1.00"))
+    assert compiled.criterion_sections == (-1, 0, 0, 1)
+    assert compiled.section_ids == ("writing", "mechanics")
+    assert compiled.section_parents == (-1, 0)
+    assert compiled.section_max == (Decimal("10.00"), Decimal("4.0"))
+    assert compiled.max_weighted == Decimal("24")
+
+
+def test_sections_subtotals_and_overall():
+    """Test section subtotals use only the weights below each section"""
+    result = compute_scores(create_sectioned_rubric(mode="points", total_points=50), _sectioned_submission())
+    
+    assert result == {
+        "raw_points": "18.00",
+        "max_points": "24.00",
+        "percent": "75.00",
+        "final_points": "37.50",
+        "sections": {
+            "writing": {"raw_points": "7.50", "max_points": "10.00", "percent": "75.00"},
+            "mechanics": {"raw_points": "4.00", "max_points": "4.00", "percent": "100.00"},
+        },
+    }
+    ComputedScores(**result)
+
+
+def test_sections_overall_matches_flat_rubric():
+    """Test the overall score equals a flat rubric with effective weights"""
+    sectioned = create_sectioned_rubric()
+    compiled = compile_rubric(sectioned)
+    flat = Rubric(
+        rubric_id="flat", title="Flat", scale=sectioned.scale,
+        criteria=[c.model_copy(update={"weight": w}) for c, w in zip(compiled.criteria, compiled.weights)],
+    )
+    
+    result = compute_scores(compiled, _sectioned_submission())
+    
+    assert "sections" not in compute_scores(flat, _sectioned_submission())
+    assert {k: v for k, v in result.items() if k != "sections"} == compute_scores(flat, _sectioned_submission())
+
+
+def test_sections_all_entry_points_agree():
+    """Test batch, level, incremental, instrumented and trusted scoring report sections"""
+    rubric = create_sectioned_rubric()
+    extracted = _sectioned_submission()
+    expected = compute_scores(rubric, extracted)
+    
+    assert next(compute_scores_many(rubric, [extracted])) == expected
+    assert compute_scores(load_rubric_json(rubric.model_dump_json(), trusted=True), extracted) == expected
+    level_scores = LevelExtractedScores(
+        submission_id="s", scores=[LevelAward(criterion_id="org", level="Exemplary", rationale="r")]
+        + [LevelAward(criterion_id=cid, level="Proficient", rationale="r") for cid in ("grammar", "style", "evidence")],
+    )
+    assert compute_scores_by_level(rubric, level_scores)["sections"]["writing"]["raw_points"] == "7.50"
+    
+    scorer = IncrementalScorer(rubric, extracted)
+    assert scorer.scores() == expected
+    updated = scorer.update_award("evidence", Decimal("2"))
+    assert updated["sections"]["mechanics"]["raw_points"] == "2.00"
+    assert updated["sections"]["writing"]["raw_points"] == "6.50"
+    
+    calculator.enable_metrics()
+    try:
+        assert compute_scores(rubric, extracted) == expected
+        assert calculator.metrics_snapshot()["calls"] == 1
+    finally:
+        calculator.disable_metrics()
+
+
+def test_sections_range_errors_unchanged():
+    """Test awards in sections are validated like top-level ones"""
+    extracted = _sectioned_submission()
+    extracted.scores[3].points_awarded = Decimal("5")
+    
+    with pytest.raises(ValueError, match="Invalid points for 'evidence': 5 not in range"):
+        compute_scores(create_sectioned_rubric(), extracted)
+
+
+def test_sections_validation():
+    """Test empty sections and duplicate section ids are rejected"""
+    with pytest.raises(ValidationError, match="Section 'empty' must have at least 1 item"):
+        Section(id="empty", name="Empty")
+    
+    rubric = create_sectioned_rubric()
+    rubric.sections.append(rubric.sections[0].model_copy())
+    with pytest.raises(ValueError, match=r"Duplicate section ids: \['mechanics', 'writing'\]"):
+        validate_rubric(rubric)
+    
+    rubric = create_sectioned_rubric()
+    rubric.sections[0].criteria.append(rubric.criteria[0].model_copy())
+    with pytest.raises(ValueError, match=r"Duplicate criterion ids: \['org'\]"):
+        compile_rubric(rubric)
+    
+    # Flat rubrics keep their existing behaviour
+    flat = create_simple_rubric()
+    flat.criteria.append(flat.criteria[0].model_copy())
+    validate_rubric(flat)
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,156 @@
+"""
+Unit tests for streaming class statistics
+"""
+
+import random
+import statistics
+import pytest
+from decimal import Decimal
+from calculator import compute_scores, compile_rubric
+from class_stats import OTHER_LEVEL, ClassStats, HistogramSketch, RunningStats
+from test_calculator import create_simple_rubric, create_extracted_scores
+
+
+def _scored_submissions(rubric, count, seed=7):
+    """Random (extracted, computed) pairs for the 4-criterion test rubric"""
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        extracted = create_extracted_scores({
+            cid: (rng.choice(["Exemplary", "Proficient", "Developing"]), rng.randint(0, 8) / 2, "R")
+            for cid in ("org", "evidence", "grammar", "style")
+        })
+        pairs.append((extracted, compute_scores(rubric, extracted)))
+    return pairs
+
+
+def test_running_stats_matches_statistics_module():
+    """Test Welford mean/variance against the standard library"""
+    values = [random.Random(1).uniform(0, 100) for _ in range(500)]
+    stats = RunningStats()
+    for value in values:
+        stats.add(value)
+
+    assert stats.count == 500
+    assert stats.mean == pytest.approx(statistics.fmean(values))
+    assert stats.variance == pytest.approx(statistics.pvariance(values))
+    assert (stats.min, stats.max) == (min(values), max(values))
+
+
+def test_running_stats_merge_equals_single_pass():
+    """Test merging shards gives the same moments as one pass"""
+    values = [float(v) for v in range(1, 101)]
+    whole, left, right = RunningStats(), RunningStats(), RunningStats()
+    for value in values:
+        whole.add(value)
+    for value in values[:37]:
+        left.add(value)
+    for value in values[37:]:
+        right.add(value)
+
+    left.merge(right)
+    left.merge(RunningStats())
+
+    assert left.count == whole.count
+    assert left.mean == pytest.approx(whole.mean)
+    assert left.variance == pytest.approx(whole.variance)
+    assert (left.min, left.max) == (1.0, 100.0)
+
+
+def test_histogram_percentiles_within_one_bin():
+    """Test approximate percentiles are within one bin width"""
+    values = [v / 10 for v in range(1001)]
+    sketch = HistogramSketch(0.0, 100.0, bins=50)
+    for value in values:
+        sketch.add(value)
+
+    for q in (10, 50, 90):
+        assert sketch.percentile(q) == pytest.approx(statistics.quantiles(values, n=100)[q - 1], abs=2.0)
+    assert HistogramSketch(0.0, 1.0).percentile(50) is None
+    with pytest.raises(ValueError, match="different bins"):
+        sketch.merge(HistogramSketch(0.0, 100.0, bins=10))
+
+
+def test_class_stats_per_criterion_and_overall():
+    """Test per-criterion, level and overall aggregates"""
+    rubric = compile_rubric(create_simple_rubric(mode="points", total_points=20))
+    pairs = _scored_submissions(rubric, 200)
+
+    summary = ClassStats(rubric).update(iter(pairs)).to_dict()
+
+    org_points = [float(e.scores[0].points_awarded) for e, _ in pairs]
+    percents = [float(c["percent"]) for _, c in pairs]
+    assert summary["count"] == 200
+    assert summary["criteria"]["org"]["mean"] == pytest.approx(statistics.fmean(org_points))
+    assert summary["criteria"]["org"]["max"] == max(org_points)
+    assert sum(summary["criteria"]["org"]["levels"].values()) == 200
+    assert summary["overall"]["percent"]["variance"] == pytest.approx(statistics.pvariance(percents))
+    assert summary["overall"]["final_points"]["count"] == 200
+    assert sum(summary["overall"]["percent"]["histogram"]["counts"]) == 200
+    assert summary["overall"]["percent"]["percentiles"]["50.0"] == pytest.approx(
+        statistics.median(percents), abs=2.0
+    )
+
+
+def test_class_stats_shards_merge():
+    """Test shard aggregates merge to the single-pass result"""
+    rubric = create_simple_rubric()
+    pairs = _scored_submissions(rubric, 90)
+
+    whole = ClassStats(rubric).update(pairs).to_dict()
+    merged = ClassStats(rubric).update(pairs[:30])
+    merged.merge(ClassStats(rubric).update(pairs[30:]))
+    merged = merged.to_dict()
+
+    assert merged["count"] == whole["count"]
+    assert merged["criteria"]["style"]["levels"] == whole["criteria"]["style"]["levels"]
+    assert merged["criteria"]["style"]["histogram"] == whole["criteria"]["style"]["histogram"]
+    assert merged["overall"]["percent"]["mean"] == pytest.approx(whole["overall"]["percent"]["mean"])
+
+
+def test_free_text_levels_share_one_bucket():
+    """Test labels outside the rubric are counted together, so the counters stay bounded"""
+    rubric = compile_rubric(create_simple_rubric())
+    pairs = []
+    for n in range(50):
+        extracted = create_extracted_scores({
+            "org": (f"Pretty good #{n}" if n % 2 else "Proficient", 3.0, "R"),
+            "evidence": ("Exemplary", 4.0, "R"),
+            "grammar": ("Proficient", 3.0, "R"),
+            "style": ("Proficient", 3.0, "R"),
+        })
+        pairs.append((extracted, compute_scores(rubric, extracted)))
+
+    stats = ClassStats(rubric).update(pairs[:25])
+    stats.merge(ClassStats(rubric).update(pairs[25:]))
+
+    assert stats.to_dict()["criteria"]["org"]["levels"] == {"Proficient": 25, OTHER_LEVEL: 25}
+
+
+def test_class_stats_rejects_mismatches():
+    """Test unknown criteria and incompatible shards are rejected"""
+    stats = ClassStats(create_simple_rubric())
+    bad = create_extracted_scores({"bonus": ("Extra", 1.0, "R")})
+
+    with pytest.raises(ValueError, match="Unknown criterion 'bonus'"):
+        stats.add(bad, {"percent": "0", "raw_points": "0"})
+    with pytest.raises(ValueError, match="different rubrics"):
+        stats.merge(ClassStats(create_simple_rubric(), bins=10))
+
+
+def test_class_stats_mismatched_ranges_merge_nothing():
+    """Test a shard with different score ranges is rejected before anything is merged"""
+    rubric = compile_rubric(create_simple_rubric())
+    stats = ClassStats(rubric).update(_scored_submissions(rubric, 10))
+    before = stats.to_dict()
+    reweighted = create_simple_rubric()
+    reweighted.criteria[-1].weight = Decimal("2.0")
+    other = ClassStats(reweighted).update(_scored_submissions(compile_rubric(reweighted), 10))
+
+    with pytest.raises(ValueError, match="different score ranges"):
+        stats.merge(other)
+    assert stats.to_dict() == before
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,152 @@
+"""
+Unit tests for the differential conformance harness
+"""
+
+import json
+import random
+from decimal import Decimal
+
+import pytest
+import conformance
+from calculator import IncrementalScorer, compile_rubric, compute_scores
+from conformance import (
+    ENGINES, is_midpoint, main, random_cases, run_conformance, same_outcome, shrink,
+)
+from models import ExtractedScores, Rubric
+
+
+def _float_percent(compiled, submissions):
+    """Engine that rounds the percent with binary floats (wrong on midpoints)"""
+    outcomes = []
+    for extracted in submissions:
+        try:
+            result = compute_scores(compiled, extracted)
+        except ValueError as e:
+            outcomes.append(e)
+            continue
+        decimals = -compiled.quantizer.as_tuple().exponent
+        raw = IncrementalScorer(compiled, extracted).raw_weighted
+        result["percent"] = f"{float(raw / compiled.max_weighted * 100):.{decimals}f}"
+        outcomes.append(result)
+    return outcomes
+
+
+def test_generated_cases_cover_the_model_space():
+    """Test generated rubrics are valid and span decimals, modes, scales and sections"""
+    seen = set()
+    for rubric_dict, submissions in random_cases(seed=3, rubrics=150, batch=2):
+        rubric = Rubric.model_validate(rubric_dict)
+        compile_rubric(rubric)
+        scale = rubric.scale
+        seen.add(("decimals", scale.rounding.decimals))
+        seen.add(("rounding", scale.rounding.mode))
+        seen.add(("scale", scale.mode))
+        seen.add(("sections", bool(rubric.sections)))
+        for submission in submissions:
+            ExtractedScores.model_validate(submission)
+
+    assert {value for kind, value in seen if kind == "decimals"} == {0, 1, 2, 3, 4}
+    assert {value for kind, value in seen if kind == "rounding"} == {"HALF_UP", "HALF_EVEN", "HALF_DOWN"}
+    assert {value for kind, value in seen if kind == "scale"} == {"percent", "points"}
+    assert {value for kind, value in seen if kind == "sections"} == {True, False}
+
+
+def test_cases_are_reproducible_from_seed():
+    assert list(random_cases(5, 3, 4)) == list(random_cases(5, 3, 4))
+    assert list(random_cases(5, 3, 4)) != list(random_cases(6, 3, 4))
+
+
+def test_is_midpoint():
+    assert is_midpoint(Decimal("2.345"), 2)
+    assert is_midpoint(Decimal("0.5"), 0)
+    assert not is_midpoint(Decimal("2.3451"), 2)
+    assert not is_midpoint(Decimal("2.34"), 2)
+
+
+def test_builtin_engines_conform_and_are_timed():
+    report = run_conformance(seed=11, rubrics=25, batch=12)
+
+    assert report.ok
+    assert report.rows == 300 and report.midpoint_rows > 30 and report.error_rows > 0
+    assert [engine.name for engine in report.engines] == list(ENGINES)
+    assert all(engine.rows == 300 and engine.seconds > 0 for engine in report.engines)
+    summary = report.to_dict()
+    assert summary["engines"][0]["name"] == "reference"
+    assert summary["engines"][0]["speedup"] == 1.0
+
+
+def test_broken_engine_is_caught_and_shrunk(monkeypatch):
+    """Test a float-rounding engine fails on midpoints and shrinks to a tiny case"""
+    monkeypatch.setitem(ENGINES, "float", _float_percent)
+
+    report = run_conformance(seed=2, rubrics=40, batch=10, engines=["compiled", "float"])
+
+    compiled_report, float_report = report.engines
+    assert not report.ok
+    assert compiled_report.mismatched_rows == 0
+    assert float_report.mismatched_rows > 0
+    mismatch = float_report.mismatches[0]
+    assert mismatch.shrunk
+    assert mismatch.expected["percent"] != mismatch.actual["percent"]
+    rubric = Rubric.model_validate(mismatch.case["rubric"])
+    assert len(rubric.criteria) == 1 and not rubric.sections
+    assert len(mismatch.case["extracted"]["scores"]) == 1
+    assert conformance._disagrees(_float_percent, mismatch.case)
+
+
+def test_shrink_keeps_a_disagreeing_case():
+    rng = random.Random(0)
+    rubric = conformance.random_rubric(rng)
+    case = {"rubric": rubric, "extracted": conformance.random_submissions(rng, rubric, 1)[0]}
+
+    # Nothing disagrees with the reference, so nothing shrinks
+    assert shrink(ENGINES["compiled"], case) == case
+
+
+def test_crashing_engine_never_matches(monkeypatch):
+    def crash(compiled, submissions):
+        raise TypeError("boom")
+
+    monkeypatch.setitem(ENGINES, "crash", crash)
+    report = run_conformance(seed=0, rubrics=3, batch=5, engines=["crash"], max_mismatches=1)
+
+    assert report.engines[0].mismatched_rows == 15
+    assert report.engines[0].mismatches[0].actual == {"error": "TypeError: boom"}
+    assert not same_outcome(ValueError("invalid"), TypeError("boom"))
+
+
+def test_json_engines_take_the_numeric_fast_path(monkeypatch):
+    """Test the json engines send numeric literals that skip pydantic, in every notation"""
+    import models
+    lean = []
+    real_lean = models._lean_extracted_scores
+    monkeypatch.setattr(models, "_lean_extracted_scores", lambda data: lean.append(real_lean(data)) or lean[-1])
+
+    report = run_conformance(seed=4, rubrics=20, batch=10, engines=["json", "json-exact"])
+
+    assert report.ok and len(lean) == 400
+    assert sum(result is not None for result in lean) > 350
+    notations = {conformance._number_literal(Decimal(value), n) for value in ("0", "2.5") for n in range(5)}
+    assert notations == {"0", "0.0", "0E+0", "0.0000000000000000000", "-0.0",
+                         "2.5", "2.5E+0", "2.5000000000000000000"}
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError, match="Unknown engines"):
+        run_conformance(rubrics=1, engines=["nope"])
+
+
+def test_main_writes_report_and_exit_code(tmp_path, monkeypatch, capsys):
+    output = tmp_path / "report.json"
+
+    assert main(["--rubrics", "5", "--batch", "4", "--engines", "many,vectorized", "--output", str(output)]) == 0
+    report = json.loads(output.read_text())
+    assert [engine["name"] for engine in report["engines"]] == ["reference", "many", "vectorized"]
+    assert "rows/s" in capsys.readouterr().out
+
+    monkeypatch.setitem(ENGINES, "float", _float_percent)
+    assert main(["--rubrics", "40", "--batch", "10", "--seed", "2", "--engines", "float"]) == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,145 @@
+"""
+Unit tests for the incremental course gradebook
+"""
+
+import random
+from decimal import Decimal
+
+import pytest
+from pydantic import ValidationError
+from calculator import compute_scores
+from course_gradebook import CourseGradebook, CoursePolicy, GradeCategory, compute_course_grade
+from models import ComputedScores
+from test_calculator import create_simple_rubric, create_extracted_scores
+
+
+def _policy(drop=1, cap=None):
+    return CoursePolicy(
+        categories=[
+            GradeCategory(id="hw", name="Homework", weight=Decimal("0.4"), drop_lowest=drop),
+            GradeCategory(id="exam", name="Exams", weight=Decimal("0.6"), cap_percent=cap),
+        ],
+        assignments={"hw1": "hw", "hw2": "hw", "hw3": "hw", "hw4": "hw", "mid": "exam", "final": "exam"},
+    )
+
+
+def _scores(raw, max_points="10"):
+    return {"raw_points": str(raw), "max_points": max_points, "percent": "0", "final_points": None}
+
+
+def test_drop_lowest_and_weighted_average():
+    """Test the lowest homework is dropped and categories are weighted"""
+    book = CourseGradebook(_policy())
+    for assignment_id, raw in [("hw1", 5), ("hw2", 10), ("hw3", 8), ("mid", 7), ("final", 9)]:
+        grade = book.record("alice", assignment_id, _scores(raw))
+
+    assert grade["categories"]["hw"] == {"earned": "18.00", "possible": "20.00", "percent": "90.00", "dropped": ["hw1"]}
+    assert grade["categories"]["exam"]["percent"] == "80.00"
+    # 0.4 * 90 + 0.6 * 80
+    assert grade["percent"] == "84.00"
+
+
+def test_rescore_moves_scores_between_dropped_and_kept():
+    """Test rescoring updates which score is dropped"""
+    book = CourseGradebook(_policy())
+    for assignment_id, raw in [("hw1", 5), ("hw2", 10), ("hw3", 8)]:
+        book.record("bob", assignment_id, _scores(raw))
+
+    grade = book.record("bob", "hw1", _scores(10))
+    assert grade["categories"]["hw"]["dropped"] == ["hw3"]
+    assert grade["categories"]["hw"]["earned"] == "20.00"
+
+    assert book.remove("bob", "hw2")
+    assert book.grade("bob")["categories"]["hw"] == {"earned": "10.00", "possible": "10.00", "percent": "100.00",
+                                                     "dropped": ["hw3"]}
+    assert not book.remove("bob", "hw2")
+
+
+def test_never_drops_every_score_and_renormalizes_weights():
+    """Test a lone score is kept and empty categories are left out"""
+    book = CourseGradebook(_policy(drop=3))
+    grade = book.record("carol", "hw2", _scores(7))
+
+    assert grade["categories"]["hw"]["dropped"] == []
+    assert list(grade["categories"]) == ["hw"]
+    assert grade["percent"] == "70.00"
+    assert CourseGradebook(_policy()).grade("nobody") == {"percent": None, "categories": {}}
+
+
+def test_category_cap_and_computed_scores_input():
+    """Test extra credit above the cap is clipped, and ComputedScores is accepted"""
+    book = CourseGradebook(_policy(cap=Decimal("100")))
+    rubric = create_simple_rubric()
+    extracted = create_extracted_scores({
+        "org": ("Exemplary", 4.0, "a"), "evidence": ("Exemplary", 4.0, "b"),
+        "grammar": ("Exemplary", 4.0, "c"), "style": ("Exemplary", 4.0, "d"),
+    })
+    book.record("dan", "mid", ComputedScores(**compute_scores(rubric, extracted)))
+    grade = book.record("dan", "final", _scores(12))
+
+    assert grade["categories"]["exam"]["earned"] == "28.00"
+    assert grade["categories"]["exam"]["percent"] == "100.00"
+
+
+def test_ties_drop_earliest_assignment():
+    """Test equal ratios are broken by assignment order, not record order"""
+    book = CourseGradebook(_policy())
+    book.record("erin", "hw3", _scores(5))
+    grade = book.record("erin", "hw1", _scores("2.5", "5"))
+
+    assert grade["categories"]["hw"]["dropped"] == ["hw1"]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_updates_match_full_recompute(seed):
+    """Test every incremental update equals a from-scratch recompute"""
+    rng = random.Random(seed)
+    policy = CoursePolicy(
+        categories=[
+            GradeCategory(id="a", name="A", weight=Decimal("2"), drop_lowest=2),
+            GradeCategory(id="b", name="B", weight=Decimal("1.5"), drop_lowest=1, cap_percent=Decimal("95")),
+            GradeCategory(id="c", name="C", weight=Decimal("0.5")),
+        ],
+        assignments={f"x{n}": "abc"[n % 3] for n in range(30)},
+    )
+    book = CourseGradebook(policy)
+    current = {student: {} for student in ("s1", "s2", "s3")}
+
+    for _ in range(600):
+        student = rng.choice(list(current))
+        assignment_id = f"x{rng.randrange(30)}"
+        if rng.random() < 0.2:
+            book.remove(student, assignment_id)
+            current[student].pop(assignment_id, None)
+        else:
+            max_points = rng.choice(["4", "10", "25"])
+            scores = _scores(Decimal(rng.randint(0, int(max_points) * 4)) / 4, max_points)
+            book.record(student, assignment_id, scores)
+            current[student][assignment_id] = scores
+        assert book.grade(student) == compute_course_grade(policy, current[student])
+
+    assert dict(book.report()) == {s: compute_course_grade(policy, current[s]) for s in book.students()}
+
+
+def test_repeated_regrades_keep_heaps_bounded():
+    """Test stale heap entries are compacted away instead of accumulating"""
+    book = CourseGradebook(_policy(drop=2))
+    for n in range(1000):
+        book.record("carol", f"hw{n % 4 + 1}", _scores(n % 11))
+        if n % 7 == 0:
+            book.remove("carol", "hw4")
+
+    state = book._students["carol"]["hw"]
+    assert len(state.low) + len(state.high) <= 2 * len(state.entries)
+    expected = {f"hw{n % 4 + 1}": _scores(n % 11) for n in range(996, 1000)}
+    assert book.grade("carol") == compute_course_grade(book.policy, expected)
+
+
+def test_policy_validation_and_unknown_assignment():
+    with pytest.raises(ValidationError, match="unknown categories: \\['quiz'\\]"):
+        CoursePolicy(categories=[GradeCategory(id="hw", name="HW", weight=Decimal("1"))],
+                     assignments={"q1": "quiz"})
+    with pytest.raises(ValidationError, match="must be unique"):
+        CoursePolicy(categories=[GradeCategory(id="hw", name="HW", weight=Decimal("1"))] * 2, assignments={})
+    with pytest.raises(ValueError, match="Unknown assignment 'hw9'"):
+        CourseGradebook(_policy()).record("s", "hw9", _scores(1))
@@ -0,0 +1,195 @@
+"""
+Unit tests for incremental scoring of streamed ExtractedScores
+"""
+
+import asyncio
+import json
+import random
+from decimal import Decimal
+
+import pytest
+from calculator import compile_rubric, compute_scores
+from extract_stream import StreamingScorer, score_chunks, score_chunks_async
+from test_calculator import (
+    create_extracted_scores, create_sectioned_rubric, create_simple_rubric, _sectioned_submission,
+)
+
+
+def _document(org=("Proficient", 3.0, "Good"), style=("Developing", 2.0, "Needs work")):
+    return create_extracted_scores({
+        "org": org,
+        "evidence": ("Exemplary", 4.0, 'Quotes "the source" {twice} [sic] \\ é'),
+        "grammar": ("Proficient", 3.0, "Few errors"),
+        "style": style,
+    })
+
+
+def _tokens(text, seed):
+    """Fake LLM token stream: random small chunks"""
+    rng = random.Random(seed)
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, 6)
+        yield text[position:position + size]
+        position += size
+
+
+def _pretty(extracted):
+    data = json.loads(extracted.model_dump_json())
+    data["notes"] = 'Braces {"in": [1, "]"]} a string'
+    data["model"] = {"name": "llm", "tags": ["a", "b,c", {"x": "}]"}], "t": -1.5e2, "ok": True}
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_compute_scores_for_any_chunking(seed):
+    rubric = create_simple_rubric(mode="points", total_points=50)
+    extracted = _document()
+    text = _pretty(extracted)
+
+    assert score_chunks(rubric, _tokens(text, seed)) == compute_scores(rubric, extracted)
+
+
+def test_single_character_and_byte_chunks():
+    """Test one-character str chunks and UTF-8 bytes split inside a character"""
+    compiled = compile_rubric(create_simple_rubric())
+    extracted = _document()
+    text = extracted.model_dump_json()
+    data = _pretty(extracted).encode()
+
+    assert score_chunks(compiled, list(text)) == compute_scores(compiled, extracted)
+    assert score_chunks(compiled, [data[n:n + 1] for n in range(len(data))]) == compute_scores(compiled, extracted)
+
+
+def test_sectioned_rubric_subtotals():
+    rubric = compile_rubric(create_sectioned_rubric())
+    extracted = _sectioned_submission()
+
+    assert score_chunks(rubric, _tokens(extracted.model_dump_json(), 1)) == compute_scores(rubric, extracted)
+
+
+def test_awards_are_scored_as_soon_as_complete():
+    """Test each award is validated and added to the subtotal at its closing brace"""
+    scorer = StreamingScorer(create_simple_rubric())
+    text = _document().model_dump_json()
+    first_end = text.index("}") + 1
+
+    assert scorer.feed(text[:first_end - 1]) == []
+    awards = scorer.feed(text[first_end - 1:first_end])
+    assert [award.criterion_id for award in awards] == ["org"]
+    assert scorer.raw_weighted == 3
+
+    scorer.feed(text[first_end:])
+    assert scorer.done and len(scorer.awards) == 4
+    assert scorer.finish()["percent"] == "75.00"
+    assert scorer.extracted().submission_id == "test-submission-1"
+
+
+def test_fails_fast_on_unknown_criterion():
+    """Test the stream stops being read at the first bad award"""
+    extracted = _document()
+    extracted.scores[1].criterion_id = "voice"
+    text = extracted.model_dump_json()
+    consumed = []
+
+    def tokens():
+        for chunk in _tokens(text, 3):
+            consumed.append(chunk)
+            yield chunk
+
+    with pytest.raises(ValueError, match="Unknown criterion 'voice'"):
+        score_chunks(create_simple_rubric(), tokens())
+    assert len("".join(consumed)) < len(text)
+
+
+def test_fails_fast_on_out_of_range_points():
+    text = _document(org=("Exemplary", 9.0, "Too many")).model_dump_json()
+    scorer = StreamingScorer(create_simple_rubric())
+
+    with pytest.raises(ValueError, match=r"Invalid points for 'org': 9.0 not in range \[0, 4.0\]"):
+        scorer.feed(text[:text.index("}") + 1])
+
+
+def test_strict_levels():
+    text = _document(style=("Exemplary", 3.0, "Label disagrees")).model_dump_json()
+
+    assert score_chunks(create_simple_rubric(), [text])["raw_points"] == "13.00"
+    with pytest.raises(ValueError, match="Level mismatch for 'style'"):
+        score_chunks(create_simple_rubric(), [text], strict_levels=True)
+
+
+def test_invalid_award_reports_its_position():
+    text = '{"submission_id": "s", "scores": [{"criterion_id": "org", "level": "x", "points_awarded": -1}]}'
+
+    with pytest.raises(ValueError, match=r"Invalid award at scores\[0\]: (rationale|points_awarded)"):
+        score_chunks(create_simple_rubric(), [text])
+
+
+def test_missing_criterion_and_duplicates_match_compute_scores():
+    rubric = create_simple_rubric()
+    missing = create_extracted_scores({"org": ("Proficient", 3.0, "Good")})
+    duplicated = _document()
+    duplicated.scores.append(duplicated.scores[0].model_copy(update={"points_awarded": Decimal("1")}))
+
+    with pytest.raises(ValueError) as expected:
+        compute_scores(rubric, missing)
+    with pytest.raises(ValueError) as streamed:
+        score_chunks(rubric, [missing.model_dump_json()])
+    assert str(streamed.value) == str(expected.value)
+    assert score_chunks(rubric, [duplicated.model_dump_json()]) == compute_scores(rubric, duplicated)
+
+
+@pytest.mark.parametrize("text, message", [
+    ('[{"submission_id": "s"}]', "expected an object"),
+    ('{"submission_id": "s", "scores": {}}', "scores must be an array"),
+    ('{"submission_id": "s", "scores": [1]}', r"scores\[0\] must be an object"),
+    ('{"submission_id": "s", "scores": [{}, ]}', "Invalid award"),
+    ('{"scores": [] "submission_id": "s"}', "expected ',' or '}'"),
+    ('{"submission_id": tru, "scores": []}', "invalid value for 'submission_id'"),
+    ('{"submission_id": "s", "scores": []} {', "data after the end"),
+])
+def test_malformed_json(text, message):
+    with pytest.raises(ValueError, match=message):
+        score_chunks(create_simple_rubric(), _tokens(text, 0))
+
+
+def test_incomplete_document():
+    text = _document().model_dump_json()
+    scorer = StreamingScorer(create_simple_rubric())
+    scorer.feed(text[:-1])
+
+    assert len(scorer.awards) == 4
+    with pytest.raises(ValueError, match="Incomplete ExtractedScores document"):
+        scorer.finish()
+
+
+def test_rubric_errors_raise_before_streaming():
+    with pytest.raises(ValueError, match="total_points required"):
+        StreamingScorer(create_simple_rubric(mode="points"))
+
+
+def test_async_stream_is_closed_on_first_bad_award():
+    text = _document(org=("Exemplary", 9.0, "Too many")).model_dump_json()
+    state = {"sent": 0, "closed": False}
+
+    async def tokens():
+        try:
+            for chunk in _tokens(text, 2):
+                state["sent"] += len(chunk)
+                yield chunk
+                await asyncio.sleep(0)
+        finally:
+            state["closed"] = True
+
+    async def good():
+        for chunk in _tokens(_document().model_dump_json(), 2):
+            yield chunk
+
+    with pytest.raises(ValueError, match="Invalid points for 'org'"):
+        asyncio.run(score_chunks_async(create_simple_rubric(), tokens()))
+    assert state["closed"] and state["sent"] < len(text)
+    assert asyncio.run(score_chunks_async(create_simple_rubric(), good()))["percent"] == "75.00"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,111 @@
+"""
+Unit tests for class-level grade curves and letter bands
+"""
+
+import random
+from decimal import Decimal
+
+import pytest
+from pydantic import ValidationError
+from grade_curves import (
+    DEFAULT_GRADE_SCALE, Curve, GradeScale, LetterBand,
+    apply_curve, apply_curve_decimal, curve_percent, letter_for,
+)
+from models import Rounding
+
+
+def _random_percents(count, seed=3, places=2):
+    rng = random.Random(seed)
+    unit = 10 ** places
+    return [str(Decimal(rng.randint(0, 100 * unit)) / unit) if places else str(rng.randint(0, 100))
+            for _ in range(count)]
+
+
+CURVES = [
+    Curve(),
+    Curve(kind="shift", amount=Decimal("5.5")),
+    Curve(kind="shift", amount=Decimal("-12.25"), floor=Decimal("10")),
+    Curve(kind="sqrt"),
+    Curve(kind="sqrt", cap=Decimal("95"), floor=Decimal("40")),
+    Curve(kind="target_mean", target_mean=Decimal("82")),
+    Curve(kind="target_mean", target_mean=Decimal("20"), cap=Decimal("110")),
+]
+
+
+@pytest.mark.parametrize("curve", CURVES, ids=lambda c: c.kind)
+@pytest.mark.parametrize("mode", ["HALF_UP", "HALF_EVEN", "HALF_DOWN"])
+@pytest.mark.parametrize("decimals", [0, 1, 2, 4])
+def test_matches_decimal_reference(curve, mode, decimals):
+    """Test the fixed-point engine is string-identical to per-row Decimal"""
+    curve = curve.model_copy(update={"rounding": Rounding(mode=mode, decimals=decimals)})
+    percents = _random_percents(400) + ["0", "100", "100.00", "81", "12.25", "56.25", "0.0001"]
+
+    assert apply_curve(percents, curve, DEFAULT_GRADE_SCALE) == \
+        apply_curve_decimal(percents, curve, DEFAULT_GRADE_SCALE)
+
+
+@pytest.mark.parametrize("mode,expected", [("HALF_UP", "75"), ("HALF_EVEN", "74"), ("HALF_DOWN", "74")])
+def test_sqrt_exact_midpoints(mode, expected):
+    """Test exact square-root ties follow the rounding mode"""
+    # sqrt(55.5025 * 100) == 74.5 exactly
+    curve = Curve(kind="sqrt", rounding=Rounding(mode=mode, decimals=0))
+
+    assert apply_curve(["55.5025"], curve).percents == [expected]
+    assert str(curve_percent(Decimal("55.5025"), curve)) == expected
+
+
+def test_shift_clamps_and_target_mean_shift():
+    """Test shifts are clamped and target_mean reports the class shift"""
+    shifted = apply_curve(["97.5", "50"], Curve(kind="shift", amount=Decimal("5")))
+    assert shifted.percents == ["100.00", "55.00"]
+
+    target = apply_curve(["60", "70", "80"], Curve(kind="target_mean", target_mean=Decimal("75.5")))
+    assert target.shift == Decimal("5.5000")
+    assert target.percents == ["65.50", "75.50", "85.50"]
+
+
+def test_unusual_inputs_fall_back_to_decimal():
+    """Test extra precision, exponents and huge values match the reference"""
+    percents = ["87.123456", Decimal("1E+1"), "2500", "33.3"]
+    for curve in CURVES:
+        assert apply_curve(percents, curve, DEFAULT_GRADE_SCALE) == \
+            apply_curve_decimal(percents, curve, DEFAULT_GRADE_SCALE)
+
+
+def test_invalid_percent_rejected():
+    with pytest.raises(ValueError, match="Invalid percent"):
+        apply_curve(["-1"], Curve())
+    with pytest.raises(ValueError, match="Invalid percent"):
+        apply_curve(["abc"], Curve())
+
+
+def test_letter_bands_binary_search():
+    """Test thresholds are inclusive and bands may be given in any order"""
+    scale = GradeScale(bands=[
+        LetterBand(letter="P", min_percent=Decimal("59.995")),
+        LetterBand(letter="F", min_percent=Decimal("0")),
+        LetterBand(letter="H", min_percent=Decimal("85")),
+    ])
+    percents = ["0", "59.99", "60.00", "84.99", "85", "100"]
+
+    result = apply_curve(percents, Curve(), scale)
+
+    assert result.letters == ["F", "F", "P", "P", "H", "H"]
+    assert [letter_for(Decimal(p), scale) for p in result.percents] == result.letters
+
+
+def test_config_validation():
+    with pytest.raises(ValidationError, match="target_mean required"):
+        Curve(kind="target_mean")
+    with pytest.raises(ValidationError, match="floor must not exceed cap"):
+        Curve(floor=Decimal("90"), cap=Decimal("80"))
+    with pytest.raises(ValidationError, match="must start at 0"):
+        GradeScale(bands=[LetterBand(letter="A", min_percent=Decimal("90"))])
+    with pytest.raises(ValidationError, match="unique"):
+        GradeScale(bands=[LetterBand(letter="A", min_percent=Decimal("0")),
+                          LetterBand(letter="B", min_percent=Decimal("0"))])
+
+
+def test_empty_batch():
+    assert apply_curve([], Curve(kind="target_mean", target_mean=Decimal("80")), DEFAULT_GRADE_SCALE) == \
+        ([], [], Decimal("0"))
@@ -0,0 +1,184 @@
+"""
+Unit tests for the memory-mapped gradebook store
+"""
+
+import random
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from calculator import compute_scores
+from gradebook_store import GradebookStore, recompute_store, NO_SCORE
+from test_calculator import create_simple_rubric, create_extracted_scores
+
+
+def _extracted(submission_id, org_points=3.0, org_level="Proficient"):
+    extracted = create_extracted_scores({
+        "org": (org_level, org_points, "Good"),
+        "evidence": ("Exemplary", 4.0, "Strong"),
+        "grammar": ("Proficient", 3.0, "Few errors"),
+        "style": ("Developing", 2.5, "Needs work"),
+    })
+    extracted.submission_id = submission_id
+    return extracted
+
+
+def _random_submissions(rubric, count, seed=7):
+    rng = random.Random(seed)
+    submissions = []
+    for n in range(count):
+        extracted = _extracted(f"sub-{n}")
+        for award, criterion in zip(extracted.scores, rubric.criteria):
+            award.points_awarded = Decimal(rng.randint(0, int(criterion.max_points) * 4)) / 4
+        submissions.append(extracted)
+    return submissions
+
+
+def test_round_trip_awards_and_scores(tmp_path):
+    """Test stored awards and scores convert back to the JSON models"""
+    rubric = create_simple_rubric(mode="points", total_points=50)
+    store = GradebookStore.create(tmp_path / "grades.gbk", rubric)
+    submissions = [_extracted("a"), _extracted("b", 1.5, "Developing")]
+    computed = [compute_scores(rubric, submissions[0]), None]
+
+    assert store.append(submissions, computed) == 2
+
+    reopened = GradebookStore(tmp_path / "grades.gbk")
+    assert len(reopened) == 2
+    back = reopened.extracted(1)
+    assert back.submission_id == "b"
+    assert [(a.criterion_id, a.level, a.points_awarded) for a in back.scores] == \
+        [(a.criterion_id, a.level, a.points_awarded) for a in submissions[1].scores]
+    assert reopened.computed(0) == computed[0]
+    assert reopened.computed(1) is None
+
+
+def test_records_are_zero_copy_memmap(tmp_path):
+    """Test the points column is a memmap view of the file"""
+    rubric = create_simple_rubric()
+    store = GradebookStore.create(tmp_path / "grades.gbk", rubric)
+    store.append([_extracted("a")])
+
+    records = store.records()
+    assert isinstance(records, np.memmap)
+    assert records["points"][0].tolist() == [30000, 40000, 30000, 25000]
+    assert np.shares_memory(records, records["points"])
+
+
+def test_append_in_chunks_and_unknown_labels(tmp_path):
+    """Test chunked appends, and labels outside the rubric are interned"""
+    rubric = create_simple_rubric()
+    store = GradebookStore.create(tmp_path / "grades.gbk", rubric)
+
+    store.append([_extracted(f"s{n}") for n in range(5)], chunk_rows=2)
+    store.append([_extracted("odd", org_level="Outstanding")])
+
+    reopened = GradebookStore(tmp_path / "grades.gbk")
+    assert len(reopened) == 6
+    assert reopened.extracted(5).scores[0].level == "Outstanding"
+    assert [e.submission_id for e in reopened.iter_extracted()] == ["s0", "s1", "s2", "s3", "s4", "odd"]
+
+
+def test_append_rejects_mismatched_criteria(tmp_path):
+    """Test submissions must cover exactly the store's criteria"""
+    rubric = create_simple_rubric()
+    store = GradebookStore.create(tmp_path / "grades.gbk", rubric)
+    extracted = _extracted("a")
+    extracted.scores.pop()
+
+    with pytest.raises(ValueError, match="missing \\['style'\\]"):
+        store.append([extracted])
+    assert len(store) == 0
+
+
+def test_append_rejects_long_submission_id(tmp_path):
+    store = GradebookStore.create(tmp_path / "grades.gbk", create_simple_rubric(), submission_id_bytes=4)
+
+    with pytest.raises(ValueError, match="exceeds 4 bytes"):
+        store.append([_extracted("too-long")])
+
+
+def test_unstorable_row_keeps_earlier_rows_and_labels(tmp_path):
+    """Test a row with too many decimal places fails after the rows before it are written"""
+    path = tmp_path / "grades.gbk"
+    store = GradebookStore.create(path, create_simple_rubric())
+    submissions = [_extracted("a"), _extracted("b", org_level="Outstanding"), _extracted("c", 3.00001, "Odd")]
+
+    with pytest.raises(ValueError, match="Cannot store points 3.00001 with 4 decimal places"):
+        store.append(submissions, chunk_rows=10)
+
+    reopened = GradebookStore(path)
+    assert [e.submission_id for e in reopened.iter_extracted()] == ["a", "b"]
+    assert reopened.extracted(1).scores[0].level == "Outstanding"
+    assert "Odd" not in reopened.level_labels
+
+
+def test_unstorable_rows_can_be_collected(tmp_path):
+    """Test rows that cannot be stored are reported per row and the rest are appended"""
+    store = GradebookStore.create(tmp_path / "grades.gbk", create_simple_rubric())
+    submissions = [_extracted(f"s{n}", 3.00001 if n in (1, 4) else 3.0) for n in range(6)]
+    errors = []
+
+    assert store.append(submissions, chunk_rows=2, errors=errors) == 4
+    assert [(e.index, e.submission_id) for e in errors] == [(1, "s1"), (4, "s4")]
+    assert "Cannot store points" in str(errors[0].error)
+    assert [e.submission_id for e in store.iter_extracted()] == ["s0", "s2", "s3", "s5"]
+
+
+def test_point_places_can_be_widened(tmp_path):
+    store = GradebookStore.create(tmp_path / "grades.gbk", create_simple_rubric(), point_places=8)
+    store.append([_extracted("a", 3.12345678)])
+
+    assert store.point_places == 8
+    assert store.extracted(0).scores[0].points_awarded == Decimal("3.12345678")
+    assert recompute_store(store, create_simple_rubric()) == (1, 0)
+
+
+@pytest.mark.parametrize("mode,total,rounding", [
+    ("percent", None, "HALF_UP"),
+    ("points", 50, "HALF_EVEN"),
+    ("points", 7, "HALF_DOWN"),
+])
+def test_recompute_matches_compute_scores(tmp_path, mode, total, rounding):
+    """Test in-place recompute is identical to compute_scores per record"""
+    rubric = create_simple_rubric(mode=mode, total_points=total, rounding_mode=rounding)
+    store = GradebookStore.create(tmp_path / "grades.gbk", rubric)
+    submissions = _random_submissions(rubric, 300)
+    store.append(submissions)
+
+    assert recompute_store(store, rubric, chunk_rows=64) == (300, 0)
+    for row, extracted in enumerate(submissions):
+        assert store.computed(row) == compute_scores(rubric, extracted)
+
+
+def test_recompute_marks_out_of_range_rows_unscored(tmp_path):
+    """Test awards above a new rubric's max are left unscored"""
+    rubric = create_simple_rubric()
+    store = GradebookStore.create(tmp_path / "grades.gbk", rubric)
+    store.append([_extracted("a"), _extracted("b", 4.0)])
+    stricter = create_simple_rubric()
+    stricter.criteria[0].max_points = Decimal("3.5")
+
+    assert recompute_store(store, stricter) == (1, 1)
+    assert store.computed(0) == compute_scores(stricter, _extracted("a"))
+    assert store.computed(1) is None
+
+
+def test_recompute_rejects_other_criteria(tmp_path):
+    rubric = create_simple_rubric()
+    store = GradebookStore.create(tmp_path / "grades.gbk", rubric)
+    other = create_simple_rubric()
+    other.criteria[0].id = "organization"
+
+    with pytest.raises(ValueError, match="does not match the store's criteria"):
+        recompute_store(store, other)
+
+
+def test_percent_mode_stores_no_final_points(tmp_path):
+    rubric = create_simple_rubric()
+    store = GradebookStore.create(tmp_path / "grades.gbk", rubric)
+    store.append([_extracted("a")])
+    recompute_store(store, rubric)
+
+    assert store.records()["final_points"][0] == NO_SCORE
+    assert store.computed(0)["final_points"] is None
@@ -0,0 +1,175 @@
+"""
+Unit tests for the batch grading job runner
+"""
+
+import asyncio
+import json
+
+import pytest
+import job_runner
+from calculator import CALCULATOR_VERSION, compute_scores
+from job_runner import ConnectionPool, JobRunner, create_schema, enqueue_grading_tasks, queue_depth
+from models import parse_extracted_scores_json
+from test_calculator import create_simple_rubric
+
+AWARDS = [("org", "Proficient", 3), ("evidence", "Exemplary", 4),
+          ("grammar", "Proficient", 3), ("style", "Proficient", 2.5)]
+
+
+def _extracted_json(submission_id, awards=AWARDS):
+    return json.dumps({
+        "submission_id": submission_id,
+        "scores": [{"criterion_id": cid, "level": level, "points_awarded": points, "rationale": "ok"}
+                   for cid, level, points in awards],
+    })
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "grader.sqlite"), size=3)
+    create_schema(pool)
+    with pool.connection() as conn:
+        conn.execute("INSERT INTO assignments VALUES ('a1', ?)", (create_simple_rubric().model_dump_json(),))
+        conn.execute("INSERT INTO assignments VALUES ('bad', '{\"rubric_id\": \"x\"}')")
+    yield pool
+    pool.close()
+
+
+def _add_submissions(pool, ids, assignment_id="a1", extracted=_extracted_json):
+    with pool.connection() as conn:
+        conn.executemany(
+            "INSERT INTO submissions (submission_id, assignment_id, extracted_scores) VALUES (?, ?, ?)",
+            [(i, assignment_id, extracted(i)) for i in ids],
+        )
+
+
+def _task_rows(pool):
+    with pool.connection() as conn:
+        return conn.execute(
+            "SELECT json_extract(input_data, '$.submission_id'), status, output_data, error_message"
+            " FROM background_tasks ORDER BY created_at"
+        ).fetchall()
+
+
+def test_process_batch_writes_scores_and_completes_tasks(pool):
+    """Test one batch scores every submission and records the calculator version"""
+    _add_submissions(pool, ["s1", "s2"])
+    enqueue_grading_tasks(pool, ["s1", "s2"], tenant_id="t1")
+    runner = JobRunner(pool, batch_size=10)
+
+    assert runner.process_batch() == 2
+    assert runner.process_batch() == 0
+
+    with pool.connection() as conn:
+        rows = conn.execute("SELECT computed_scores, calculator_version FROM submissions").fetchall()
+    rubric = create_simple_rubric()
+    expected = compute_scores(rubric, parse_extracted_scores_json(_extracted_json("s1")))
+    assert [(json.loads(scores), version) for scores, version in rows] == [(expected, CALCULATOR_VERSION)] * 2
+    assert all(status == "completed" for _, status, _, _ in _task_rows(pool))
+    assert runner.stats.completed == 2 and runner.stats.batches == 1
+
+
+def test_failures_are_recorded_per_task(pool):
+    """Test bad submissions fail their own task without affecting the batch"""
+    _add_submissions(pool, ["ok"])
+    _add_submissions(pool, ["over"], extracted=lambda i: _extracted_json(i, AWARDS[:3] + [("style", "X", 9)]))
+    _add_submissions(pool, ["norubric"], assignment_id="bad")
+    enqueue_grading_tasks(pool, ["ok", "over", "norubric", "missing"], tenant_id="t1")
+    runner = JobRunner(pool)
+
+    runner.process_batch()
+
+    rows = {sid: (status, error) for sid, status, _, error in _task_rows(pool)}
+    assert rows["ok"] == ("completed", None)
+    assert rows["over"][0] == "failed" and "Invalid points for 'style'" in rows["over"][1]
+    assert rows["norubric"][0] == "failed" and rows["norubric"][1].startswith("Invalid rubric")
+    assert rows["missing"] == ("failed", "Submission not found: missing")
+    assert (runner.stats.completed, runner.stats.failed) == (1, 3)
+
+
+def test_unexpected_errors_fail_only_their_task(pool, monkeypatch):
+    """Test a non-ValueError while scoring one row is recorded on that task"""
+    def compute(rubric, extracted):
+        if extracted.submission_id == "blob":
+            raise TypeError("the JSON object must be str")
+        return compute_scores(rubric, extracted)
+
+    monkeypatch.setattr(job_runner, "compute_scores", compute)
+    _add_submissions(pool, ["ok", "blob"])
+    enqueue_grading_tasks(pool, ["ok", "blob"], tenant_id="t1")
+    runner = JobRunner(pool)
+
+    assert runner.process_batch() == 2
+
+    rows = {sid: (status, error) for sid, status, _, error in _task_rows(pool)}
+    assert rows["ok"] == ("completed", None)
+    assert rows["blob"][0] == "failed" and rows["blob"][1].startswith("TypeError: the JSON object must be str")
+
+
+def test_rubric_cache_is_bounded(pool, monkeypatch):
+    """Test compiled rubrics are evicted least recently used first"""
+    monkeypatch.setattr(job_runner, "RUBRIC_CACHE_SIZE", 2)
+    runner = JobRunner(pool)
+    rubrics = [create_simple_rubric(mode="points", total_points=n).model_dump_json() for n in (10, 20, 30)]
+
+    runner._rubric(rubrics[0])
+    runner._rubric(rubrics[1])
+    runner._rubric(rubrics[0])
+    runner._rubric(rubrics[2])
+
+    assert list(runner._rubrics) == [rubrics[0], rubrics[2]]
+
+
+def test_claims_are_exclusive_across_runners(pool):
+    """Test two runners never claim the same task"""
+    ids = [f"s{n}" for n in range(25)]
+    _add_submissions(pool, ids)
+    enqueue_grading_tasks(pool, ids, tenant_id="t1")
+    first, second = JobRunner(pool, batch_size=10), JobRunner(pool, batch_size=10)
+
+    claimed = [first._claim(), second._claim(), first._claim(), second._claim()]
+
+    task_ids = [task.task_id for batch in claimed for task in batch]
+    assert [len(batch) for batch in claimed] == [10, 10, 5, 0]
+    assert len(set(task_ids)) == 25
+
+
+def test_async_run_drains_queue_with_lag_stats(pool):
+    """Test run(drain=True) processes everything across concurrent loops"""
+    ids = [f"s{n}" for n in range(40)]
+    _add_submissions(pool, ids)
+    enqueue_grading_tasks(pool, ids, tenant_id="t1", now=0.0)
+    runner = JobRunner(pool, batch_size=7, concurrency=3)
+
+    stats = asyncio.run(runner.run(drain=True))
+
+    assert stats.completed == 40 and stats.claimed == 40
+    assert stats.batches >= 6
+    assert stats.lag_max > 1e9 and stats.lag_mean > 1e9
+    assert queue_depth(pool) == (0, 0.0)
+    assert stats.to_dict()["throughput_per_sec"] > 0
+
+
+def test_run_stops_when_event_set(pool):
+    """Test a polling runner exits promptly once stop is set"""
+    runner = JobRunner(pool, poll_interval=30.0)
+
+    async def scenario():
+        stop = asyncio.Event()
+        task = asyncio.create_task(runner.run(stop=stop))
+        await asyncio.sleep(0.05)
+        stop.set()
+        return await asyncio.wait_for(task, 5)
+
+    assert asyncio.run(scenario()).claimed == 0
+
+
+def test_requeue_stale_returns_abandoned_tasks(pool):
+    _add_submissions(pool, ["s1"])
+    enqueue_grading_tasks(pool, ["s1"], tenant_id="t1")
+    runner = JobRunner(pool)
+    runner._claim()
+
+    assert runner.requeue_stale(older_than=3600) == 0
+    assert runner.requeue_stale(older_than=-1) == 1
+    assert queue_depth(pool)[0] == 1
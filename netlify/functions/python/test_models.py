@@ -0,0 +1,228 @@
+"""
+Unit tests for trusted model construction and JSON loaders
+"""
+
+import json
+import random
+import re
+import pytest
+from decimal import Decimal
+from pydantic import ValidationError
+from calculator import compute_scores, compute_scores_json, compile_rubric, validate_rubric
+from models import (
+    Rubric, ExtractedScores,
+    TrustedRubric, TrustedExtractedScores,
+    construct_rubric, load_rubric_json, load_extracted_scores_json, parse_extracted_scores_json,
+)
+from test_calculator import create_simple_rubric, create_extracted_scores
+
+
+def _extracted():
+    return create_extracted_scores({
+        "org": ("Proficient", 3.5, "Good"),
+        "evidence": ("Exemplary", 4.0, "Strong"),
+        "grammar": ("Proficient", 2.75, "Some errors"),
+        "style": ("Developing", 1.0, "Needs work"),
+    })
+
+
+def test_load_rubric_json_validates_by_default():
+    """Test the default loader runs full Pydantic validation"""
+    rubric = create_simple_rubric()
+
+    assert load_rubric_json(rubric.model_dump_json()) == rubric
+    with pytest.raises(ValidationError):
+        load_rubric_json('{"rubric_id": "r", "title": "", "criteria": [], "scale": {}}')
+
+
+def test_trusted_rubric_round_trips():
+    """Test a trusted rubric carries the same values as the validated one"""
+    rubric = create_simple_rubric(mode="points", total_points=50, rounding_mode="HALF_EVEN", decimals=1)
+
+    trusted = load_rubric_json(rubric.model_dump_json().encode(), trusted=True)
+
+    assert isinstance(trusted, TrustedRubric)
+    assert trusted.criteria[0].max_points == Decimal("4.0")
+    assert trusted.scale.total_points == Decimal("50")
+    assert trusted.scale.rounding.mode == "HALF_EVEN"
+    assert trusted.to_model() == rubric
+
+
+def test_trusted_rubric_defaults():
+    """Test omitted optional fields fall back to the model defaults"""
+    trusted = construct_rubric({
+        "rubric_id": "r",
+        "title": "Defaults",
+        "criteria": [{
+            "id": "c", "name": "C", "max_points": 4,
+            "levels": [{"label": "Top", "points": 4, "descriptor": "Top"}],
+        }],
+    })
+
+    assert trusted.criteria[0].weight == Decimal("1.00")
+    assert trusted.scale.mode == "percent"
+    assert trusted.scale.rounding.decimals == 2
+    assert trusted.schema_version == 1
+
+
+def test_trusted_json_keeps_decimal_precision():
+    """Test JSON numbers are read as exact Decimals, not floats"""
+    raw = ('{"submission_id": "s", "scores": [{"criterion_id": "org", "level": "L",'
+           ' "points_awarded": 0.1, "rationale": "r"}]}')
+
+    extracted = load_extracted_scores_json(raw, trusted=True)
+
+    assert isinstance(extracted, TrustedExtractedScores)
+    assert extracted.scores[0].points_awarded == Decimal("0.1")
+
+
+@pytest.mark.parametrize("mode,total_points", [("percent", None), ("points", 30)])
+def test_trusted_models_score_identically(mode, total_points):
+    """Test trusted rubric and scores give the same compute_scores output"""
+    rubric = create_simple_rubric(mode=mode, total_points=total_points)
+    extracted = _extracted()
+
+    trusted_rubric = load_rubric_json(rubric.model_dump_json(), trusted=True)
+    trusted_scores = load_extracted_scores_json(extracted.model_dump_json(), trusted=True)
+    validate_rubric(trusted_rubric)
+
+    assert compute_scores(compile_rubric(trusted_rubric), trusted_scores) == compute_scores(rubric, extracted)
+    assert trusted_scores.to_model() == extracted
+
+
+def test_untrusted_scores_still_validated():
+    """Test LLM-style input keeps full validation"""
+    raw = '{"submission_id": "s", "scores": [{"criterion_id": "org", "level": "L", "points_awarded": -1, "rationale": "r"}]}'
+
+    with pytest.raises(ValidationError, match="greater than or equal to 0"):
+        load_extracted_scores_json(raw)
+    assert isinstance(load_extracted_scores_json(_extracted().model_dump_json()), ExtractedScores)
+
+
+# Direct JSON scoring
+
+def _current_path(rubric, raw):
+    """Decode, validate into ExtractedScores, then score (the path LLM output takes today)"""
+    return compute_scores(rubric, ExtractedScores.model_validate(json.loads(raw)))
+
+
+def _outcome(score, rubric, raw):
+    try:
+        return score(rubric, raw)
+    except (ValidationError, json.JSONDecodeError):
+        return "ValidationError"
+    except ValueError as e:
+        return f"ValueError: {e}"
+
+
+def test_compute_scores_json_matches_current_path_on_random_payloads():
+    """Test results (and failure kinds) match validate-then-score across odd payloads"""
+    rng = random.Random(17)
+    rubric = compile_rubric(create_simple_rubric(mode="points", total_points=30, rounding_mode="HALF_EVEN"))
+    valid_points = [0, 1, 4, 3.5, 2.25, 1.125, 2.675, 1e-3, "3.5", " 2 "]
+    invalid_points = [-1, 4.5, None, True, "abc"]
+
+    def pick(valid, invalid):
+        return rng.choice(invalid) if rng.random() < 0.03 else rng.choice(valid)
+
+    payloads = []
+    for _ in range(400):
+        criteria = ["org", "evidence", "grammar", "style"]
+        if rng.random() < 0.05:
+            criteria = rng.sample(criteria + ["bonus"], rng.randint(3, 5))
+        scores = [
+            {"criterion_id": cid, "level": pick(["Proficient", "Exemplary"], [3]),
+             "points_awarded": pick(valid_points, invalid_points),
+             "rationale": pick(["Because", "Solid"], ["", None])}
+            for cid in criteria
+        ]
+        payload = {"submission_id": pick(["s1", "s2"], [7]), "scores": scores}
+        if rng.random() < 0.2:
+            payload["notes"] = pick(["note", None], [5])
+        payloads.append(json.dumps(payload))
+    payloads += ["not json", "[]", '{"submission_id": "s", "scores": []}', '{"scores": [{}]}']
+
+    outcomes = []
+    for raw in payloads:
+        expected = _outcome(_current_path, rubric, raw)
+        assert _outcome(compute_scores_json, rubric, raw) == expected, raw
+        assert _outcome(compute_scores_json, rubric, raw.encode()) == expected, raw
+        outcomes.append(expected)
+    # The sample covers successes and every kind of failure
+    assert any(isinstance(o, dict) for o in outcomes)
+    assert "ValidationError" in outcomes
+    assert any(str(o).startswith("ValueError: Invalid points") for o in outcomes)
+    assert any(str(o).startswith("ValueError: Criterion mismatch") for o in outcomes)
+
+
+def _points_json(points):
+    return (
+        '{"submission_id": "s1", "scores": [{"criterion_id": "org", "level": "Proficient",'
+        f' "points_awarded": {points}, "rationale": "Precise"}}]}}'
+    )
+
+
+def test_parse_extracted_scores_json_reads_points_like_pydantic():
+    """Test the default path gives the same Decimals as model_validate_json, digit for digit"""
+    rng = random.Random(5)
+    samples = ["3.1000000000000000001", "3.1234567890123456789", "2.50", "1e2", "1.5e-10", "1e23", "1e999", "7"]
+    samples += ["-0.0", "-0", "-0e5", "0.0", "1E5", "0.1e1", "2.50000000000000000000", "12345678901234567890.5"]
+    samples += [repr(rng.uniform(0, 4)) for _ in range(200)] + [f"{rng.uniform(0, 4):.20f}" for _ in range(200)]
+
+    for points in samples:
+        raw = _points_json(points)
+        try:
+            expected = str(ExtractedScores.model_validate_json(raw).scores[0].points_awarded)
+        except ValidationError:
+            with pytest.raises(ValidationError):
+                parse_extracted_scores_json(raw)
+            continue
+        assert str(parse_extracted_scores_json(raw).scores[0].points_awarded) == expected, points
+
+
+def test_numeric_literals_take_the_fast_path_and_match_pydantic():
+    """Test number-literal payloads skip pydantic and score as the validated path does"""
+    rubric = compile_rubric(create_simple_rubric(mode="points", total_points=30))
+    literals = ["3", "3.0", "3.5E+0", "0.35e1", "-0.0", "2.2500000000000000000", "1.1234567890123456789"]
+    for n, literal in enumerate(literals):
+        raw = re.sub(r'"points_awarded":"([0-9.]+)"', r'"points_awarded":\1', _extracted().model_dump_json())
+        raw = raw.replace('"points_awarded":3.5', f'"points_awarded":{literal}', 1)
+        raw = raw.replace('"points_awarded":1.0', f'"points_awarded":{literals[-n - 1]}', 1)
+
+        parsed = parse_extracted_scores_json(raw)
+        assert isinstance(parsed, TrustedExtractedScores), literal
+        validated = ExtractedScores.model_validate_json(raw)
+        assert [str(a.points_awarded) for a in parsed.scores] == [str(a.points_awarded) for a in validated.scores]
+        assert compute_scores_json(rubric, raw) == compute_scores(rubric, validated)
+
+
+def test_parse_extracted_scores_json_exact_keeps_every_digit():
+    """Test exact=True decodes JSON numbers to Decimals without a float"""
+    raw = _points_json("3.1000000000000000001")
+
+    assert parse_extracted_scores_json(raw).scores[0].points_awarded == Decimal("3.1")
+    assert parse_extracted_scores_json(raw, exact=True).scores[0].points_awarded == Decimal("3.1000000000000000001")
+
+    full = _extracted().model_dump_json().replace('"points_awarded":"3.5"', '"points_awarded":4.0000000000000000001', 1)
+    assert compute_scores_json(create_simple_rubric(), full)["raw_points"] == "11.75"
+    with pytest.raises(ValueError, match="Invalid points for 'org'"):
+        compute_scores_json(create_simple_rubric(), full, exact=True)
+
+
+def test_parse_extracted_scores_json_defers_coercions_to_pydantic():
+    """Test payloads needing coercion or failing validation use ExtractedScores"""
+    coerced = parse_extracted_scores_json(
+        '{"submission_id": "s1", "scores": [{"criterion_id": "org", "level": "Proficient",'
+        ' "points_awarded": "3.50", "rationale": "String points"}]}'
+    )
+
+    assert isinstance(coerced, ExtractedScores)
+    assert coerced.scores[0].points_awarded == Decimal("3.50")
+    with pytest.raises(ValidationError):
+        parse_extracted_scores_json('{"submission_id": "s1", "scores": [{"criterion_id": "org"}]}')
+    with pytest.raises(ValidationError):
+        parse_extracted_scores_json(b'{"submission_id": ')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,126 @@
+"""
+Unit tests for the parallel regrade engine
+"""
+
+import pytest
+from decimal import Decimal
+from calculator import compute_scores, compile_rubric, ScoringError
+from models import load_rubric_json
+from regrade import regrade_parallel
+from test_calculator import create_simple_rubric, create_extracted_scores
+
+
+def _submissions(count):
+    """Deterministic mix of awards across count submissions"""
+    levels = [0.0, 1.0, 2.5, 3.0, 4.0]
+    submissions = []
+    for n in range(count):
+        extracted = create_extracted_scores({
+            "org": ("Level", levels[n % 5], "Org"),
+            "evidence": ("Level", levels[(n // 5) % 5], "Evidence"),
+            "grammar": ("Level", levels[(n // 25) % 5], "Grammar"),
+            "style": ("Level", levels[(n * 7) % 5], "Style"),
+        })
+        extracted.submission_id = f"sub-{n}"
+        submissions.append(extracted)
+    return submissions
+
+
+@pytest.mark.parametrize("workers,chunk_size", [(1, 10), (2, 7), (3, 50)])
+def test_matches_single_process(workers, chunk_size):
+    """Test results are identical and ordered for any worker count"""
+    rubric = create_simple_rubric(mode="points", total_points=30, rounding_mode="HALF_EVEN")
+    submissions = _submissions(120)
+
+    results = regrade_parallel(rubric, iter(submissions), workers=workers, chunk_size=chunk_size)
+
+    assert results == [compute_scores(rubric, s) for s in submissions]
+
+
+def test_collects_out_of_range_and_malformed_rows_at_input_indexes():
+    """Test a failing award and a malformed trusted JSON row become per-record errors at their positions"""
+    rubric = compile_rubric(create_simple_rubric())
+    submissions = _submissions(30)
+    submissions[17] = submissions[17].model_copy(deep=True)
+    submissions[17].scores[0].points_awarded = Decimal("9")
+    submissions[23] = '{"submission_id": "sub-23", "scores": [{"criterion_id": "org", "level": "Level"}]}'
+
+    results = regrade_parallel(rubric, submissions, workers=2, chunk_size=4,
+                               collect_errors=True, trusted_json=True)
+
+    assert len(results) == 30
+    assert [r.index for r in results if isinstance(r, ScoringError)] == [17, 23]
+    assert "Invalid points for 'org': 9 not in range" in str(results[17].error)
+    assert str(results[23].error) == "Malformed stored ExtractedScores: KeyError: 'points_awarded'"
+    assert results[24] == compute_scores(rubric, submissions[24])
+
+
+def test_raises_first_error_in_input_order():
+    """Test the first invalid submission is raised when not collecting"""
+    submissions = _submissions(20)
+    submissions[5] = create_extracted_scores({
+        "org": ("Level", 9.0, "Too high"),
+        "evidence": ("Level", 1.0, "Evidence"),
+        "grammar": ("Level", 1.0, "Grammar"),
+        "style": ("Level", 1.0, "Style"),
+    })
+
+    with pytest.raises(ValueError, match="not in range"):
+        regrade_parallel(create_simple_rubric(), submissions, workers=2, chunk_size=3)
+
+
+def test_accepts_stored_json():
+    """Test raw extracted_scores JSON is parsed in the workers"""
+    rubric = create_simple_rubric(mode="points", total_points=20)
+    submissions = _submissions(12)
+    records = [s.model_dump_json() for s in submissions]
+    records[3] = '{"submission_id": "broken", "scores": []}'
+
+    results = regrade_parallel(rubric, records, workers=2, chunk_size=5, collect_errors=True)
+
+    assert results[:3] == [compute_scores(rubric, s) for s in submissions[:3]]
+    assert results[4:] == [compute_scores(rubric, s) for s in submissions[4:]]
+    assert results[3].index == 3
+    assert "Invalid ExtractedScores" in str(results[3].error)
+
+
+def test_trusted_json_and_trusted_rubric():
+    """Test stored JSON can skip Pydantic validation in the workers"""
+    rubric = create_simple_rubric(mode="points", total_points=20)
+    trusted_rubric = load_rubric_json(rubric.model_dump_json(), trusted=True)
+    submissions = _submissions(9)
+    records = [s.model_dump_json().encode() for s in submissions]
+
+    for workers in (1, 2):
+        results = regrade_parallel(trusted_rubric, records, workers=workers, chunk_size=4, trusted_json=True)
+        assert results == [compute_scores(rubric, s) for s in submissions]
+
+
+def test_malformed_trusted_json_is_a_per_record_error():
+    """Test rows the trusted loader cannot build are reported at their index"""
+    rubric = create_simple_rubric(mode="points", total_points=20)
+    submissions = _submissions(8)
+    records = [s.model_dump_json() for s in submissions]
+    records[2] = '{"scores": []}'
+    records[5] = '{"submission_id": "s", "scores": [7]}'
+    records[6] = records[6].replace('"points_awarded":"0.0"', '"points_awarded":"abc"', 1)
+
+    for workers in (1, 2):
+        results = regrade_parallel(rubric, records, workers=workers, chunk_size=3,
+                                   collect_errors=True, trusted_json=True)
+        errors = {r.index: str(r.error) for r in results if isinstance(r, ScoringError)}
+        assert sorted(errors) == [2, 5, 6]
+        assert errors[2] == "Malformed stored ExtractedScores: KeyError: 'submission_id'"
+        assert errors[5].startswith("Malformed stored ExtractedScores: TypeError")
+        assert errors[6].startswith("Malformed stored ExtractedScores: InvalidOperation")
+        assert results[7] == compute_scores(rubric, submissions[7])
+
+
+def test_rejects_invalid_rubric():
+    """Test the rubric is validated before any work is scheduled"""
+    with pytest.raises(ValueError, match="requires scale.total_points"):
+        regrade_parallel(create_simple_rubric(mode="points"), _submissions(3), workers=2)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
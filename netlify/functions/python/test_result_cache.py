@@ -0,0 +1,171 @@
+"""
+Unit tests for the content-addressed score cache
+"""
+
+import pytest
+import result_cache
+from calculator import compile_rubric, compute_scores
+from result_cache import ScoreCache, rubric_fingerprint
+from test_calculator import (
+    create_extracted_scores, create_sectioned_rubric, create_simple_rubric, _sectioned_submission,
+)
+
+
+def _extracted(org_points=3.0, submission_id="test-submission-001"):
+    extracted = create_extracted_scores({
+        "org": ("Proficient", org_points, "Good"),
+        "evidence": ("Exemplary", 4.0, "Strong"),
+        "grammar": ("Proficient", 3.0, "Few errors"),
+        "style": ("Developing", 2.0, "Needs work"),
+    })
+    extracted.submission_id = submission_id
+    return extracted
+
+
+def test_hit_returns_same_scores():
+    """Test a repeated (rubric, awards) pair is served from memory"""
+    rubric = create_simple_rubric(mode="points", total_points=50)
+    cache = ScoreCache()
+
+    first = cache.compute(rubric, _extracted())
+    second = cache.compute(rubric, _extracted(submission_id="retry"))
+
+    assert first == second == compute_scores(rubric, _extracted())
+    assert (cache.misses, cache.hits) == (1, 1)
+
+
+def test_key_ignores_award_order_and_presentation():
+    """Test award order, titles and submission id do not change the key"""
+    rubric = create_simple_rubric()
+    cache = ScoreCache()
+    extracted = _extracted()
+    reordered = _extracted()
+    reordered.scores.reverse()
+    renamed = create_simple_rubric()
+    renamed.title = "Renamed"
+
+    cache.compute(rubric, extracted)
+    cache.compute(rubric, reordered)
+    cache.compute(renamed, extracted)
+
+    assert (cache.misses, cache.hits) == (1, 2)
+
+
+def test_key_covers_scale_and_rounding():
+    """Test score-relevant rubric changes miss"""
+    cache = ScoreCache()
+    extracted = _extracted()
+
+    for rubric in (
+        create_simple_rubric(),
+        create_simple_rubric(mode="points", total_points=50),
+        create_simple_rubric(rounding_mode="HALF_EVEN"),
+        create_simple_rubric(decimals=1),
+    ):
+        assert cache.compute(rubric, extracted) == compute_scores(rubric, extracted)
+
+    assert cache.misses == 4
+    assert len({rubric_fingerprint(create_simple_rubric()),
+                rubric_fingerprint(create_simple_rubric(decimals=1))}) == 2
+
+
+def test_compiled_and_plain_rubric_share_entries():
+    """Test a CompiledRubric fingerprints the same as its Rubric"""
+    rubric = create_simple_rubric()
+    assert rubric_fingerprint(rubric) == rubric_fingerprint(compile_rubric(rubric))
+
+
+def test_lru_eviction():
+    """Test least-recently-used entries are evicted at max_entries"""
+    rubric = create_simple_rubric()
+    cache = ScoreCache(max_entries=2)
+
+    cache.compute(rubric, _extracted(1.0))
+    cache.compute(rubric, _extracted(2.0))
+    cache.compute(rubric, _extracted(1.0))   # refresh 1.0
+    cache.compute(rubric, _extracted(3.0))   # evicts 2.0
+    cache.compute(rubric, _extracted(1.0))
+
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    assert cache.stats()["hits"] == 2
+    cache.compute(rubric, _extracted(2.0))
+    assert cache.misses == 4
+
+
+def test_errors_are_not_cached():
+    """Test invalid submissions raise every time"""
+    cache = ScoreCache()
+    rubric = create_simple_rubric()
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match="Invalid points"):
+            cache.compute(rubric, _extracted(9.0))
+    assert len(cache) == 0
+
+
+def test_returned_sections_are_not_shared_with_the_cache():
+    """Test mutating a returned result, nested sections included, never reaches later hits"""
+    cache = ScoreCache()
+    rubric = compile_rubric(create_sectioned_rubric())
+    expected = compute_scores(rubric, _sectioned_submission())
+
+    for _ in range(2):
+        result = cache.compute(rubric, _sectioned_submission())
+        assert result == expected
+        for scores in result["sections"].values():
+            scores["percent"] = "0"
+        result["sections"].clear()
+    assert cache.compute(rubric, _sectioned_submission()) == expected
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    """Test the SQLite tier serves results to a fresh cache"""
+    rubric = create_simple_rubric(mode="points", total_points=50)
+    path = tmp_path / "scores.sqlite"
+
+    cache = ScoreCache(path=path)
+    expected = cache.compute(rubric, _extracted())
+    cache.close()
+
+    reopened = ScoreCache(path=path)
+    assert reopened.compute(rubric, _extracted()) == expected
+    assert (reopened.disk_hits, reopened.misses) == (1, 0)
+    reopened.compute(rubric, _extracted())
+    assert reopened.hits == 1
+
+
+def test_disk_tier_prunes_oldest_rows(tmp_path):
+    """Test the SQLite tier keeps only the newest max_disk_entries rows"""
+    rubric = create_simple_rubric()
+    path = tmp_path / "scores.sqlite"
+
+    cache = ScoreCache(max_entries=1, path=path, max_disk_entries=2)
+    for points in (1.0, 2.0, 3.0, 4.0):
+        cache.compute(rubric, _extracted(points))
+    assert cache._db.execute("SELECT COUNT(*) FROM score_cache").fetchone()[0] == 2
+    cache.close()
+
+    reopened = ScoreCache(path=path, max_disk_entries=2)
+    reopened.compute(rubric, _extracted(4.0))
+    reopened.compute(rubric, _extracted(3.0))
+    reopened.compute(rubric, _extracted(1.0))
+    assert (reopened.disk_hits, reopened.misses) == (2, 1)
+    with pytest.raises(ValueError, match="max_disk_entries"):
+        ScoreCache(max_disk_entries=0)
+
+
+def test_calculator_version_change_invalidates(tmp_path, monkeypatch):
+    """Test rows written by another calculator version are purged"""
+    rubric = create_simple_rubric()
+    path = tmp_path / "scores.sqlite"
+
+    cache = ScoreCache(path=path)
+    cache.compute(rubric, _extracted())
+    cache.close()
+
+    monkeypatch.setattr(result_cache, "CALCULATOR_VERSION", "next")
+    upgraded = ScoreCache(path=path)
+    assert upgraded._db.execute("SELECT COUNT(*) FROM score_cache").fetchone()[0] == 0
+    upgraded.compute(rubric, _extracted())
+    assert (upgraded.disk_hits, upgraded.misses) == (0, 1)
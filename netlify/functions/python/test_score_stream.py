@@ -0,0 +1,129 @@
+"""
+Unit tests for the streaming NDJSON scoring pipeline
+"""
+
+import io
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from calculator import compile_rubric, compute_scores
+from score_stream import score_stream, main
+from test_calculator import create_simple_rubric, create_extracted_scores
+
+
+HERE = Path(__file__).parent
+
+
+def _record(submission_id, org_points=3.0):
+    """NDJSON line for a 4-criterion submission"""
+    extracted = create_extracted_scores({
+        "org": ("Proficient", org_points, "Good"),
+        "evidence": ("Exemplary", 4.0, "Strong"),
+        "grammar": ("Proficient", 3.0, "Few errors"),
+        "style": ("Developing", 2.0, "Needs work"),
+    })
+    extracted.submission_id = submission_id
+    return extracted.model_dump_json()
+
+
+def test_scores_each_record_in_order():
+    """Test one ComputedScores line per valid record, tagged with submission_id"""
+    rubric = create_simple_rubric(mode="points", total_points=50)
+    out, errors = io.StringIO(), io.StringIO()
+
+    scored, failed = score_stream(compile_rubric(rubric), [_record("a"), "", _record("b", 4.0)], out, errors)
+
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert (scored, failed) == (2, 0)
+    assert [line["submission_id"] for line in lines] == ["a", "b"]
+    assert lines[0]["final_points"] == "37.50"
+    assert {k: v for k, v in lines[1].items() if k != "submission_id"} == compute_scores(
+        rubric, create_extracted_scores({
+            "org": ("Proficient", 4.0, "Good"),
+            "evidence": ("Exemplary", 4.0, "Strong"),
+            "grammar": ("Proficient", 3.0, "Few errors"),
+            "style": ("Developing", 2.0, "Needs work"),
+        })
+    )
+    assert errors.getvalue() == ""
+
+
+def test_failed_records_go_to_error_channel():
+    """Test validation and scoring failures are reported per record"""
+    out, errors = io.StringIO(), io.StringIO()
+    lines = [
+        _record("ok"),
+        _record("over", 9.0),
+        '{"submission_id": "bad", "scores": []}',
+        "not json",
+    ]
+
+    scored, failed = score_stream(compile_rubric(create_simple_rubric()), lines, out, errors)
+
+    reported = [json.loads(line) for line in errors.getvalue().splitlines()]
+    assert (scored, failed) == (1, 3)
+    assert [r["line"] for r in reported] == [2, 3, 4]
+    assert reported[0]["submission_id"] == "over"
+    assert "not in range" in reported[0]["error"]
+    assert reported[1]["submission_id"] == "bad"
+    assert reported[1]["error"].startswith("Invalid ExtractedScores: scores:")
+    assert reported[2]["submission_id"] is None
+
+
+def test_consumes_input_lazily():
+    """Test each record is written before the next one is read"""
+    out, errors = io.StringIO(), io.StringIO()
+    seen = []
+
+    def lines():
+        for n in range(3):
+            seen.append(out.getvalue().count("\n"))
+            yield _record(f"s{n}")
+
+    score_stream(compile_rubric(create_simple_rubric()), lines(), out, errors)
+
+    assert seen == [0, 1, 2]
+
+
+def test_main_reads_files(tmp_path, capsys):
+    """Test the command-line entry point with input and error files"""
+    rubric_path = tmp_path / "rubric.json"
+    rubric_path.write_text(create_simple_rubric().model_dump_json())
+    input_path = tmp_path / "scores.ndjson"
+    input_path.write_text(_record("a") + "\n" + _record("b", 7.0) + "\n")
+    errors_path = tmp_path / "errors.ndjson"
+
+    code = main([str(rubric_path), str(input_path), "--errors", str(errors_path)])
+
+    assert code == 1
+    assert json.loads(capsys.readouterr().out)["percent"] == "75.00"
+    assert json.loads(errors_path.read_text())["submission_id"] == "b"
+
+
+def test_main_rejects_invalid_rubric(tmp_path):
+    """Test an invalid rubric exits with code 2"""
+    rubric_path = tmp_path / "rubric.json"
+    rubric_path.write_text(create_simple_rubric(mode="points").model_dump_json())
+
+    assert main([str(rubric_path), str(tmp_path / "unused.ndjson")]) == 2
+
+
+def test_runs_as_module_over_stdin(tmp_path):
+    """Test python -m score_stream streams stdin to stdout"""
+    rubric_path = tmp_path / "rubric.json"
+    rubric_path.write_text(create_simple_rubric().model_dump_json())
+
+    completed = subprocess.run(
+        [sys.executable, "-m", "score_stream", str(rubric_path)],
+        input=_record("a") + "\n", capture_output=True, text=True, cwd=HERE,
+    )
+
+    assert completed.returncode == 0
+    assert json.loads(completed.stdout)["submission_id"] == "a"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,215 @@
+"""
+Unit tests for the local asyncio scoring service
+"""
+
+import asyncio
+import json
+import time
+
+import scoring_service
+from calculator import compile_rubric, compute_scores
+from scoring_service import ScoringBatcher, ScoringService, LatencyHistogram, rubric_key
+from test_calculator import create_simple_rubric, create_extracted_scores
+
+
+def _payload(org_points=3.0, rubric=None):
+    rubric = rubric or create_simple_rubric(mode="points", total_points=50)
+    extracted = create_extracted_scores({
+        "org": ("Proficient", org_points, "Good"),
+        "evidence": ("Exemplary", 4.0, "Strong"),
+        "grammar": ("Proficient", 3.0, "Few errors"),
+        "style": ("Developing", 2.0, "Needs work"),
+    })
+    return rubric, extracted, {
+        "rubric": json.loads(rubric.model_dump_json()),
+        "extracted": json.loads(extracted.model_dump_json()),
+    }
+
+
+async def _request(port, method, path, payload=None):
+    """One HTTP/1.1 request over a fresh connection; returns (status, body)"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), content.decode()
+
+
+def _with_server(scenario, **service_options):
+    async def run():
+        service = ScoringService(**service_options)
+        server = await service.serve("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await scenario(service, port)
+    return asyncio.run(run())
+
+
+def test_score_matches_compute_scores():
+    """Test /score returns exactly what compute_scores computes"""
+    rubric, extracted, payload = _payload()
+
+    async def scenario(service, port):
+        return await _request(port, "POST", "/score", payload)
+
+    status, body = _with_server(scenario)
+    result = json.loads(body)
+    assert status == 200
+    assert {k: result[k] for k in ("raw_points", "max_points", "percent", "final_points")} == \
+        compute_scores(rubric, extracted)
+    assert result["submission_id"] == extracted.submission_id
+
+
+def test_concurrent_requests_coalesce_into_one_batch():
+    """Test concurrent requests for one rubric share a compiled rubric and batch"""
+    payloads = [_payload(org_points=p)[2] for p in (0.0, 1.0, 2.0, 3.0, 4.0)]
+
+    async def scenario(service, port):
+        responses = await asyncio.gather(*(_request(port, "POST", "/score", p) for p in payloads))
+        return service, responses
+
+    service, responses = _with_server(scenario, batch_window=0.05)
+    assert [status for status, _ in responses] == [200] * 5
+    assert [json.loads(body)["raw_points"] for _, body in responses] == ["9.00", "10.00", "11.00", "12.00", "13.00"]
+    assert service.batcher.batches == 1
+    assert service.batcher.scored == 5
+    assert (service.cache.misses, service.cache.hits) == (1, 4)
+
+
+def test_invalid_submission_fails_alone():
+    """Test a bad submission in a batch gets 400 without affecting the others"""
+    good = _payload()[2]
+    bad = _payload(org_points=9.0)[2]
+
+    async def scenario(service, port):
+        return await asyncio.gather(
+            _request(port, "POST", "/score", good),
+            _request(port, "POST", "/score", bad),
+        )
+
+    (good_status, _), (bad_status, bad_body) = _with_server(scenario, batch_window=0.05)
+    assert good_status == 200
+    assert bad_status == 400
+    assert "Invalid points for 'org'" in json.loads(bad_body)["error"]
+
+
+def test_validate_reports_invalid_rubric():
+    """Test /validate returns the rubric key or a 400 with the validation error"""
+    rubric, _, payload = _payload()
+    invalid = dict(payload["rubric"], scale={"mode": "points", "total_points": None,
+                                             "rounding": {"mode": "HALF_UP", "decimals": 2}})
+
+    async def scenario(service, port):
+        return (await _request(port, "POST", "/validate", {"rubric": payload["rubric"]}),
+                await _request(port, "POST", "/validate", {"rubric": invalid}))
+
+    (ok_status, ok_body), (bad_status, bad_body) = _with_server(scenario)
+    assert ok_status == 200
+    assert json.loads(ok_body) == {"valid": True, "rubric_key": rubric_key(payload["rubric"])}
+    assert bad_status == 400
+    assert "total_points" in json.loads(bad_body)["error"]
+
+
+def test_rubric_key_changes_with_content():
+    """Test the cache key covers rubric content, not just rubric_id"""
+    first = _payload()[2]["rubric"]
+    second = _payload(rubric=create_simple_rubric(mode="points", total_points=60))[2]["rubric"]
+
+    assert first["rubric_id"] == second["rubric_id"]
+    assert rubric_key(first) != rubric_key(second)
+    assert rubric_key(first) == rubric_key(json.loads(json.dumps(first)))
+
+
+def test_unknown_path_and_wrong_method():
+    """Test routing errors"""
+    async def scenario(service, port):
+        return (await _request(port, "GET", "/nope"),
+                await _request(port, "GET", "/score"),
+                await _request(port, "POST", "/score", {"rubric": {}}))
+
+    (missing, _), (wrong_method, _), (bad_body, _) = _with_server(scenario)
+    assert (missing, wrong_method, bad_body) == (404, 405, 400)
+
+
+def test_unknown_paths_share_one_latency_label():
+    """Test client-chosen paths do not add histograms or metric labels"""
+    service = ScoringService()
+
+    async def scenario():
+        for n in range(20):
+            await service.handle("GET", f"/random-{n}", b"")
+        await service.handle("GET", "/health", b"")
+
+    asyncio.run(scenario())
+    assert sorted(service.latency) == [("/health", 200), ("other", 404)]
+    assert service.latency[("other", 404)].count == 20
+    assert 'path="other",status="404"' in service.prometheus()
+
+
+def test_early_flush_does_not_cut_the_next_batch_window():
+    """Test a batch flushed at max_batch cancels its window timer"""
+    rubric, extracted, _ = _payload()
+    compiled = compile_rubric(rubric)
+    batcher = ScoringBatcher(window=0.1, max_batch=2)
+
+    async def scenario():
+        await asyncio.gather(batcher.score("k", compiled, extracted), batcher.score("k", compiled, extracted))
+        await asyncio.sleep(0.06)
+        started = time.perf_counter()
+        await batcher.score("k", compiled, extracted)
+        return time.perf_counter() - started
+
+    waited = asyncio.run(scenario())
+    assert batcher.batches == 2
+    assert waited >= 0.09
+
+
+def test_unexpected_batch_failure_fails_every_request(monkeypatch):
+    """Test an exception while scoring a batch reaches each waiting client instead of hanging it"""
+    def broken(compiled, submissions, collect_errors=False):
+        yield compute_scores(compiled, submissions[0])
+        raise RuntimeError("engine crashed")
+
+    monkeypatch.setattr(scoring_service, "compute_scores_many", broken)
+    rubric, extracted, _ = _payload()
+    compiled = compile_rubric(rubric)
+    batcher = ScoringBatcher(window=0.01, max_batch=3)
+
+    async def scenario():
+        requests = [batcher.score("k", compiled, extracted) for _ in range(2)]
+        return await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), 1)
+
+    first, second = asyncio.run(scenario())
+    assert first == compute_scores(compiled, extracted)
+    assert isinstance(second, RuntimeError) and str(second) == "engine crashed"
+
+
+def test_metrics_exposes_latency_histograms():
+    """Test /metrics reports per-path latency histograms and batch counters"""
+    payload = _payload()[2]
+
+    async def scenario(service, port):
+        await _request(port, "POST", "/score", payload)
+        return await _request(port, "GET", "/metrics")
+
+    status, body = _with_server(scenario)
+    assert status == 200
+    assert 'scoring_service_request_seconds_count{path="/score",status="200"} 1' in body
+    assert 'scoring_service_request_seconds_bucket{path="/score",status="200",le="+Inf"} 1' in body
+    assert "scoring_service_batches_total 1" in body
+
+
+def test_latency_histogram_is_cumulative():
+    """Test bucket counts include every observation at or below the bound"""
+    histogram = LatencyHistogram((0.01, 0.1))
+    for seconds in (0.005, 0.05, 0.5):
+        histogram.observe(seconds)
+
+    assert histogram.counts == [1, 2]
+    assert histogram.count == 3
@@ -0,0 +1,188 @@
+"""
+Unit tests for sharded recompute and merge
+"""
+
+import json
+import multiprocessing
+import os
+import socket
+from decimal import Decimal
+
+import pytest
+import sharded_recompute
+from calculator import compute_scores
+from models import ExtractedScores
+from sharded_recompute import (
+    IncompleteJobError, job_status, load_job, merge_job, run_shard, run_worker, split_job,
+)
+from test_calculator import create_simple_rubric
+from test_regrade import _submissions
+
+
+def _inputs(count):
+    submissions = _submissions(count)
+    # One raw JSON row, one invalid row, one out-of-range row
+    submissions[5] = submissions[5].model_dump_json()
+    submissions[7] = "not json"
+    submissions[9] = submissions[9].model_copy(deep=True)
+    submissions[9].scores[0].points_awarded = Decimal("99")
+    return submissions
+
+
+def _expected(rubric, submissions):
+    lines = []
+    for submission in submissions:
+        if submission == "not json":
+            lines.append(None)
+            continue
+        if isinstance(submission, str):
+            submission = ExtractedScores.model_validate_json(submission)
+        try:
+            lines.append({"submission_id": submission.submission_id,
+                          "computed_scores": compute_scores(rubric, submission)})
+        except ValueError as e:
+            lines.append({"submission_id": submission.submission_id, "error": str(e)})
+    return lines
+
+
+def _worker(job_dir, name):
+    run_worker(job_dir, name)
+
+
+def test_local_worker_processes_and_merge_match_compute_scores(tmp_path):
+    """Test several worker processes score disjoint shards and merge in input order"""
+    rubric = create_simple_rubric(mode="points", total_points=40)
+    submissions = _inputs(150)
+    split_job(tmp_path / "job", rubric, submissions, shards=9)
+
+    processes = [multiprocessing.Process(target=_worker, args=(tmp_path / "job", f"node-{n}")) for n in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+
+    summary = merge_job(tmp_path / "job", tmp_path / "merged.jsonl")
+    merged = [json.loads(line) for line in (tmp_path / "merged.jsonl").read_text().splitlines()]
+
+    assert summary.rows == 150 and summary.errors == 2
+    assert merged[7]["submission_id"] == "#7" and "error" in merged[7]
+    assert [m for n, m in enumerate(merged) if n != 7] == \
+        [e for n, e in enumerate(_expected(rubric, submissions)) if n != 7]
+    assert job_status(tmp_path / "job")["complete"] == list(range(9))
+
+
+def test_merge_is_identical_for_any_shard_count(tmp_path):
+    rubric = create_simple_rubric()
+    submissions = _inputs(60)
+    digests = set()
+    for shards in (1, 4, 13):
+        job_dir = tmp_path / f"job-{shards}"
+        split_job(job_dir, rubric, submissions, shards)
+        run_worker(job_dir)
+        digests.add(merge_job(job_dir, tmp_path / f"out-{shards}.jsonl").sha256)
+
+    assert len(digests) == 1
+
+
+def test_interrupted_shard_resumes_after_last_complete_row(tmp_path, monkeypatch):
+    """Test an interrupted shard keeps its finished rows and finished shards are skipped"""
+    rubric = create_simple_rubric()
+    job_dir = tmp_path / "job"
+    split_job(job_dir, rubric, _inputs(80), shards=2)
+    run_worker(job_dir)
+    manifest = job_dir / "results" / "shard-00000.manifest.json"
+    os.remove(job_dir / "results" / "shard-00001.manifest.json")
+    os.replace(job_dir / "results" / "shard-00001.jsonl", job_dir / "results" / "shard-00001.jsonl.partial")
+    rows = load_job(job_dir)["shards"][1]["rows"]
+
+    # Tear the partial file mid-row, as a crash during a write would
+    partial = job_dir / "results" / "shard-00001.jsonl.partial"
+    lines = partial.read_text().splitlines(keepends=True)
+    partial.write_text("".join(lines[:10]) + lines[10][:15])
+    # A dead worker's lock is taken over
+    (job_dir / "locks" / "shard-00001.lock").write_text(json.dumps(
+        {"worker": "gone", "host": socket.gethostname(), "pid": 2 ** 22 + 12345}))
+    finished_mtime = manifest.stat().st_mtime_ns
+
+    scored = []
+    real_run_shard = run_shard
+    monkeypatch.setattr(sharded_recompute, "run_shard",
+                        lambda *args: scored.append(real_run_shard(*args)))
+    run_worker(job_dir)
+
+    assert scored == [rows - 10]
+    assert manifest.stat().st_mtime_ns == finished_mtime
+    assert merge_job(job_dir, tmp_path / "out.jsonl").rows == 80
+
+
+def test_live_lock_is_respected(tmp_path):
+    job_dir = tmp_path / "job"
+    split_job(job_dir, create_simple_rubric(), _inputs(20), shards=2)
+    (job_dir / "locks" / "shard-00000.lock").write_text(json.dumps(
+        {"worker": "busy", "host": socket.gethostname(), "pid": os.getpid()}))
+
+    assert run_worker(job_dir) == [1]
+    assert job_status(job_dir) == {"complete": [1], "running": [0], "pending": []}
+    with pytest.raises(IncompleteJobError, match="shard-00000: no manifest"):
+        merge_job(job_dir, tmp_path / "out.jsonl")
+    assert run_worker(job_dir, stale_after=0) == [0]
+
+
+def test_worker_stops_at_heartbeat_once_its_lock_is_taken_over(tmp_path, monkeypatch):
+    """Test a worker whose lock was taken over stops writing and leaves the new owner's lock"""
+    job_dir = tmp_path / "job"
+    split_job(job_dir, create_simple_rubric(), _inputs(40), shards=1)
+    lock_path = job_dir / "locks" / "shard-00000.lock"
+    partial = job_dir / "results" / "shard-00000.jsonl.partial"
+    monkeypatch.setattr(sharded_recompute, "HEARTBEAT_ROWS", 5)
+    real_score_line = sharded_recompute._score_line
+    taken = []
+
+    def score_line(compiled, line):
+        if json.loads(line)[0] == 12 and not taken:
+            # Another worker decides this lock is stale and claims the shard
+            taken.append(sharded_recompute._try_lock(lock_path, "thief", stale_after=-1))
+        return real_score_line(compiled, line)
+
+    monkeypatch.setattr(sharded_recompute, "_score_line", score_line)
+    assert run_worker(job_dir, "slow") == []
+    assert taken[0] is not None
+    assert json.loads(lock_path.read_text())["worker"] == "thief"
+    # Stopped at the first heartbeat after the takeover, and published nothing
+    assert len(partial.read_text().splitlines()) == 15
+    assert job_status(job_dir)["running"] == [0]
+
+    assert run_shard(job_dir, 0, "thief", token=taken[0]) == 25
+    assert merge_job(job_dir, tmp_path / "out.jsonl").rows == 40
+
+
+def test_stale_lock_takeover_never_steals_a_fresh_lock(tmp_path, monkeypatch):
+    """Test a lock replaced between the staleness check and the rename is handed back"""
+    lock_path = tmp_path / "shard-00000.lock"
+    fresh = json.dumps({"worker": "fresh", "host": socket.gethostname(), "pid": os.getpid(), "token": "t"})
+    lock_path.write_text(fresh)
+    # The contender saw the previous, dead owner's lock
+    monkeypatch.setattr(sharded_recompute, "_stale_lock", lambda path, stale_after: b'{"worker": "gone"}')
+
+    assert sharded_recompute._try_lock(lock_path, "late", stale_after=600) is None
+    assert lock_path.read_text() == fresh
+    assert [path.name for path in tmp_path.iterdir()] == ["shard-00000.lock"]
+
+
+def test_merge_rejects_tampered_results(tmp_path):
+    job_dir = tmp_path / "job"
+    split_job(job_dir, create_simple_rubric(), _inputs(20), shards=3)
+    run_worker(job_dir)
+    with open(job_dir / "results" / "shard-00002.jsonl", "a") as f:
+        f.write("[999,\"x\",null,\"e\"]\n")
+
+    with pytest.raises(IncompleteJobError, match="shard-00002: result checksum mismatch"):
+        merge_job(job_dir, tmp_path / "out.jsonl")
+    assert not (tmp_path / "out.jsonl").exists()
+
+
+def test_split_refuses_existing_job(tmp_path):
+    split_job(tmp_path, create_simple_rubric(), _inputs(10), shards=1)
+    with pytest.raises(ValueError, match="already contains a job"):
+        split_job(tmp_path, create_simple_rubric(), _inputs(10), shards=1)
@@ -0,0 +1,192 @@
+"""
+Unit tests for the vectorized fixed-point scoring engine
+
+Every result must be string-identical to the Decimal compute_scores path.
+"""
+
+import random
+import pytest
+from decimal import Decimal
+from calculator import compute_scores, compile_rubric, ScoringError
+from vectorized import compute_scores_vectorized
+from test_calculator import create_sectioned_rubric, _sectioned_submission
+from models import (
+    Rubric, Criterion, Level, Scale, Rounding,
+    ExtractedScores, Award
+)
+
+
+# Test Fixtures
+
+def create_rubric(max_points, weights, mode="percent", total_points=None,
+                  rounding_mode="HALF_UP", decimals=2):
+    """Create a rubric with one criterion per (max_points, weight) pair"""
+    return Rubric(
+        rubric_id="vector-rubric",
+        title="Vector Rubric",
+        scale=Scale(
+            mode=mode,
+            total_points=Decimal(str(total_points)) if total_points is not None else None,
+            rounding=Rounding(mode=rounding_mode, decimals=decimals)
+        ),
+        criteria=[
+            Criterion(
+                id=f"c{i}",
+                name=f"Criterion {i}",
+                max_points=Decimal(str(max_pts)),
+                weight=Decimal(str(weight)),
+                levels=[Level(label="Top", points=Decimal(str(max_pts)), descriptor="Top")]
+            )
+            for i, (max_pts, weight) in enumerate(zip(max_points, weights))
+        ]
+    )
+
+
+def create_submission(points, submission_id="sub"):
+    """Create ExtractedScores awarding points[i] to criterion c{i}"""
+    return ExtractedScores(
+        submission_id=submission_id,
+        scores=[
+            Award(criterion_id=f"c{i}", level="Top",
+                  points_awarded=Decimal(str(p)), rationale="Because")
+            for i, p in enumerate(points)
+        ]
+    )
+
+
+def random_submissions(rng, max_points, count, step):
+    """Random awards on a grid of step, within [0, max_points]"""
+    submissions = []
+    for n in range(count):
+        points = []
+        for max_pts in max_points:
+            ticks = int(Decimal(str(max_pts)) / Decimal(step))
+            points.append(Decimal(step) * rng.randint(0, ticks))
+        submissions.append(create_submission(points, f"sub-{n}"))
+    return submissions
+
+
+# Tests: Decimal Equivalence
+
+@pytest.mark.parametrize("rounding_mode", ["HALF_UP", "HALF_EVEN", "HALF_DOWN"])
+@pytest.mark.parametrize("decimals", [0, 1, 2, 3, 4])
+@pytest.mark.parametrize("mode,total_points", [("percent", None), ("points", 50), ("points", "37.5")])
+def test_matches_decimal_path(rounding_mode, decimals, mode, total_points):
+    """Test vectorized output is string-identical for every mode and precision"""
+    rng = random.Random(f"{rounding_mode}-{decimals}-{mode}-{total_points}")
+    max_points = [4, "2.5", 10, 3]
+    rubric = create_rubric(max_points, ["1.0", "1.5", "0.25", 2], mode, total_points,
+                           rounding_mode, decimals)
+    submissions = random_submissions(rng, max_points, 300, "0.25")
+
+    expected = [compute_scores(rubric, s) for s in submissions]
+
+    assert compute_scores_vectorized(rubric, submissions) == expected
+    assert compute_scores_vectorized(compile_rubric(rubric), submissions) == expected
+
+
+@pytest.mark.parametrize("rounding_mode", ["HALF_UP", "HALF_EVEN", "HALF_DOWN"])
+@pytest.mark.parametrize("decimals", [0, 1])
+def test_matches_decimal_at_midpoints(rounding_mode, decimals):
+    """Test exact rounding ties use the same rule as Decimal.quantize"""
+    # 8 criteria of max 1 => every half point lands exactly on a midpoint
+    rubric = create_rubric([1] * 8, [1] * 8, "points", 20, rounding_mode, decimals)
+    submissions = [
+        create_submission([Decimal("0.5")] * k + [0] * (8 - k), f"sub-{k}")
+        for k in range(9)
+    ]
+
+    expected = [compute_scores(rubric, s) for s in submissions]
+
+    assert compute_scores_vectorized(rubric, submissions) == expected
+
+
+@pytest.mark.parametrize("rounding_mode", ["HALF_UP", "HALF_EVEN", "HALF_DOWN"])
+def test_matches_decimal_for_inexact_division_at_midpoint(rounding_mode):
+    """Test a true midpoint reached through a non-terminating raw/max"""
+    # raw / max = 1/3, final = 1/3 * 1.5 = 0.5 exactly
+    rubric = create_rubric([3], [1], "points", "1.5", rounding_mode, 0)
+    submissions = [create_submission([1])]
+
+    assert compute_scores_vectorized(rubric, submissions) == [compute_scores(rubric, submissions[0])]
+
+
+def test_awards_with_more_places_fall_back_to_decimal():
+    """Test awards beyond the fixed-point precision use the Decimal path"""
+    rubric = create_rubric([4, 4], [1, 1], decimals=4)
+    submissions = [create_submission(["1.234567", "2"]), create_submission(["1.5", "2"])]
+
+    expected = [compute_scores(rubric, s) for s in submissions]
+
+    assert compute_scores_vectorized(rubric, submissions) == expected
+
+
+def test_overflowing_rubric_falls_back_to_decimal():
+    """Test rubrics too large for int64 are scored with Decimal"""
+    huge = "123456789012345.5"
+    rubric = create_rubric([huge, 4], ["3.3333", 1], "points", "987654.321", decimals=4)
+    submissions = [create_submission([huge, 1]), create_submission(["1000", "3.5"])]
+
+    expected = [compute_scores(rubric, s) for s in submissions]
+
+    assert compute_scores_vectorized(rubric, submissions) == expected
+
+
+def test_sectioned_rubric_uses_decimal_path():
+    """Test section subtotals are reported like compute_scores"""
+    rubric = create_sectioned_rubric(mode="points", total_points=50)
+    submissions = [_sectioned_submission()]
+
+    assert compute_scores_vectorized(rubric, submissions) == [compute_scores(rubric, submissions[0])]
+
+
+def test_empty_batch():
+    """Test an empty batch returns no results"""
+    rubric = create_rubric([4], [1])
+
+    assert compute_scores_vectorized(rubric, []) == []
+
+
+# Tests: Validation
+
+def test_raises_first_invalid_submission():
+    """Test errors match compute_scores and are raised in input order"""
+    rubric = create_rubric([4, 4], [1, 1])
+    submissions = [
+        create_submission([1, 2]),
+        create_submission([1]),
+        create_submission([5, 2]),
+    ]
+
+    with pytest.raises(ValueError, match="Missing criteria"):
+        compute_scores_vectorized(rubric, submissions)
+
+
+def test_collects_errors():
+    """Test collect_errors mirrors compute_scores_many"""
+    rubric = create_rubric([4, 4], [1, 1])
+    submissions = [
+        create_submission([1, 2]),
+        create_submission([5, 2]),
+        create_submission([1, 2, 3]),
+    ]
+
+    results = compute_scores_vectorized(rubric, submissions, collect_errors=True)
+
+    assert results[0] == compute_scores(rubric, submissions[0])
+    assert isinstance(results[1], ScoringError)
+    assert results[1].index == 1
+    assert "not in range" in str(results[1].error)
+    assert "Extra criteria" in str(results[2].error)
+
+
+def test_points_mode_without_total():
+    """Test missing total_points is reported like compute_scores"""
+    rubric = create_rubric([4], [1], mode="points", total_points=None)
+
+    with pytest.raises(ValueError, match="total_points required"):
+        compute_scores_vectorized(rubric, [create_submission([2])])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,144 @@
+"""
+Unit tests for the calculator-version migration differ
+"""
+
+import io
+import json
+import sqlite3
+from decimal import Decimal
+
+import pytest
+from calculator import compute_scores
+from job_runner import SCHEMA
+from test_calculator import create_simple_rubric
+from test_regrade import _submissions
+from version_diff import DiffSummary, StoredRow, diff_rows, jsonl_rows, main, sqlite_rows
+
+
+def _stored_rows(rubric, count):
+    """Rows whose stored computed_scores match the current calculator"""
+    rubric_json = rubric.model_dump_json()
+    return [
+        StoredRow(s.submission_id, rubric_json, s.model_dump_json(), json.dumps(compute_scores(rubric, s)))
+        for s in _submissions(count)
+    ]
+
+
+def _tamper(row, **fields):
+    stored = dict(json.loads(row.computed_scores), **fields)
+    return row._replace(computed_scores=json.dumps(stored))
+
+
+@pytest.mark.parametrize("workers,chunk_size", [(1, 7), (2, 5)])
+def test_emits_only_changed_rows_in_order(workers, chunk_size):
+    """Test unchanged rows are skipped and deltas are exact"""
+    rubric = create_simple_rubric(mode="points", total_points=30)
+    rows = _stored_rows(rubric, 60)
+    rows[3] = _tamper(rows[3], percent="1.00")
+    rows[41] = _tamper(rows[41], raw_points="0", final_points="0.00")
+    summary = DiffSummary()
+
+    changed = list(diff_rows(iter(rows), summary, workers=workers, chunk_size=chunk_size))
+
+    assert [c["submission_id"] for c in changed] == ["sub-3", "sub-41"]
+    new_percent = json.loads(_stored_rows(rubric, 4)[3].computed_scores)["percent"]
+    assert changed[0]["changes"] == {"percent": {"old": "1.00", "new": new_percent,
+                                                 "delta": str(Decimal(new_percent) - 1)}}
+    assert set(changed[1]["changes"]) == {"raw_points", "final_points"}
+    assert (summary.rows, summary.unchanged, summary.changed, summary.errors) == (60, 58, 2, 0)
+    assert summary.fields["percent"].changed == 1
+    assert summary.fields["raw_points"].changed == 1
+
+
+def test_failing_rows_and_missing_fields_are_reported():
+    """Test rows that no longer score, or were never scored in full, are emitted"""
+    rubric = create_simple_rubric()
+    rows = _stored_rows(rubric, 5)
+    rows[0] = rows[0]._replace(rubric_json='{"rubric_id": "broken"}')
+    rows[1] = rows[1]._replace(computed_scores=json.dumps({"percent": "1"}))
+    rows[3] = rows[3]._replace(extracted_scores=None)
+    rows[4] = rows[4]._replace(rubric_json=None)
+    summary = DiffSummary()
+
+    changed = list(diff_rows(rows, summary, workers=1))
+
+    assert changed[0]["error"].startswith("Invalid rubric")
+    assert changed[2] == {"submission_id": "sub-3", "error": "Submission has no extracted_scores"}
+    assert changed[3] == {"submission_id": "sub-4", "error": "Assignment has no rubric_json"}
+    assert changed[1]["changes"]["raw_points"]["old"] is None
+    assert changed[1]["changes"]["raw_points"]["delta"] is None
+    assert summary.to_dict()["errors"] == 3
+    assert summary.to_dict()["fields"]["raw_points"] == {
+        "changed": 1, "total_delta": "0", "min_delta": None, "max_delta": None}
+
+
+@pytest.mark.parametrize("computed_scores", ["[1, 2]", "7", '"percent"', "null", "{not json"])
+def test_stored_scores_that_are_not_an_object_are_row_errors(computed_scores):
+    """Test corrupt stored computed_scores is reported for its row, not raised"""
+    rows = _stored_rows(create_simple_rubric(), 3)
+    rows[1] = rows[1]._replace(computed_scores=computed_scores)
+    summary = DiffSummary()
+
+    changed = list(diff_rows(rows, summary, workers=2, chunk_size=1))
+
+    assert changed == [{"submission_id": "sub-1", "error": "Stored computed_scores is not a JSON object"}]
+    assert summary.to_dict()["errors"] == 1
+
+
+def test_input_is_consumed_lazily():
+    """Test the first result is produced before the whole input is read"""
+    rubric = create_simple_rubric()
+    rows = [_tamper(row, percent="0") for row in _stored_rows(rubric, 50)]
+    consumed = []
+
+    def source():
+        for row in rows:
+            consumed.append(row)
+            yield row
+
+    first = next(diff_rows(source(), workers=1, chunk_size=10))
+
+    assert first["submission_id"] == "sub-0"
+    assert len(consumed) <= 11
+
+
+def test_sqlite_and_jsonl_sources(tmp_path):
+    """Test both sources yield the stored triples"""
+    rubric = create_simple_rubric()
+    rows = _stored_rows(rubric, 5)
+    path = tmp_path / "grader.sqlite"
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.execute("INSERT INTO assignments VALUES ('a1', ?)", (rows[0].rubric_json,))
+    conn.executemany(
+        "INSERT INTO submissions (submission_id, assignment_id, extracted_scores, computed_scores)"
+        " VALUES (?, 'a1', ?, ?)",
+        [(r.submission_id, r.extracted_scores, r.computed_scores) for r in rows]
+        + [("unscored", rows[0].extracted_scores, None), ("no-extract", None, rows[0].computed_scores)],
+    )
+    conn.commit()
+    conn.close()
+
+    assert list(sqlite_rows(str(path), chunk_size=2)) == rows
+
+    lines = io.StringIO("\n".join(json.dumps({
+        "submission_id": r.submission_id,
+        "rubric_json": json.loads(r.rubric_json),
+        "extracted_scores": r.extracted_scores,
+        "computed_scores": json.loads(r.computed_scores),
+    }) for r in rows) + "\n\n")
+    assert list(diff_rows(jsonl_rows(lines), workers=1)) == []
+
+
+def test_main_writes_changed_rows(tmp_path, capsys):
+    rubric = create_simple_rubric()
+    rows = _stored_rows(rubric, 4)
+    rows[2] = _tamper(rows[2], percent="50.00")
+    source = tmp_path / "rows.jsonl"
+    source.write_text("".join(json.dumps(r._asdict()) + "\n" for r in rows))
+    output = tmp_path / "changed.jsonl"
+
+    assert main([str(source), "--jsonl", "--workers", "1", "--output", str(output)]) == 1
+
+    assert [json.loads(line)["submission_id"] for line in output.read_text().splitlines()] == ["sub-2"]
+    assert json.loads(capsys.readouterr().err)["changed"] == 1
@@ -0,0 +1,121 @@
+"""
+Unit tests for what-if rubric variant scoring
+"""
+
+import pytest
+from decimal import Decimal
+from calculator import compile_rubric, compute_scores, ScoringError
+from models import Rounding
+from what_if import RubricVariant, apply_variant, score_variants
+from test_calculator import create_simple_rubric, create_extracted_scores, create_sectioned_rubric
+from test_regrade import _submissions
+
+
+VARIANTS = [
+    RubricVariant(name="baseline"),
+    RubricVariant(name="double-evidence", weights={"evidence": Decimal("2")}),
+    RubricVariant(name="points-50", mode="points", total_points=Decimal("50")),
+    RubricVariant(name="half-even-0", rounding=Rounding(mode="HALF_EVEN", decimals=0)),
+    RubricVariant(name="same-weights-points", mode="points", total_points=Decimal("7.5"),
+                  rounding=Rounding(mode="HALF_DOWN", decimals=1)),
+    RubricVariant(name="reweighted", weights={"org": Decimal("0.5"), "style": Decimal("3")},
+                  rounding=Rounding(mode="HALF_UP", decimals=3)),
+]
+
+
+def test_grid_matches_compute_scores_per_cell():
+    """Test every (variant, submission) cell equals compute_scores"""
+    rubric = create_simple_rubric()
+    submissions = _submissions(40)
+
+    grid = score_variants(rubric, VARIANTS, submissions)
+
+    assert [v.name for v in grid] == [v.name for v in VARIANTS]
+    for variant, scores in zip(VARIANTS, grid):
+        expected_rubric = apply_variant(rubric, variant)
+        assert scores.rubric == expected_rubric
+        assert scores.results == [compute_scores(expected_rubric, s) for s in submissions]
+
+
+def test_apply_variant_overrides():
+    """Test weights, scale and rounding overrides"""
+    rubric = create_simple_rubric()
+
+    variant = apply_variant(rubric, VARIANTS[4])
+    reweighted = apply_variant(rubric, VARIANTS[5])
+
+    assert variant.scale.mode == "points"
+    assert variant.scale.total_points == Decimal("7.5")
+    assert variant.scale.rounding.mode == "HALF_DOWN"
+    assert [c.weight for c in reweighted.criteria] == [
+        Decimal("0.5"), Decimal("1.0"), Decimal("1.0"), Decimal("3")
+    ]
+    assert rubric.criteria[0].weight == Decimal("1.0")
+
+
+def test_invalid_variants_are_rejected():
+    """Test unknown criteria and invalid scale overrides"""
+    rubric = create_simple_rubric()
+
+    with pytest.raises(ValueError, match="unknown criteria"):
+        score_variants(rubric, [RubricVariant(name="bad", weights={"bonus": Decimal("1")})], [])
+    with pytest.raises(ValueError, match="Invalid variant 'no-total'"):
+        score_variants(rubric, [RubricVariant(name="no-total", mode="points")], [])
+    with pytest.raises(ValueError, match="Invalid variant 'zero'"):
+        score_variants(rubric, [RubricVariant(name="zero", weights={"org": Decimal("0")})], [])
+
+
+def test_invalid_submissions_share_one_error():
+    """Test submission errors are reported once per variant cell"""
+    submissions = _submissions(3)
+    submissions[1] = create_extracted_scores({"org": ("Level", 1.0, "Missing the rest")})
+
+    grid = score_variants(create_simple_rubric(), VARIANTS[:2], submissions, collect_errors=True)
+
+    for scores in grid:
+        assert isinstance(scores.results[1], ScoringError)
+        assert "Missing criteria" in str(scores.results[1].error)
+    with pytest.raises(ValueError, match="Missing criteria"):
+        score_variants(create_simple_rubric(), VARIANTS[:2], submissions)
+
+
+def test_sectioned_rubric_variants_match_compute_scores():
+    """Test weights inside sections are overridden and subtotals reported"""
+    rubric = create_sectioned_rubric()
+    submissions = _submissions(10)
+
+    grid = score_variants(rubric, VARIANTS, submissions)
+
+    assert grid[1].rubric.sections[0].sections[0].criteria[0].weight == Decimal("2")
+    for variant, scores in zip(VARIANTS, grid):
+        assert scores.results == [compute_scores(scores.rubric, s) for s in submissions]
+        assert "sections" in scores.results[0]
+
+
+
+def test_section_weight_overrides_reweight_flattened_criteria():
+    """Test section weights are overridden and scale every criterion they contain"""
+    rubric = create_sectioned_rubric()
+    submissions = _submissions(10)
+    variants = [
+        RubricVariant(name="base"),
+        RubricVariant(name="writing-x1", section_weights={"writing": Decimal("1")}),
+        RubricVariant(name="mechanics-x3", section_weights={"mechanics": Decimal("3")}, weights={"org": Decimal("2")}),
+    ]
+
+    grid = score_variants(rubric, variants, submissions)
+
+    assert grid[1].rubric.sections[0].weight == Decimal("1")
+    assert grid[2].rubric.sections[0].sections[0].weight == Decimal("3")
+    # grammar, style, evidence: writing x mechanics scaling in the flattened weights
+    weights = [compile_rubric(scores.rubric).weights for scores in grid]
+    assert weights[1][1:] == (Decimal("1.0"), Decimal("1.0"), Decimal("0.5"))
+    assert weights[2] == (Decimal("2"), Decimal("2.0"), Decimal("2.0"), Decimal("6"))
+    for scores in grid:
+        assert scores.results == [compute_scores(scores.rubric, s) for s in submissions]
+    assert grid[1].results != grid[0].results
+    with pytest.raises(ValueError, match="unknown sections"):
+        score_variants(rubric, [RubricVariant(name="bad", section_weights={"essay": Decimal("1")})], [])
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
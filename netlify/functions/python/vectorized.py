@@ -0,0 +1,290 @@
+"""
+Vectorized Fixed-Point Scoring Engine
+
+Scores a whole batch of submissions against one rubric with NumPy integer
+arithmetic. Awarded points are scaled into an int64 matrix (submissions x
+criteria), the weighted totals are a single matrix-vector product, and
+HALF_UP/HALF_EVEN/HALF_DOWN rounding is done on integer quotients and
+remainders.
+
+Output is string-identical to calculator.compute_scores. Rows that cannot be
+represented exactly, or whose result sits so close to a rounding midpoint
+that Decimal's 28-digit division could round differently, are recomputed
+with the Decimal path. Rubrics whose scaled values could overflow int64, and
+rubrics with sections, are scored entirely with the Decimal path.
+"""
+
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from calculator import (
+    CompiledRubric,
+    RubricLike,
+    ScoringError,
+    _as_compiled,
+    _build_scores,
+    _scale_error,
+    _weighted_total_or_error,
+    compute_scores_many,
+)
+from models import ExtractedScores
+
+
+# Minimum decimal places kept for awarded points in the int64 matrix
+POINT_PLACES = 4
+
+# Bound for every intermediate product (leaves headroom for 2 * remainder)
+_INT_LIMIT = 2 ** 62
+
+# Rows whose rounding remainder is this close (relative) to a midpoint are
+# recomputed with Decimal in points mode; Decimal's own error is ~1e-27
+_MIDPOINT_WINDOW = 1e-12
+
+
+def _places(value: Decimal) -> int:
+    """Number of decimal places needed to represent value exactly"""
+    exponent = value.normalize().as_tuple().exponent
+    return -exponent if exponent < 0 else 0
+
+
+def _scaled(value: Decimal, places: int) -> int:
+    """Scale value by 10**places, which must give an exact integer"""
+    return int(value.scaleb(places))
+
+
+def _round_ratio(numerator: np.ndarray, denominator, mode: str) -> np.ndarray:
+    """Round numerator / denominator to an integer with the given Decimal mode"""
+    quotient, remainder = np.divmod(numerator, denominator)
+    twice = remainder * 2
+    if mode == "HALF_UP":
+        up = twice >= denominator
+    elif mode == "HALF_DOWN":
+        up = twice > denominator
+    else:
+        up = (twice > denominator) | ((twice == denominator) & (quotient % 2 == 1))
+    return quotient + up
+
+
+def _divides_exactly(numerator: np.ndarray, denominator: int) -> np.ndarray:
+    """True where numerator / denominator (<= 1) fits in Decimal's 28 digits exactly"""
+    reduced = denominator // np.gcd(numerator, denominator)
+    places = np.zeros_like(reduced)
+    for factor in (2, 5):
+        count = np.zeros_like(reduced)
+        divisible = reduced % factor == 0
+        while divisible.any():
+            reduced = np.where(divisible, reduced // factor, reduced)
+            count += divisible
+            divisible = reduced % factor == 0
+        places = np.maximum(places, count)
+    return (reduced == 1) & (places <= 28)
+
+
+def _format_fixed(values: np.ndarray, decimals: int) -> List[str]:
+    """Format integers scaled by 10**decimals like str(Decimal.quantize(...))"""
+    if decimals == 0:
+        return [str(v) for v in values.tolist()]
+    unit = 10 ** decimals
+    return [f"{v // unit}.{v % unit:0{decimals}d}" for v in values.tolist()]
+
+
+class _FixedPointPlan:
+    """Integer scales and bounds for scoring one rubric in fixed point"""
+
+    __slots__ = ("point_places", "scale_places", "max_ints", "weight_ints",
+                 "max_total", "total_ints", "total_places", "decimals", "mode")
+
+    def __init__(self, compiled: CompiledRubric, min_point_places: int = POINT_PLACES):
+        rounding = compiled.rubric.scale.rounding
+        self.decimals = rounding.decimals
+        self.mode = rounding.mode
+
+        self.point_places = max([min_point_places] + [_places(m) for m in compiled.max_points])
+        weight_places = max(_places(w) for w in compiled.weights)
+        self.scale_places = self.point_places + weight_places
+
+        self.max_ints = [_scaled(m, self.point_places) for m in compiled.max_points]
+        self.weight_ints = [_scaled(w, weight_places) for w in compiled.weights]
+        self.max_total = sum(m * w for m, w in zip(self.max_ints, self.weight_ints))
+
+        self.total_ints = None
+        self.total_places = 0
+        if compiled.total_points is not None:
+            self.total_places = _places(compiled.total_points)
+            self.total_ints = _scaled(compiled.total_points, self.total_places)
+
+    def fits_int64(self, points_mode: bool) -> bool:
+        """Check every intermediate product stays within int64 for in-range awards"""
+        bounds = [
+            self.max_total,
+            self.max_total * 100 * 10 ** self.decimals,
+            self.max_total * 10 ** max(self.decimals - self.scale_places, 0),
+            max(self.max_ints) * max(self.weight_ints),
+        ]
+        if points_mode:
+            if self.total_ints is None:
+                return False
+            bounds.append(self.max_total * self.total_ints * 10 ** self.decimals)
+            bounds.append(self.max_total * 10 ** self.total_places)
+            # Keep the float midpoint window far above Decimal's own error
+            if self.total_ints * 10 ** self.decimals >= 10 ** (12 + self.total_places):
+                return False
+        return all(bound < _INT_LIMIT for bound in bounds)
+
+
+def _score_fixed_point(plan: _FixedPointPlan, points: np.ndarray, points_mode: bool):
+    """
+    Round raw, percent and final points for an in-range int64 award matrix.
+
+    points holds awards scaled by 10**plan.point_places, one column per
+    criterion in rubric order. Rounded values are integers scaled by
+    10**plan.decimals (final is None in percent mode). The returned mask marks
+    rows whose result must be recomputed with Decimal.
+    """
+    # Weighted totals, scaled by 10**scale_places
+    raw = points @ np.array(plan.weight_ints, dtype=np.int64)
+    decimals = plan.decimals
+    mode = plan.mode
+
+    shift = decimals - plan.scale_places
+    if shift >= 0:
+        raw_rounded = raw * 10 ** shift
+    else:
+        raw_rounded = _round_ratio(raw, 10 ** -shift, mode)
+
+    percent_rounded = _round_ratio(raw * (100 * 10 ** decimals), plan.max_total, mode)
+
+    final_rounded = None
+    near_midpoint = np.zeros(len(raw), dtype=bool)
+    if points_mode:
+        numerator = raw * (plan.total_ints * 10 ** decimals)
+        denominator = plan.max_total * 10 ** plan.total_places
+        final_rounded = _round_ratio(numerator, denominator, mode)
+        # Decimal rounds an inexact raw/max to 28 digits before scaling; near
+        # a midpoint that can flip the result, so defer those rows to Decimal
+        remainder = numerator % denominator
+        distance = np.abs(remainder * 2 - denominator).astype(np.float64) / denominator
+        near_midpoint = distance < _MIDPOINT_WINDOW
+        if near_midpoint.any():
+            near_midpoint &= ~_divides_exactly(raw, plan.max_total)
+
+    return raw_rounded, percent_rounded, final_rounded, near_midpoint
+
+
+def compute_scores_vectorized(
+    rubric: RubricLike,
+    extracted_scores: Sequence[ExtractedScores],
+    collect_errors: bool = False,
+) -> List[Union[Dict[str, str], ScoringError]]:
+    """
+    Score a batch of submissions with fixed-point NumPy arithmetic.
+
+    Args:
+        rubric: Grading rubric or CompiledRubric shared by all submissions
+        extracted_scores: LLM-extracted per-submission scores
+        collect_errors: If True, return a ScoringError in place of each
+            submission that fails validation instead of raising
+
+    Returns:
+        compute_scores() result dicts (or ScoringError entries), in input order
+
+    Raises:
+        ValueError: For the first invalid submission when collect_errors is False
+    """
+    compiled = _as_compiled(rubric)
+    extracted_scores = list(extracted_scores)
+    plan = _FixedPointPlan(compiled)
+    points_mode = compiled.scale_mode == "points"
+
+    # Section subtotals are only produced by the Decimal path
+    if compiled.max_weighted == 0 or compiled.section_ids or not plan.fits_int64(points_mode):
+        return list(compute_scores_many(compiled, extracted_scores, collect_errors))
+
+    n_rows = len(extracted_scores)
+    n_criteria = len(compiled.criterion_ids)
+    # Rows that must go through the Decimal path (mismatch or not representable)
+    decimal_rows = np.zeros(n_rows, dtype=bool)
+    flat_points: List[int] = []
+    zero_row = [0] * n_criteria
+
+    scaled_cache: Dict[Decimal, Optional[int]] = {}
+    point_scale = Decimal(10) ** plan.point_places
+    criterion_ids = compiled.criterion_ids
+    criterion_id_set = compiled.criterion_id_set
+
+    for row, extracted in enumerate(extracted_scores):
+        scores = extracted.scores
+        if tuple(score.criterion_id for score in scores) == criterion_ids:
+            awarded_values = [score.points_awarded for score in scores]
+        else:
+            points_by_id = {score.criterion_id: score.points_awarded for score in scores}
+            if points_by_id.keys() != criterion_id_set:
+                decimal_rows[row] = True
+                flat_points.extend(zero_row)
+                continue
+            awarded_values = [points_by_id[criterion_id] for criterion_id in criterion_ids]
+
+        row_ints = []
+        for awarded in awarded_values:
+            scaled = scaled_cache.get(awarded, False)
+            if scaled is False:
+                try:
+                    exact = awarded * point_scale
+                    scaled = int(exact)
+                    if scaled != exact or abs(scaled) >= _INT_LIMIT:
+                        scaled = None
+                except (InvalidOperation, OverflowError, ValueError):
+                    scaled = None
+                scaled_cache[awarded] = scaled
+            if scaled is None:
+                break
+            row_ints.append(scaled)
+
+        if len(row_ints) == n_criteria:
+            flat_points.extend(row_ints)
+        else:
+            decimal_rows[row] = True
+            flat_points.extend(zero_row)
+
+    points = np.array(flat_points, dtype=np.int64).reshape(n_rows, n_criteria)
+
+    # Out-of-range awards fail validation; let the Decimal path report them
+    max_ints = np.array(plan.max_ints, dtype=np.int64)
+    out_of_range = ((points < 0) | (points > max_ints)).any(axis=1)
+    decimal_rows |= out_of_range
+    points[decimal_rows] = 0
+
+    raw_rounded, percent_rounded, final_rounded, near_midpoint = _score_fixed_point(plan, points, points_mode)
+    decimal_rows |= near_midpoint
+    decimals = plan.decimals
+
+    raw_strings = _format_fixed(raw_rounded, decimals)
+    percent_strings = _format_fixed(percent_rounded, decimals)
+    final_strings = _format_fixed(final_rounded, decimals) if points_mode else None
+    max_string = str(compiled.round(compiled.max_weighted))
+    scale_error = _scale_error(compiled)
+
+    results: List[Union[Dict[str, str], ScoringError]] = []
+    for row, extracted in enumerate(extracted_scores):
+        if decimal_rows[row]:
+            raw_weighted, error = _weighted_total_or_error(compiled, extracted)
+            if error is None:
+                error = scale_error
+            if error is None:
+                results.append(_build_scores(compiled, raw_weighted))
+            elif collect_errors:
+                results.append(ScoringError(row, extracted.submission_id, ValueError(error)))
+            else:
+                raise ValueError(error)
+            continue
+
+        results.append({
+            "raw_points": raw_strings[row],
+            "max_points": max_string,
+            "percent": percent_strings[row],
+            "final_points": final_strings[row] if points_mode else None
+        })
+
+    return results
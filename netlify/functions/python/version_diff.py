@@ -0,0 +1,307 @@
+"""
+Calculator-Version Migration Differ
+
+Before a calculator change rewrites stored grades, recompute every stored
+(rubric_json, extracted_scores, computed_scores) triple with the current
+compute_scores and report only the submissions whose raw_points, percent or
+final_points would change, plus a summary of the deltas.
+
+Rows are streamed in fixed-size chunks and scored across a process pool
+with a bounded number of chunks in flight, so memory stays flat however
+many rows there are; results come back in input order. Each worker keeps a
+small LRU of compiled rubrics keyed by rubric_json, since rows of the same
+assignment share one rubric.
+
+Sources are the submissions table (joined to assignments.rubric_json, as in
+job_runner.SCHEMA) or a JSONL file of
+{"submission_id", "rubric_json", "extracted_scores", "computed_scores"}.
+
+Usage:
+    python -m version_diff grader.sqlite [--workers 4] [--output changed.jsonl]
+    python -m version_diff triples.jsonl --jsonl
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from calculator import CALCULATOR_VERSION, CompiledRubric, compile_rubric, compute_scores
+from models import load_rubric_json, parse_extracted_scores_json
+
+
+DEFAULT_CHUNK_SIZE = 1000
+COMPARED_FIELDS = ("raw_points", "percent", "final_points")
+# Compiled rubrics kept per process
+_RUBRIC_SLOTS = 256
+
+
+class StoredRow(NamedTuple):
+    """One stored grade; computed_scores is the JSON object as written"""
+    submission_id: str
+    rubric_json: str
+    extracted_scores: str
+    computed_scores: Optional[str]
+
+
+def sqlite_rows(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[StoredRow]:
+    """Stream scored submissions with their assignment's rubric from SQLite"""
+    conn = sqlite3.connect(path)
+    try:
+        cursor = conn.execute(
+            "SELECT s.submission_id, a.rubric_json, s.extracted_scores, s.computed_scores"
+            " FROM submissions s JOIN assignments a ON a.assignment_id = s.assignment_id"
+            " WHERE s.computed_scores IS NOT NULL AND s.extracted_scores IS NOT NULL"
+            " AND a.rubric_json IS NOT NULL ORDER BY s.submission_id"
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            for row in rows:
+                yield StoredRow(*row)
+    finally:
+        conn.close()
+
+
+def jsonl_rows(stream: TextIO) -> Iterator[StoredRow]:
+    """Stream rows from JSONL; rubric/extracted/computed may be objects or JSON text"""
+    for line in stream:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        fields = []
+        for name in ("rubric_json", "extracted_scores", "computed_scores"):
+            value = record.get(name)
+            fields.append(value if value is None or isinstance(value, str) else json.dumps(value))
+        yield StoredRow(record["submission_id"], *fields)
+
+
+# Compiled rubric (or the ValueError it raised) per rubric_json, per process
+_rubrics: "OrderedDict[str, object]" = OrderedDict()
+
+
+def _compiled(rubric_json: str) -> CompiledRubric:
+    cached = _rubrics.get(rubric_json)
+    if cached is None:
+        try:
+            cached = compile_rubric(load_rubric_json(rubric_json))
+        except ValueError as e:
+            cached = ValueError(f"Invalid rubric: {e}")
+        _rubrics[rubric_json] = cached
+        if len(_rubrics) > _RUBRIC_SLOTS:
+            _rubrics.popitem(last=False)
+    else:
+        _rubrics.move_to_end(rubric_json)
+    if isinstance(cached, ValueError):
+        raise cached
+    return cached
+
+
+def _delta(old: Optional[str], new: Optional[str]) -> Optional[str]:
+    if old is None or new is None:
+        return None
+    try:
+        return str(Decimal(new) - Decimal(old))
+    except InvalidOperation:
+        return None
+
+
+def diff_row(row: StoredRow) -> Optional[Dict]:
+    """
+    Recompute one stored row.
+
+    Returns:
+        None if the compared fields are unchanged, otherwise
+        {"submission_id", "changes": {field: {"old", "new", "delta"}}} or
+        {"submission_id", "error"} if the row no longer scores
+    """
+    try:
+        stored = json.loads(row.computed_scores) if row.computed_scores else {}
+    except ValueError:
+        stored = None
+    if not isinstance(stored, dict):
+        return {"submission_id": row.submission_id, "error": "Stored computed_scores is not a JSON object"}
+    if not isinstance(row.rubric_json, str):
+        return {"submission_id": row.submission_id, "error": "Assignment has no rubric_json"}
+    if not isinstance(row.extracted_scores, (str, bytes)):
+        return {"submission_id": row.submission_id, "error": "Submission has no extracted_scores"}
+    try:
+        computed = compute_scores(_compiled(row.rubric_json), parse_extracted_scores_json(row.extracted_scores))
+    except ValueError as e:
+        return {"submission_id": row.submission_id, "error": str(e)}
+
+    changes = {}
+    for field in COMPARED_FIELDS:
+        old, new = stored.get(field), computed[field]
+        if old != new:
+            changes[field] = {"old": old, "new": new, "delta": _delta(old, new)}
+    if not changes:
+        return None
+    return {"submission_id": row.submission_id, "changes": changes}
+
+
+def _diff_chunk(rows: List[StoredRow]) -> Tuple[int, List[Dict]]:
+    """Worker task: (rows seen, changed rows) for one chunk"""
+    changed = []
+    for row in rows:
+        result = diff_row(row)
+        if result is not None:
+            changed.append(result)
+    return len(rows), changed
+
+
+class FieldDelta:
+    """Running count and min/max/total of one field's deltas"""
+
+    __slots__ = ("changed", "total", "min", "max")
+
+    def __init__(self):
+        self.changed = 0
+        self.total = Decimal(0)
+        self.min: Optional[Decimal] = None
+        self.max: Optional[Decimal] = None
+
+    def add(self, delta: Optional[str]) -> None:
+        self.changed += 1
+        if delta is None:
+            return
+        value = Decimal(delta)
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def to_dict(self) -> Dict[str, Optional[str]]:
+        return {
+            "changed": self.changed,
+            "total_delta": str(self.total),
+            "min_delta": None if self.min is None else str(self.min),
+            "max_delta": None if self.max is None else str(self.max),
+        }
+
+
+class DiffSummary:
+    """Fixed-size summary of a diff run"""
+
+    def __init__(self):
+        self.rows = 0
+        self.changed = 0
+        self.errors = 0
+        self.fields = {field: FieldDelta() for field in COMPARED_FIELDS}
+
+    def add(self, result: Dict) -> None:
+        if "error" in result:
+            self.errors += 1
+            return
+        self.changed += 1
+        for field, change in result["changes"].items():
+            self.fields[field].add(change["delta"])
+
+    @property
+    def unchanged(self) -> int:
+        return self.rows - self.changed - self.errors
+
+    def to_dict(self) -> Dict:
+        return {
+            "calculator_version": CALCULATOR_VERSION,
+            "rows": self.rows,
+            "unchanged": self.unchanged,
+            "changed": self.changed,
+            "errors": self.errors,
+            "fields": {field: delta.to_dict() for field, delta in self.fields.items()},
+        }
+
+
+def _chunks(rows: Iterable[StoredRow], chunk_size: int) -> Iterator[List[StoredRow]]:
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _chunk_results(rows: Iterable[StoredRow], workers: int, chunk_size: int) -> Iterator[Tuple[int, List[Dict]]]:
+    """Chunk results in input order with at most 2 * workers chunks in flight"""
+    if workers <= 1:
+        for chunk in _chunks(rows, chunk_size):
+            yield _diff_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in _chunks(rows, chunk_size):
+            pending.append(executor.submit(_diff_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def diff_rows(
+    rows: Iterable[StoredRow],
+    summary: Optional[DiffSummary] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[Dict]:
+    """
+    Yield changed (or now-failing) rows in input order.
+
+    Args:
+        rows: Stored rows, consumed lazily
+        summary: Updated in place as results are yielded
+        workers: Worker processes (default: CPU count); 1 diffs in-process
+        chunk_size: Rows sent to a worker per task
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    for seen, changed in _chunk_results(rows, workers, chunk_size):
+        if summary is not None:
+            summary.rows += seen
+        for result in changed:
+            if summary is not None:
+                summary.add(result)
+            yield result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Report stored grades the current calculator would change")
+    parser.add_argument("source", help="SQLite database, or JSONL file with --jsonl ('-' for stdin)")
+    parser.add_argument("--jsonl", action="store_true", help="Read rows from JSONL")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--output", help="Write changed rows as JSONL here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    if args.jsonl:
+        stream = sys.stdin if args.source == "-" else open(args.source)
+        rows = jsonl_rows(stream)
+    else:
+        stream = None
+        rows = sqlite_rows(args.source, args.chunk_size)
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    summary = DiffSummary()
+    try:
+        for result in diff_rows(rows, summary, args.workers, args.chunk_size):
+            out.write(json.dumps(result) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if stream not in (None, sys.stdin):
+            stream.close()
+
+    print(json.dumps(summary.to_dict(), indent=2), file=sys.stderr)
+    return 1 if summary.changed or summary.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""
+What-If Rubric Variants
+
+Scores M submissions under N variants of one base rubric (alternative
+criterion or section weights, scale mode/total_points and rounding) in one
+pass. Awards are
+parsed and validated once per submission; weighted totals are computed once
+per distinct weight vector and shared by every variant that uses it, so only
+the cheap division/rounding step runs N x M times.
+
+Each cell is identical to compute_scores(variant_rubric, submission).
+"""
+
+from decimal import Decimal
+from typing import Dict, List, Literal, NamedTuple, Optional, Sequence, Tuple, Union
+
+from pydantic import BaseModel, Field
+from calculator import (
+    CompiledRubric,
+    ScoringError,
+    _build_scores,
+    _criterion_mismatch_error,
+    compile_rubric,
+)
+from models import Rubric, Rounding, ExtractedScores
+
+
+class RubricVariant(BaseModel):
+    """Overrides applied to a base rubric for what-if scoring"""
+    name: str = Field(..., min_length=1)
+    weights: Dict[str, Decimal] = Field(default_factory=dict)
+    section_weights: Dict[str, Decimal] = Field(default_factory=dict)
+    mode: Optional[Literal["percent", "points"]] = None
+    total_points: Optional[Decimal] = None
+    rounding: Optional[Rounding] = None
+
+
+class VariantScores(NamedTuple):
+    """Scores for every submission under one variant, in input order"""
+    name: str
+    rubric: Rubric
+    results: List[Union[Dict[str, str], ScoringError]]
+
+
+def apply_variant(rubric: Rubric, variant: RubricVariant) -> Rubric:
+    """
+    Build the validated rubric a variant describes.
+
+    Section weight overrides scale every criterion inside the section (and
+    its nested sections) once the rubric is flattened, as in compute_scores.
+
+    Raises:
+        ValueError: If the variant names unknown criteria or sections, or
+            produces an invalid rubric
+    """
+    compiled = CompiledRubric(rubric)
+    unknown = set(variant.weights) - set(compiled.criterion_ids)
+    if unknown:
+        raise ValueError(f"Variant '{variant.name}' has weights for unknown criteria: {unknown}")
+    unknown = set(variant.section_weights) - set(compiled.section_ids)
+    if unknown:
+        raise ValueError(f"Variant '{variant.name}' has weights for unknown sections: {unknown}")
+
+    data = rubric.model_dump()
+    for criterion in _criterion_dicts(data):
+        if criterion["id"] in variant.weights:
+            criterion["weight"] = variant.weights[criterion["id"]]
+    for section in _section_dicts(data):
+        if section["id"] in variant.section_weights:
+            section["weight"] = variant.section_weights[section["id"]]
+    if variant.mode is not None:
+        data["scale"]["mode"] = variant.mode
+    if variant.total_points is not None:
+        data["scale"]["total_points"] = variant.total_points
+    if variant.rounding is not None:
+        data["scale"]["rounding"] = variant.rounding.model_dump()
+
+    return Rubric.model_validate(data)
+
+
+def _criterion_dicts(data: dict):
+    """Every criterion dict in a dumped rubric, including those in sections"""
+    yield from data["criteria"]
+    for section in data.get("sections", []):
+        yield from _criterion_dicts(section)
+
+
+def _section_dicts(data: dict):
+    """Every section dict in a dumped rubric, nested ones included"""
+    for section in data.get("sections", []):
+        yield section
+        yield from _section_dicts(section)
+
+
+def _awarded_vector(
+    base: CompiledRubric, extracted: ExtractedScores
+) -> Tuple[Optional[Tuple[Decimal, ...]], Optional[str]]:
+    """Validated awards in rubric order (weights do not affect validation)"""
+    points_by_id = {score.criterion_id: score.points_awarded for score in extracted.scores}
+    error = _criterion_mismatch_error(base, points_by_id)
+    if error is not None:
+        return None, error
+
+    awarded = tuple(points_by_id[criterion_id] for criterion_id in base.criterion_ids)
+    for criterion_id, points, max_points in zip(base.criterion_ids, awarded, base.max_points):
+        if points < 0 or points > max_points:
+            return None, (
+                f"Invalid points for '{criterion_id}': {points} "
+                f"not in range [0, {max_points}]"
+            )
+    return awarded, None
+
+
+def score_variants(
+    rubric: Rubric,
+    variants: Sequence[RubricVariant],
+    submissions: Sequence[ExtractedScores],
+    collect_errors: bool = False,
+) -> List[VariantScores]:
+    """
+    Score every submission under every rubric variant.
+
+    Args:
+        rubric: Base grading rubric
+        variants: Overrides to evaluate (criterion or section weights, scale
+            mode/total, rounding)
+        submissions: Extracted scores shared by all variants
+        collect_errors: If True, record a ScoringError per invalid submission
+            instead of raising
+
+    Returns:
+        One VariantScores per variant, in variant order
+
+    Raises:
+        ValueError: If a variant is invalid, or for the first invalid
+            submission when collect_errors is False
+    """
+    base = compile_rubric(rubric)
+    compiled_variants: List[CompiledRubric] = []
+    for variant in variants:
+        try:
+            compiled_variants.append(compile_rubric(apply_variant(rubric, variant)))
+        except ValueError as e:
+            raise ValueError(f"Invalid variant '{variant.name}': {e}") from e
+
+    # Parse and validate awards once
+    awarded_rows: List[Optional[Tuple[Decimal, ...]]] = []
+    errors: Dict[int, ScoringError] = {}
+    for index, extracted in enumerate(submissions):
+        awarded, error = _awarded_vector(base, extracted)
+        if error is not None:
+            if not collect_errors:
+                raise ValueError(error)
+            errors[index] = ScoringError(index, extracted.submission_id, ValueError(error))
+        awarded_rows.append(awarded)
+
+    # Weighted totals once per distinct weight vector
+    totals_by_weights: Dict[Tuple[Decimal, ...], List[Optional[Decimal]]] = {}
+    for compiled in compiled_variants:
+        if compiled.weights in totals_by_weights:
+            continue
+        totals = []
+        for awarded in awarded_rows:
+            if awarded is None:
+                totals.append(None)
+                continue
+            total = Decimal("0")
+            for points, weight in zip(awarded, compiled.weights):
+                total += points * weight
+            totals.append(total)
+        totals_by_weights[compiled.weights] = totals
+
+    grid = []
+    for variant, compiled in zip(variants, compiled_variants):
+        results: List[Union[Dict[str, str], ScoringError]] = []
+        for index, (awarded, total) in enumerate(zip(awarded_rows, totals_by_weights[compiled.weights])):
+            if total is None:
+                results.append(errors[index])
+            elif compiled.section_ids:
+                results.append(_build_scores(compiled, total, compiled._section_subtotals(awarded)))
+            else:
+                results.append(_build_scores(compiled, total))
+        grid.append(VariantScores(variant.name, compiled.rubric, results))
+
+    return grid